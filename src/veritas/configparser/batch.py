@@ -0,0 +1,184 @@
+import os
+import json
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from loguru import logger
+
+# veritas
+from veritas.configparser import ttp_registry
+from veritas.configparser import parse_cache
+
+# parse many exported configs (eg. the <hostname>.conf files written by the onboarding)
+# without contacting the devices. Parsing is CPU bound so the configs are parsed by a
+# pool of processes. Each process compiles the template only once (see ttp_registry).
+
+# the template and the cache of the worker process (see _init_worker)
+_template = None
+_cache = None
+
+
+def parse_directory(directory:str,
+                    platform:str='ios',
+                    pattern:str='*.conf',
+                    max_workers:int=None,
+                    chunksize:int=16,
+                    template_filename:str=None,
+                    with_facts:bool=False,
+                    cache:parse_cache.ParseCache=None):
+    """parse all configs of a directory
+
+    Parameters
+    ----------
+    directory : str
+        the directory that contains the configs
+    platform : str, optional
+        platform of the devices, by default 'ios'
+    pattern : str, optional
+        pattern of the config files, by default '*.conf'
+    max_workers : int, optional
+        number of processes, by default the number of CPUs
+    chunksize : int, optional
+        number of configs sent to a process at once, by default 16
+    template_filename : str, optional
+        name of the template; by default the template configured for the platform
+    with_facts : bool, optional
+        add the facts (<hostname>.facts) to the result, by default False
+    cache : ParseCache, optional
+        on-disk cache of parsed configs; unchanged configs are not parsed again
+
+    Yields
+    ------
+    result : dict
+        hostname, filename, platform, parsed config, facts and error of each config
+
+    Examples
+    --------
+    >>> for result in batch.parse_directory('./export'):
+    ...     print(result['hostname'], result['error'])
+    """
+    filenames = sorted(glob.glob(os.path.join(directory, pattern)))
+    logger.bind(extra="batch").info(f'found {len(filenames)} configs in {directory}')
+    yield from parse_files(filenames,
+                           platform=platform,
+                           max_workers=max_workers,
+                           chunksize=chunksize,
+                           template_filename=template_filename,
+                           with_facts=with_facts,
+                           cache=cache)
+
+def parse_files(filenames:list,
+                platform:str='ios',
+                max_workers:int=None,
+                chunksize:int=16,
+                template_filename:str=None,
+                with_facts:bool=False,
+                cache:parse_cache.ParseCache=None):
+    """parse list of config files using a process pool
+
+    The results are returned in the order of the filenames as soon as they are available.
+    See parse_directory for the parameters.
+
+    Yields
+    ------
+    result : dict
+        hostname, filename, platform, parsed config, facts and error of each config
+    """
+    # read the template once; each worker gets the template when it is started
+    template = ttp_registry.get_template(platform=platform, filename=template_filename)
+    if template is None:
+        raise ValueError(f'no template found for platform {platform}')
+
+    jobs = [(filename, with_facts) for filename in filenames]
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             initializer=_init_worker,
+                             initargs=(template, cache)) as executor:
+        for result in executor.map(_parse_file, jobs, chunksize=chunksize):
+            result['platform'] = platform
+            yield result
+
+def write_results(results, filename:str, format:str=None) -> int:
+    """write results to file
+
+    The format jsonl writes one result per line and does not need to keep the results
+    in memory. The formats parquet and csv write a table (one row per config) using pandas;
+    the parsed config and the facts are stored as json strings.
+
+    Parameters
+    ----------
+    results : iterable
+        the results of parse_directory or parse_files
+    filename : str
+        name of the file
+    format : str, optional
+        jsonl, parquet or csv; by default the extension of the filename
+
+    Returns
+    -------
+    written : int
+        number of written results
+    """
+    format = format if format else os.path.splitext(filename)[1].lstrip('.').lower()
+    written = 0
+    if format == 'jsonl':
+        with open(filename, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result, default=str))
+                f.write('\n')
+                written += 1
+    elif format in ['parquet', 'csv']:
+        import pandas as pd
+        rows = []
+        for result in results:
+            row = dict(result)
+            row['config'] = json.dumps(row.get('config'), default=str)
+            row['facts'] = json.dumps(row.get('facts'), default=str)
+            rows.append(row)
+        df = pd.DataFrame(rows, columns=['hostname', 'filename', 'platform', 'config', 'facts', 'error'])
+        if format == 'parquet':
+            df.to_parquet(filename, index=False)
+        else:
+            df.to_csv(filename, index=False)
+        written = len(rows)
+    else:
+        raise ValueError(f'unknown format {format}; use jsonl, parquet or csv')
+
+    logger.bind(extra="batch").info(f'wrote {written} results to {filename}')
+    return written
+
+def _init_worker(template:str, cache:parse_cache.ParseCache) -> None:
+    """save template and cache in worker process"""
+    global _template, _cache
+    _template = template
+    _cache = cache
+
+def _parse_file(job:tuple) -> dict:
+    """parse a single config file (runs in a worker process)"""
+    filename, with_facts = job
+    hostname = os.path.splitext(os.path.basename(filename))[0]
+    result = {'hostname': hostname,
+              'filename': filename,
+              'platform': None,
+              'config': None,
+              'facts': None,
+              'error': None}
+    try:
+        with open(filename, 'r') as f:
+            device_config = f.read()
+        parsed_config = None
+        if _cache is not None:
+            cache_key = _cache.make_key(device_config, _template)
+            cached = _cache.get(cache_key)
+            parsed_config = cached['parsed_config'] if cached else None
+        if parsed_config is None:
+            parsed_config = ttp_registry.parse(device_config, _template)
+            if _cache is not None:
+                _cache.put(cache_key, {'parsed_config': parsed_config, 'naming': None})
+        result['config'] = parsed_config[0] if parsed_config else {}
+        if with_facts:
+            facts_filename = os.path.splitext(filename)[0] + '.facts'
+            if os.path.exists(facts_filename):
+                with open(facts_filename, 'r') as f:
+                    result['facts'] = json.load(f)
+    except Exception as exc:
+        result['error'] = str(exc)
+    return result
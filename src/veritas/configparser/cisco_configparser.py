@@ -1,12 +1,11 @@
-import yaml
-import importlib
-from ttp import ttp
 from loguru import logger
 
 # veritas
 from veritas.onboarding import plugins
 from veritas.configparser import abstract_configparser
-from veritas import tools
+from veritas.configparser import config_index
+from veritas.configparser import ttp_registry
+from veritas.tools import tools
 
 
 class Configparser(abstract_configparser.Configparser):
@@ -18,20 +17,27 @@ class Configparser(abstract_configparser.Configparser):
         device configuration
     platform : str
         platform of the device (ios, nxos, iosxr, asa, ...)
+
+    Notes
+    -----
+    Set parse_cache to a ParseCache to reuse the parsed config of unchanged configs.
     """
+
+    # on-disk cache of parsed configs (see parse_cache.ParseCache); disabled by default
+    parse_cache = None
+
     def __init__(self, config:list, platform:str='ios'):
         self._device_config = config
-        self._parser = None
         self._template = None
         self._template_filename = None
         self._parsed_config = [{}]
         # naming is used to save the exact spelling of the interface
         # nxos and ios differs using Port-channel/Port-Channel/port-channel
         self._naming = {}
-
-        package = f'{__name__.split(".")[0]}.configparser.data'
-        with importlib.resources.open_text(package, 'config.yaml') as f:
-            self._my_config = yaml.safe_load(f.read())
+        # the index of the device config is used to get sections and to find patterns
+        self._index = config_index.ConfigIndex(config)
+        # the config and the templates are read once per process
+        self._my_config = ttp_registry.get_config()
 
         if not self.parse(config, platform):
             logger.critical('failed to parse config')
@@ -99,34 +105,7 @@ class Configparser(abstract_configparser.Configparser):
         found : bool
             True if found, False otherwise
         """
-        key = None
-        value = None
-
-        for k,v in properties.items():
-            if 'match' in k:
-                key = k
-                value = v
-    
-        global_config = self.get_global_config()
-
-        # the key can be match__ic etc.
-        cmd = key.split('__')[0]
-        if '__' in key:
-            lookup = key.split('__')[1]
-
-        logger.debug(f'cmd: "{cmd}" lookup: "{lookup}" value: "{value}" lines: {len(global_config)}')
-
-        for line in global_config:
-            if properties.get('ignore_leading_spaces'):
-                src = line.lstrip()
-            else:
-                src = line
-
-            if tools.find_in_line(cmd, lookup, value, src):
-                logger.debug('found pattern in global config')
-                return True
-        
-        return False
+        return self.find_all_in_global([properties])[0]
 
     def find_in_interfaces(self, properties:dict) -> list:
         """return list of interfaces that match properties
@@ -141,42 +120,7 @@ class Configparser(abstract_configparser.Configparser):
         interfaces : list
             list of interfaces that match properties
         """
-        key = None
-        value = None
-        ignore_leading_spaces = False
-
-        for k,v in properties.items():
-            if 'match' in k:
-                key = k
-                value = v
-            elif 'ignore_leading_spaces' == k:
-                ignore_leading_spaces = v
-    
-        interface_config = self.get_section('interfaces')
-
-        # matched_on contains the list of all interfaces the value matched
-        matched_on = []
-        # the key can be match__ic etc.
-        cmd = key.split('__')[0]
-        if '__' in key:
-            lookup = key.split('__')[1]
-
-        logger.debug(f'cmd: "{cmd}" lookup: "{lookup}" value: "{value}" lines: {len(interface_config)}')
-
-        for line in interface_config:
-            if ignore_leading_spaces:
-                src = line.lstrip()
-            else:
-                src = line
-
-            if src.lower().startswith('interface '):
-                interface = line[10:]
-            
-            if tools.find_in_line(cmd, lookup, value, src):
-                matched_on.append(interface)
-
-        logger.debug(f'matched_on={matched_on}')
-        return matched_on
+        return self.find_all_in_interfaces([properties])[0]
 
     def get_fqdn(self) -> str:
         """return FQDN of device
@@ -220,15 +164,28 @@ class Configparser(abstract_configparser.Configparser):
 
         device_config = config if config else self._device_config
 
-        # create parser object and parse data using template:
+        # unchanged configs are loaded from the cache
+        cache_key = None
+        if self.parse_cache is not None:
+            cache_key = self.parse_cache.make_key(device_config, ttp_template)
+            cached = self.parse_cache.get(cache_key)
+            if cached is not None:
+                self._parsed_config = cached['parsed_config']
+                if cached.get('naming') is None:
+                    # entries written by the batch parser do not contain the naming
+                    self._save_naming()
+                else:
+                    self._naming = cached['naming']
+                return True
+
+        # the compiled template is reused and fed with the device config
         logger.debug('parsing device config')
         try:
-            self._parser = ttp(data=device_config, 
-                               template=ttp_template,
-                               log_level="CRITICAL")
-            self._parser.parse()
-            self._parsed_config = self._parser.result(format='raw')[0]
+            self._parsed_config = ttp_registry.parse(device_config, ttp_template)
             self._save_naming()
+            if cache_key is not None:
+                self.parse_cache.put(cache_key, {'parsed_config': self._parsed_config,
+                                                 'naming': self._naming})
             return True
         except Exception as exc:
             logger.error(f'failed to parse config; got exception {exc}')
@@ -307,6 +264,9 @@ class Configparser(abstract_configparser.Configparser):
     def get_section(self, section:str) -> list:
         """return section of the device configuration by name
 
+        The section is computed once using the index of the config.
+        Do not modify the returned list.
+
         Parameters
         ----------
         section : str
@@ -317,51 +277,139 @@ class Configparser(abstract_configparser.Configparser):
         section : list
             section of the device configuration
         """        
-        response = []
-        if section == "interfaces":
-            found = False
-            for line in self._device_config.splitlines():
-                # find first occurence of the word interface at the beginning of the line
-                if line.lower().startswith('interface '):
-                    found = True
-                    response.append(line)
-                    continue
-                if found and line.startswith(' '):
-                    response.append(line)
-                else:
-                    found = False
-        else:
-            for line in self._device_config.splitlines():
-                # check if line begins with 'section'
-                if line.lower().startswith(section):
-                    response.append(line)
-
-        return response
+        return self._index.get_section(section)
 
     def get_global_config(self) -> list:
         """return global configuration of the device
 
+        The global config is computed once using the index of the config.
+        Do not modify the returned list.
+
         Returns
         -------
         global_config : list
             global configuration of the device
         """        
-        response = []
-        for line in self._device_config.splitlines():
-            if line.lower().startswith('interface '):
-                found = True
-                continue
-            elif not line.lower().startswith('interface '):
-                found = False
-            if not found:
-                response.append(line)
-
-        return response
+        return self._index.get_global_config()
+
+    def get_interface_config(self, interface:str) -> list:
+        """return configuration of a single interface
+
+        Parameters
+        ----------
+        interface : str
+            name of the interface (case insensitive)
+
+        Returns
+        -------
+        interface_config : list
+            the interface line and all lines below it; empty if the interface is unknown
+        """
+        return self._index.get_interface_config(interface)
+
+    def get_index(self) -> config_index.ConfigIndex:
+        """return index (block tree) of the device configuration
+
+        Returns
+        -------
+        index : ConfigIndex
+            the index of the device configuration
+        """
+        return self._index
+
+    def find_all_in_global(self, list_of_properties:list) -> list:
+        """check many properties using one pass over the global config
+
+        Parameters
+        ----------
+        list_of_properties : list
+            list of properties to search for (see find_in_global)
+
+        Returns
+        -------
+        found : list
+            list of bool; one value for each properties
+        """
+        rules = [self._get_matcher(properties) for properties in list_of_properties]
+        found = [False] * len(rules)
+        open_rules = [i for i, rule in enumerate(rules) if rule[0] is not None]
+
+        for _, line, stripped, lower, stripped_lower in self._index.get_match_lines('global'):
+            if not open_rules:
+                break
+            for i in list(open_rules):
+                matcher, ignore_leading_spaces = rules[i]
+                if ignore_leading_spaces:
+                    hit = matcher.match(stripped, stripped_lower)
+                else:
+                    hit = matcher.match(line, lower)
+                if hit:
+                    logger.debug(f'found pattern {matcher.lookup}:"{matcher.value}" in global config')
+                    found[i] = True
+                    open_rules.remove(i)
+
+        return found
+
+    def find_all_in_interfaces(self, list_of_properties:list) -> list:
+        """return interfaces that match properties using one pass over the interface config
+
+        Parameters
+        ----------
+        list_of_properties : list
+            list of properties to search for (see find_in_interfaces)
+
+        Returns
+        -------
+        interfaces : list
+            list of lists; the interfaces that match each properties
+        """
+        rules = [self._get_matcher(properties) for properties in list_of_properties]
+        # matched_on contains the list of all interfaces the value matched
+        matched_on = [[] for _ in rules]
+
+        for interface, line, stripped, lower, stripped_lower in self._index.get_match_lines('interfaces'):
+            for i, (matcher, ignore_leading_spaces) in enumerate(rules):
+                if matcher is None:
+                    continue
+                if ignore_leading_spaces:
+                    hit = matcher.match(stripped, stripped_lower)
+                else:
+                    hit = matcher.match(line, lower)
+                if hit:
+                    matched_on[i].append(interface)
+
+        logger.debug(f'matched_on={matched_on}')
+        return matched_on
 
     #
     # internals
     #
 
+    def _get_matcher(self, properties:dict) -> tuple:
+        """return (compiled matcher, ignore_leading_spaces) of properties
+
+        The key of the properties can be match or match__lookup (eg. match__ic). The matcher
+        is None if no key is found.
+        """
+        key = None
+        value = None
+
+        for k,v in properties.items():
+            if 'match' in k:
+                key = k
+                value = v
+
+        if key is None:
+            logger.error(f'no match found in {properties}')
+            return None, False
+
+        # the key can be match__ic etc.
+        cmd = key.split('__')[0]
+        lookup = key.split('__')[1] if '__' in key else ''
+        logger.debug(f'cmd: "{cmd}" lookup: "{lookup}" value: "{value}"')
+
+        return tools.get_line_matcher(cmd, lookup, value), bool(properties.get('ignore_leading_spaces'))
+
     def _save_naming(self):
         """save the naming of port-channel interface
         """        
@@ -387,28 +435,7 @@ class Configparser(abstract_configparser.Configparser):
         if self._template is not None:
             return self._template
 
-        if self._template_filename is None:
-            # use default template that is configured in config
-            filename = self._my_config.get('templates',{}).get(platform, None)
-            logger.debug(f'using ttp template {filename}')
-        else:
-            filename = self._template_filename
-        if filename is None:
-            logger.error(f'please configure correct template filename for {platform}')
-            return None
-
-        package = f'{__name__.split(".")[0]}.configparser.data.templates'
-        file = importlib.resources.files(package).joinpath(filename)
-        short_file = str(file).rsplit("/")[-1]
-        try:
-            logger.debug(f'reading template {short_file}')
-            with open(file) as f:
-                ttp_template = f.read()
-        except Exception as exc:
-            logger.error(f'could not read template {file}; got exception {exc}')
-            return None
-        
-        return ttp_template
+        return ttp_registry.get_template(platform=platform, filename=self._template_filename)
 
 @plugins.configparser('ios')
 def get_configparser(config:list, platform:str='ios') -> Configparser:
@@ -0,0 +1,177 @@
+from loguru import logger
+
+
+class Block(object):
+    """a single line of the config and all lines indented below it
+
+    Parameters
+    ----------
+    line : str
+        the line of the config
+    offset : int
+        line number (starting at 0)
+    indent : int
+        number of leading spaces
+    parent : Block, optional
+        the parent block, None if the block is a top-level line
+    """
+
+    __slots__ = ('line', 'offset', 'indent', 'parent', 'children', 'end')
+
+    def __init__(self, line:str, offset:int, indent:int, parent=None):
+        self.line = line
+        self.offset = offset
+        self.indent = indent
+        self.parent = parent
+        self.children = []
+        # offset of the first line behind the block
+        self.end = offset + 1
+
+    def __repr__(self):
+        return f'Block(offset={self.offset}, line={self.line!r}, children={len(self.children)})'
+
+
+class ConfigIndex(object):
+    """indexed block tree of a (Cisco like) device configuration
+
+    The config is split into lines once. Each line becomes a block; lines with a larger
+    indentation become children of the previous line with a smaller indentation. The
+    interfaces are indexed by name and all views (sections, global config, lines to match)
+    are computed from the index only once.
+
+    An interface may be configured by more than one block (eg. NX-OS repeats the
+    interface stanza); all blocks of an interface are kept in the order of the config.
+
+    Parameters
+    ----------
+    config : str
+        the device configuration
+
+    Examples
+    --------
+    >>> index = ConfigIndex(config)
+    >>> index.interface('GigabitEthernet0/1')
+    >>> index.get_section('interfaces')
+    """
+
+    def __init__(self, config:str):
+        self.lines = config.splitlines() if config else []
+        self.lower_lines = [line.lower() for line in self.lines]
+        self.blocks = []
+        self.roots = []
+        # name: list of blocks
+        self.interfaces = {}
+        self._lower_interfaces = {}
+        # (name, block) of all interface blocks in the order of the config
+        self._interface_blocks = []
+        self._views = {}
+        self._build()
+
+    # -----===== user commands =====-----
+
+    def interface(self, name:str) -> list:
+        """return blocks of interface (the name is case insensitive) or an empty list"""
+        blocks = self.interfaces.get(name)
+        if blocks is None:
+            blocks = self._lower_interfaces.get(name.lower(), [])
+        return blocks
+
+    def get_block_lines(self, block:Block) -> list:
+        """return lines of block including all children"""
+        return self.lines[block.offset:block.end]
+
+    def get_interface_config(self, name:str) -> list:
+        """return lines of interface or an empty list if interface is unknown"""
+        response = []
+        for block in self.interface(name):
+            response += self.get_block_lines(block)
+        return response
+
+    def get_section(self, section:str) -> list:
+        """return (cached) section of the config
+
+        The section interfaces contains all interfaces and their config. Any other
+        section contains all lines that start with the name of the section.
+        """
+        key = ('section', section)
+        if key not in self._views:
+            if section == 'interfaces':
+                response = []
+                for _, block in self._interface_blocks:
+                    response += self.get_block_lines(block)
+            else:
+                response = [line for line, lower in zip(self.lines, self.lower_lines)
+                            if lower.startswith(section)]
+            self._views[key] = response
+        return self._views[key]
+
+    def get_global_config(self) -> list:
+        """return (cached) config without the interface lines (interface ...)"""
+        key = ('global',)
+        if key not in self._views:
+            self._views[key] = [line for line, lower in zip(self.lines, self.lower_lines)
+                                if not lower.startswith('interface ')]
+        return self._views[key]
+
+    def get_match_lines(self, view:str) -> list:
+        """return (cached) lines prepared for matching
+
+        Parameters
+        ----------
+        view : str
+            either global or interfaces
+
+        Returns
+        -------
+        lines : list
+            list of (interface, line, stripped line, lower line, stripped lower line); interface
+            is the name of the interface the line belongs to or None
+        """
+        key = ('match', view)
+        if key not in self._views:
+            response = []
+            if view == 'interfaces':
+                for name, block in self._interface_blocks:
+                    for offset in range(block.offset, block.end):
+                        response.append(self._match_line(name, offset))
+            else:
+                for offset, lower in enumerate(self.lower_lines):
+                    if not lower.startswith('interface '):
+                        response.append(self._match_line(None, offset))
+            self._views[key] = response
+        return self._views[key]
+
+    # -----===== internals =====-----
+
+    def _match_line(self, interface:str, offset:int) -> tuple:
+        """return line prepared for matching"""
+        line = self.lines[offset]
+        stripped = line.lstrip()
+        return (interface, line, stripped, self.lower_lines[offset], stripped.lower())
+
+    def _build(self) -> None:
+        """build block tree and interface map using one pass"""
+        stack = []
+        for offset, line in enumerate(self.lines):
+            stripped = line.lstrip(' ')
+            indent = len(line) - len(stripped) if stripped else 0
+            # blocks with an equal or larger indentation are closed
+            while stack and stack[-1].indent >= indent:
+                stack.pop()
+            parent = stack[-1] if stack else None
+            block = Block(line, offset, indent, parent)
+            self.blocks.append(block)
+            if parent is None:
+                self.roots.append(block)
+                if self.lower_lines[offset].startswith('interface '):
+                    name = line[10:]
+                    self.interfaces.setdefault(name, []).append(block)
+                    self._lower_interfaces.setdefault(name.lower(), []).append(block)
+                    self._interface_blocks.append((name, block))
+            else:
+                parent.children.append(block)
+                for ancestor in stack:
+                    ancestor.end = offset + 1
+            stack.append(block)
+        logger.bind(extra="cfg index").debug(f'indexed config; lines={len(self.lines)} ' \
+            f'blocks={len(self.roots)} interfaces={len(self.interfaces)}')
@@ -0,0 +1,97 @@
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from loguru import logger
+
+
+class ParseCache(object):
+    """on-disk cache of parsed configs
+
+    The cache is a sqlite database. The key of an entry is the hash of the config
+    and the hash of the template, so an entry is never used after the config or the
+    template was modified. The value is the parsed config and the naming of the interfaces.
+
+    Parameters
+    ----------
+    filename : str
+        name of the sqlite database
+    max_age : int, optional
+        maximum age of an entry in seconds, by default unlimited
+
+    Examples
+    --------
+    >>> cisco_configparser.Configparser.parse_cache = ParseCache('parsed_configs.db')
+    """
+
+    def __init__(self, filename:str, max_age:int=None):
+        self._filename = os.path.expanduser(filename)
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(config:str, template:str) -> str:
+        """return key of config and template"""
+        config_hash = hashlib.sha256(config.encode()).hexdigest()
+        template_hash = hashlib.sha256(template.encode()).hexdigest()
+        return f'{config_hash}:{template_hash}'
+
+    def get(self, key:str) -> dict | None:
+        """return cached value or None if the key is unknown or expired"""
+        with self._lock:
+            row = self._connect().execute('SELECT created, data FROM parsed WHERE key = ?',
+                                          (key,)).fetchone()
+            if row is None or (self._max_age and row[0] + self._max_age < time.time()):
+                self.misses += 1
+                return None
+            self.hits += 1
+        logger.bind(extra="parse cache").debug(f'cache hit; hits={self.hits} misses={self.misses}')
+        return pickle.loads(row[1])
+
+    def put(self, key:str, value:dict) -> None:
+        """add value to cache"""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            connection = self._connect()
+            connection.execute('INSERT OR REPLACE INTO parsed (key, created, data) VALUES (?, ?, ?)',
+                               (key, time.time(), data))
+            connection.commit()
+
+    def clear(self) -> None:
+        """remove all entries"""
+        with self._lock:
+            connection = self._connect()
+            connection.execute('DELETE FROM parsed')
+            connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM parsed').fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        """return connection; a new connection is opened in each process"""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._filename, timeout=30, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS parsed ' \
+                                     '(key TEXT PRIMARY KEY, created REAL, data BLOB)')
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self):
+        # the connection cannot be sent to other processes
+        state = dict(self.__dict__)
+        state['_lock'] = None
+        state['_connection'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
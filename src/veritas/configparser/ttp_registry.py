@@ -0,0 +1,162 @@
+import yaml
+import hashlib
+import importlib.resources
+import threading
+from ttp import ttp
+from loguru import logger
+
+# process-wide registry of the configparser config and the TTP templates
+#
+# The config (config.yaml) and the templates are read from the package once. A ttp object
+# compiles its template when it is created; the compiled parsers are kept and reused by
+# feeding new data. A ttp object stores its input and results, so each thread gets its
+# own parsers.
+
+_lock = threading.Lock()
+_config = None
+_templates = {}
+_local = threading.local()
+
+
+def get_config() -> dict:
+    """return (cached) config of the configparser (data/config.yaml)
+
+    Returns
+    -------
+    config : dict
+        the configparser config
+    """
+    global _config
+    with _lock:
+        if _config is None:
+            package = f'{__name__.split(".")[0]}.configparser.data'
+            with importlib.resources.open_text(package, 'config.yaml') as f:
+                _config = yaml.safe_load(f.read())
+        return _config
+
+def get_template(platform:str='ios', filename:str=None) -> str | None:
+    """return (cached) TTP template
+
+    Parameters
+    ----------
+    platform : str, optional
+        platform of the device, by default 'ios'
+    filename : str, optional
+        name of the template; by default the template configured for the platform
+
+    Returns
+    -------
+    template : str | None
+        the template or None if failure or not found
+    """
+    if filename is None:
+        # use default template that is configured in config
+        filename = get_config().get('templates',{}).get(platform, None)
+        logger.debug(f'using ttp template {filename}')
+    if filename is None:
+        logger.error(f'please configure correct template filename for {platform}')
+        return None
+
+    with _lock:
+        if filename in _templates:
+            return _templates[filename]
+
+        package = f'{__name__.split(".")[0]}.configparser.data.templates'
+        file = importlib.resources.files(package).joinpath(filename)
+        try:
+            logger.debug(f'reading template {filename}')
+            with open(file) as f:
+                _templates[filename] = f.read()
+        except Exception as exc:
+            logger.error(f'could not read template {file}; got exception {exc}')
+            return None
+        return _templates[filename]
+
+def template_hash(template:str) -> str:
+    """return hash of template"""
+    return hashlib.sha256(template.encode()).hexdigest()
+
+def get_parser(template:str, log_level:str='CRITICAL') -> ttp:
+    """return compiled parser of template
+
+    The parser is created once per thread and template and reused for any number of configs.
+
+    Parameters
+    ----------
+    template : str
+        the TTP template
+    log_level : str, optional
+        log level of TTP, by default 'CRITICAL'
+
+    Returns
+    -------
+    parser : ttp
+        the parser without any input or results
+    """
+    if not hasattr(_local, 'parsers'):
+        _local.parsers = {}
+    key = (template_hash(template), log_level)
+    parser = _local.parsers.get(key)
+    if parser is None:
+        logger.bind(extra="ttp").debug('compiling ttp template')
+        parser = ttp(template=template, log_level=log_level)
+        _local.parsers[key] = parser
+    else:
+        parser.clear_input()
+        parser.clear_result()
+    return parser
+
+def new_parser(template:str, data:str='', log_level:str='CRITICAL') -> ttp:
+    """return new parser of template
+
+    Parameters
+    ----------
+    template : str
+        the TTP template
+    data : str, optional
+        the data to parse
+    log_level : str, optional
+        log level of TTP, by default 'CRITICAL'
+
+    Returns
+    -------
+    parser : ttp
+        the new parser
+    """
+    return ttp(data=data, template=template, log_level=log_level)
+
+def parse(data:str, template:str, log_level:str='CRITICAL') -> list:
+    """parse data using the (compiled) template
+
+    Parameters
+    ----------
+    data : str
+        the data (eg. the device config) to parse
+    template : str
+        the TTP template
+    log_level : str, optional
+        log level of TTP, by default 'CRITICAL'
+
+    Returns
+    -------
+    result : list
+        the raw result of TTP
+    """
+    parser = get_parser(template, log_level=log_level)
+    try:
+        parser.add_input(data)
+        parser.parse(one=True)
+        # the results are cleared in place; return a copy
+        return list(parser.result(format='raw')[0])
+    finally:
+        # do not keep a reference to the data
+        parser.clear_input()
+        parser.clear_result()
+
+def clear() -> None:
+    """clear registry and the parsers of the current thread"""
+    global _config
+    with _lock:
+        _config = None
+        _templates.clear()
+    _local.parsers = {}
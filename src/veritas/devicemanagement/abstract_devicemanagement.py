@@ -21,6 +21,10 @@ class AbstractDeviceManagement(ABC):
         manufacturer of the device
     scrapli_loglevel : str
         loglevel for scrapli
+    output_store : OutputStore
+        record the raw outputs of the device (see output_store.py)
+    replay : bool
+        read the outputs from the output store instead of the device
     
      # see also veritas/src/veritas/devicemanagement/scrapli.py
     """    
@@ -0,0 +1,181 @@
+import time
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from loguru import logger
+
+
+class Collector(object):
+    """collect (parsed) command outputs of many devices concurrently
+
+    The devices are polled by a pool of threads; max_workers limits the number of
+    devices that are polled at the same time. The connection of each device is kept
+    open (warm) and reused for follow-up commands until close is called.
+
+    Parameters
+    ----------
+    username : str
+        username of the devices
+    password : str
+        password of the devices
+    driver : str, optional
+        devicemanagement driver (scrapli or napalm), by default 'scrapli'
+    max_workers : int, optional
+        maximum number of devices polled concurrently, by default 50
+    keep_connections : bool, optional
+        keep connections open for follow-up commands, by default True
+    parse_pool : ParsePool, optional
+        parse the outputs in a pool of processes, by default the outputs are parsed by the threads
+    **device_args
+        additional parameter passed to each Devicemanagement (eg. port or ssh_keyfile)
+
+    Examples
+    --------
+    >>> with Collector(username, password, max_workers=100) as collector:
+    ...     for result in collector.collect(['192.168.0.1', '192.168.0.2'], ['show version']):
+    ...         print(result['device'], result['error'], result['elapsed'])
+    ...     # the connections are still open
+    ...     collector.send('192.168.0.1', ['show ip route'])
+    """
+
+    def __init__(self, username:str, password:str, driver:str='scrapli', max_workers:int=50,
+                 keep_connections:bool=True, parse_pool=None, **device_args):
+        self._username = username
+        self._password = password
+        self._driver = importlib.import_module(f'veritas.devicemanagement.{driver}')
+        self._max_workers = max_workers
+        self._keep_connections = keep_connections
+        self._parse_pool = parse_pool
+        self._device_args = device_args
+        self._lock = threading.Lock()
+        # ip: (Devicemanagement, lock)
+        self._connections = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # -----===== user commands =====-----
+
+    def collect(self, devices:list, commands:list, own_templates:bool=False):
+        """send commands to all devices and yield parsed results as they complete
+
+        Parameters
+        ----------
+        devices : list
+            list of ip addresses or dicts (ip, platform, manufacturer)
+        commands : list
+            list of commands
+        own_templates : bool, optional
+            use the templates of veritas, by default False
+
+        Yields
+        ------
+        result : dict
+            device, result (command: parsed output), error and elapsed time in seconds
+        """
+        logger.bind(extra="collector").debug(f'collecting {len(commands)} command(s) from {len(devices)} ' \
+            f'device(s) using {self._max_workers} worker(s)')
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = [executor.submit(self._collect, device, commands, own_templates) for device in devices]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def send(self, device:str|dict, commands:list, own_templates:bool=False) -> dict:
+        """send commands to a single device using the (warm) connection
+
+        Parameters
+        ----------
+        device : str | dict
+            ip address or dict (ip, platform, manufacturer)
+        commands : list
+            list of commands
+        own_templates : bool, optional
+            use the templates of veritas, by default False
+
+        Returns
+        -------
+        result : dict
+            device, result (command: parsed output), error and elapsed time in seconds
+        """
+        return self._collect(device, commands, own_templates)
+
+    def close(self, device:str=None) -> None:
+        """close connection of device or all connections
+
+        Parameters
+        ----------
+        device : str, optional
+            ip address of the device, by default all devices
+        """
+        with self._lock:
+            if device is None:
+                connections = list(self._connections.values())
+                self._connections = {}
+            else:
+                connection = self._connections.pop(device, None)
+                connections = [connection] if connection else []
+        for conn, lock in connections:
+            with lock:
+                self._close(conn)
+
+    # -----===== internals =====-----
+
+    def _get_connection(self, device:dict) -> tuple:
+        """return (warm) connection and lock of device"""
+        ip = device['ip']
+        with self._lock:
+            if ip in self._connections:
+                return self._connections[ip]
+            conn = self._driver.Devicemanagement(ip=ip,
+                                                 username=self._username,
+                                                 password=self._password,
+                                                 platform=device.get('platform', 'ios'),
+                                                 manufacturer=device.get('manufacturer', 'cisco'),
+                                                 **self._device_args)
+            entry = (conn, threading.Lock())
+            if self._keep_connections:
+                self._connections[ip] = entry
+            return entry
+
+    def _close(self, conn) -> None:
+        """close connection; a failure is logged only"""
+        try:
+            if conn.has_open_connection():
+                conn.close()
+        except Exception as exc:
+            logger.bind(extra="collector").error(f'could not close connection; got exception {exc}')
+
+    def _collect(self, device:str|dict, commands:list, own_templates:bool) -> dict:
+        """send commands to device and return result"""
+        device = device if isinstance(device, dict) else {'ip': device}
+        result = {'device': device['ip'], 'result': None, 'error': None, 'elapsed': 0.0}
+        start = time.perf_counter()
+        entry = self._get_connection(device)
+        conn, lock = entry
+        # a connection is used by one thread at a time
+        with lock:
+            try:
+                if not conn.has_open_connection() and not conn.open():
+                    result['error'] = 'could not connect to device'
+                else:
+                    result['result'] = conn.send_and_parse_command(commands=commands,
+                                                                   own_templates=own_templates,
+                                                                   parse_pool=self._parse_pool)
+                    if result['result'] is None:
+                        result['error'] = 'could not send or parse commands'
+            except Exception as exc:
+                result['error'] = str(exc)
+        if result['error'] or not self._keep_connections:
+            # the connection may be broken; the next call opens a new one
+            with self._lock:
+                if self._connections.get(device['ip']) is entry:
+                    del self._connections[device['ip']]
+            with lock:
+                self._close(conn)
+        result['elapsed'] = time.perf_counter() - start
+        logger.bind(extra="collector").debug(f'{device["ip"]} done; error={result["error"]} ' \
+            f'elapsed={result["elapsed"]:.2f}s')
+        return result
@@ -1,13 +1,11 @@
 from loguru import logger
-from ntc_templates.parse import parse_output
 from napalm.base.exceptions import ConnectionException
 import napalm
-import importlib
-import os
 
 # veritas
 from veritas.tools import tools
 from veritas.devicemanagement import abstract_devicemanagement
+from veritas.devicemanagement import textfsm_registry
 
 
 class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
@@ -22,8 +20,17 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
         self._port = kwargs.get('port', 22)
         self._manufacturer = kwargs.get('manufacturer', 'cisco')
         self._timeout = kwargs.get('timeout', 60)
+        # record the raw outputs in the output store or replay the recorded outputs (no ssh)
+        self._output_store = kwargs.get('output_store')
+        self._replay = kwargs.get('replay', False)
+        if self._replay and self._output_store is None:
+            raise ValueError('replay needs an output store')
 
     def open(self, timeout=60, optional_args={}):
+        if self._replay:
+            logger.debug(f'replaying outputs of {self._ip_address}')
+            return True
+
         # Use the appropriate network driver to connect to the device:
         driver = napalm.get_network_driver(self._platform)
 
@@ -45,9 +52,14 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
             return self._connection
         except ConnectionException as e:
             logger.error(f'Failed to connect to {self._ip_address} due to {type(e).__name__}')
+            self._connection = None
+        except Exception:
+            # the connection was never opened
+            self._connection = None
+            raise
     
     def has_open_connection(self):
-        if self._connection:
+        if self._connection or self._replay:
             return True
         else:
             return False
@@ -56,6 +68,8 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
         return self._connection
 
     def close(self):
+        if self._replay:
+            return
         logger.debug("closing connection to device (%s)" % self._ip_address)
         self._connection.close()
     
@@ -65,8 +79,14 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
 
     def get_config(self, configtype='running'):
         logger.debug(f'send show {configtype} to {self._ip_address}')
-        config = self._connection.get_config(retrieve=configtype)
-        return config.get(configtype)
+        # the config is stored like the output of 'show running-config' (see scrapli)
+        command = f'show {configtype}-config'
+        if self._replay:
+            return self._output_store.get(self._ip_address, command)
+        config = self._connection.get_config(retrieve=configtype).get(configtype)
+        if self._output_store is not None and config is not None:
+            self._output_store.put(self._ip_address, command, config)
+        return config
 
     def write_config(self):
         logger.debug(f'writing config on {self._ip_address}')
@@ -97,30 +117,53 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
         properties = tools.convert_arguments_to_properties(*unnamed, **named)
         commands = properties.get('commands')
         use_own_templates = properties.get('own_templates', False)
+        parse_pool = properties.get('parse_pool')
 
         # init return value
         result = {}
 
-        if use_own_templates:
-            package = f'{__name__.split(".")[0]}.devicemanagement.data.textfsm'
-            directory = str(importlib.resources.files(package)._paths[0])
-            logger.debug(f'looking for ntc_templates in {directory}')
-            os.environ["NTC_TEMPLATES_DIR"] = directory
-
         platform = f'{self._manufacturer}_{self._platform}'
 
-        data = self._connection.cli(commands)
+        try:
+            data = self._cli(commands)
+        except Exception as exc:
+            logger.error(f'could not send command  to device; got exception {exc}')
+            return None
+
+        if parse_pool:
+            try:
+                logger.debug(f'parsing {len(commands)} output(s) using parse pool; platform={platform}')
+                return parse_pool.parse(platform, {cmd: data[cmd] for cmd in commands},
+                                        own_templates=use_own_templates)
+            except Exception as exc:
+                logger.error(f'could not parse output {exc}')
+                return None
 
         for cmd in commands:
             try:
                 logger.debug(f'parsing output; platform={platform} command={cmd}')
-                result[cmd] = parse_output(platform=platform, command=cmd, data=data[cmd])
+                result[cmd] = textfsm_registry.parse(platform, cmd, data[cmd], own_templates=use_own_templates)
             except Exception as exc:
                 logger.error(f'could not parse output {exc}')
                 return None
 
         return result
 
+    def _cli(self, commands):
+        """send commands and return raw outputs; the outputs are recorded or replayed"""
+        if self._replay:
+            data = {}
+            for cmd in commands:
+                data[cmd] = self._output_store.get(self._ip_address, cmd)
+                if data[cmd] is None:
+                    raise ValueError(f'no recorded output of {cmd}')
+            return data
+        data = self._connection.cli(commands)
+        if self._output_store is not None:
+            for cmd in commands:
+                self._output_store.put(self._ip_address, cmd, data[cmd])
+        return data
+
     def get_facts(self):
         """get show version and show hosts summary from device"""
 
@@ -132,6 +175,11 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
         values = self.send_and_parse_command(commands=['show version', 'show hosts summary'],
                                              own_templates=True)
 
+        # the command could not be sent (or parsed)
+        if not values:
+            logger.error('got no values')
+            return None
+
         # parse values to get facts
         facts["manufacturer"] = self._manufacturer
         if "show version" in values:
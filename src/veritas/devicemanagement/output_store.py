@@ -0,0 +1,133 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from loguru import logger
+
+
+class OutputStore(object):
+    """on-disk store of raw command outputs
+
+    The store is a sqlite database. Each output is stored (compressed) per device,
+    command and timestamp. A Devicemanagement with an output store records all outputs
+    it gets from the device; in replay mode the outputs are read from the store and
+    the device is not contacted at all.
+
+    Parameters
+    ----------
+    filename : str
+        name of the sqlite database
+    timestamp : float, optional
+        replay the outputs recorded at or before this time (unix time), by default the latest outputs
+
+    Examples
+    --------
+    >>> store = OutputStore('outputs.db')
+    >>> device = Devicemanagement(ip, username, password, output_store=store)
+    >>> # later: use the recorded outputs without ssh
+    >>> device = Devicemanagement(ip, username, password, output_store=store, replay=True)
+    >>> device.get_facts()
+    """
+
+    def __init__(self, filename:str, timestamp:float=None):
+        self._filename = os.path.expanduser(filename)
+        self._timestamp = timestamp
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def put(self, device:str, command:str, output:str, timestamp:float=None) -> None:
+        """add output of command to store
+
+        Parameters
+        ----------
+        device : str
+            the device (ip address)
+        command : str
+            the command
+        output : str
+            the raw output of the command
+        timestamp : float, optional
+            unix time of the output, by default now
+        """
+        data = zlib.compress(output.encode())
+        with self._lock:
+            connection = self._connect()
+            connection.execute('INSERT OR REPLACE INTO outputs (device, command, timestamp, data) ' \
+                               'VALUES (?, ?, ?, ?)',
+                               (device, command, timestamp or time.time(), data))
+            connection.commit()
+
+    def get(self, device:str, command:str) -> str | None:
+        """return the latest output of command (at or before the timestamp of the store)
+
+        Parameters
+        ----------
+        device : str
+            the device (ip address)
+        command : str
+            the command
+
+        Returns
+        -------
+        output : str | None
+            the raw output or None if no output was recorded
+        """
+        timestamp = self._timestamp if self._timestamp else float('inf')
+        with self._lock:
+            row = self._connect().execute('SELECT data FROM outputs WHERE device = ? AND command = ? ' \
+                                          'AND timestamp <= ? ORDER BY timestamp DESC LIMIT 1',
+                                          (device, command, timestamp)).fetchone()
+        if row is None:
+            logger.bind(extra="output store").debug(f'no output of {command} on {device}')
+            return None
+        return zlib.decompress(row[0]).decode()
+
+    def devices(self) -> list:
+        """return list of all devices"""
+        with self._lock:
+            rows = self._connect().execute('SELECT DISTINCT device FROM outputs ORDER BY device').fetchall()
+        return [row[0] for row in rows]
+
+    def commands(self, device:str) -> list:
+        """return list of (command, timestamp) that were recorded for device"""
+        with self._lock:
+            return self._connect().execute('SELECT command, timestamp FROM outputs WHERE device = ? ' \
+                                           'ORDER BY command, timestamp', (device,)).fetchall()
+
+    def clear(self, before:float=None) -> None:
+        """remove all outputs or the outputs recorded before timestamp"""
+        with self._lock:
+            connection = self._connect()
+            if before is None:
+                connection.execute('DELETE FROM outputs')
+            else:
+                connection.execute('DELETE FROM outputs WHERE timestamp < ?', (before,))
+            connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM outputs').fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        """return connection; a new connection is opened in each process"""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._filename, timeout=30, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS outputs (device TEXT, command TEXT, ' \
+                                     'timestamp REAL, data BLOB, PRIMARY KEY (device, command, timestamp))')
+            self._connection.commit()
+            self._pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self):
+        # the connection cannot be sent to other processes
+        state = dict(self.__dict__)
+        state['_lock'] = None
+        state['_connection'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,146 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from loguru import logger
+
+# veritas
+from veritas.devicemanagement import textfsm_registry
+
+
+class ParsePool(object):
+    """parse command outputs in a pool of processes
+
+    Parsing large outputs (eg. show ip route or show mac address-table) is CPU bound. When
+    the outputs are parsed by the threads that talk to the devices the parsing competes
+    for the GIL with the I/O of all other threads. The pool parses the raw outputs in
+    separate processes; each process keeps its own textfsm registry so the templates are
+    compiled once per process.
+
+    The pool is started when it is used first and should be shared by all threads.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        number of processes, by default the number of CPUs
+
+    Examples
+    --------
+    >>> with ParsePool() as pool:
+    ...     with Collector(username, password, parse_pool=pool) as collector:
+    ...         for result in collector.collect(devices, ['show ip route']):
+    ...             print(result['device'], result['error'])
+    """
+
+    def __init__(self, max_workers:int=None):
+        self._max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """stop all processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def submit(self, platform:str, command:str, data:str, own_templates:bool=False):
+        """parse output of command in a process
+
+        Parameters
+        ----------
+        platform : str
+            platform of the device eg. cisco_ios
+        command : str
+            the command eg. show version
+        data : str
+            the output of the command
+        own_templates : bool, optional
+            use the templates of veritas, by default False
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            the future of the parsed output
+        """
+        return self._get_executor().submit(textfsm_registry.parse, platform, command, data, own_templates)
+
+    def parse(self, platform:str, outputs:dict, own_templates:bool=False) -> dict:
+        """parse outputs of a device
+
+        Parameters
+        ----------
+        platform : str
+            platform of the device eg. cisco_ios
+        outputs : dict
+            command: output
+        own_templates : bool, optional
+            use the templates of veritas, by default False
+
+        Returns
+        -------
+        result : dict
+            command: parsed output
+
+        Raises
+        ------
+        Exception
+            the exception of the first output that could not be parsed
+        """
+        futures = {cmd: self.submit(platform, cmd, data, own_templates) for cmd, data in outputs.items()}
+        return {cmd: future.result() for cmd, future in futures.items()}
+
+    def parse_devices(self, outputs:dict, own_templates:bool=False):
+        """parse outputs of many devices and yield the results of each device as they complete
+
+        Parameters
+        ----------
+        outputs : dict
+            device: {'platform': platform, 'outputs': {command: output}}
+        own_templates : bool, optional
+            use the templates of veritas, by default False
+
+        Yields
+        ------
+        result : dict
+            device, result (command: parsed output) and error
+        """
+        futures = {}
+        pending = {}
+        for device, values in outputs.items():
+            pending[device] = set(values['outputs'])
+            for cmd, data in values['outputs'].items():
+                future = self.submit(values['platform'], cmd, data, own_templates)
+                futures[future] = (device, cmd)
+
+        results = {device: {'device': device, 'result': {}, 'error': None} for device in outputs}
+        for device in [device for device, commands in pending.items() if not commands]:
+            yield results.pop(device)
+        for future in as_completed(futures):
+            device, cmd = futures[future]
+            try:
+                results[device]['result'][cmd] = future.result()
+            except Exception as exc:
+                results[device]['error'] = f'could not parse {cmd}; got exception {exc}'
+            pending[device].discard(cmd)
+            if not pending[device]:
+                result = results.pop(device)
+                if result['error']:
+                    result['result'] = None
+                yield result
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """return (running) executor"""
+        with self._lock:
+            if self._executor is None:
+                logger.bind(extra="parse pool").debug(f'starting parse pool; max_workers={self._max_workers}')
+                # the pool is used by threaded programs (eg. nornir); forking a process while other
+                # threads hold locks is not safe, so the processes are spawned
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
@@ -0,0 +1,220 @@
+import time
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+
+class Rollout(object):
+    """push a config change to many devices in waves
+
+    The devices are split into waves. The devices of a wave are prepared concurrently:
+    the connection is opened, the config is loaded and the diff is collected. The wave
+    is committed (concurrently) only if all devices of the wave are healthy; otherwise
+    the loaded config is discarded on all devices of the wave and, by default, the
+    following waves are skipped.
+
+    Parameters
+    ----------
+    username : str
+        username of the devices
+    password : str
+        password of the devices
+    driver : str, optional
+        devicemanagement driver (scrapli or napalm), by default 'scrapli'
+    wave_size : int, optional
+        number of devices per wave, by default 10
+    max_workers : int, optional
+        maximum number of devices handled concurrently, by default 10
+    health_check : callable, optional
+        health_check(device, diff) is called for each device of a wave; the wave is committed
+        only if it returns True for all devices
+    stop_on_failure : bool, optional
+        skip the following waves if a wave fails, by default True
+    **device_args
+        additional parameter passed to each Devicemanagement (eg. port or ssh_keyfile)
+
+    Examples
+    --------
+    >>> rollout = Rollout(username, password, wave_size=20, max_workers=20)
+    >>> for result in rollout.run(devices, 'ntp server 10.0.0.1'):
+    ...     print(result['device'], result['status'], result['timings'])
+    """
+
+    def __init__(self, username:str, password:str, driver:str='scrapli', wave_size:int=10,
+                 max_workers:int=10, health_check=None, stop_on_failure:bool=True, **device_args):
+        self._username = username
+        self._password = password
+        self._driver_name = driver
+        self._driver = importlib.import_module(f'veritas.devicemanagement.{driver}')
+        self._wave_size = wave_size
+        self._max_workers = max_workers
+        self._health_check = health_check
+        self._stop_on_failure = stop_on_failure
+        self._device_args = device_args
+
+    # -----===== user commands =====-----
+
+    def run(self, devices:list, config:str|dict, replace:bool=False, dry_run:bool=False):
+        """push config to devices and yield the results of each wave
+
+        Parameters
+        ----------
+        devices : list
+            list of ip addresses or dicts (ip, platform, manufacturer)
+        config : str | dict
+            the config of all devices or a dict (ip: config)
+        replace : bool, optional
+            replace the config instead of merging it, by default False
+        dry_run : bool, optional
+            collect the diffs only; nothing is committed, by default False
+
+        Yields
+        ------
+        result : dict
+            device, wave, status, diff, error and timings (in seconds) of each device.
+            The status is committed, unchanged, previewed, aborted, failed or skipped.
+        """
+        devices = [device if isinstance(device, dict) else {'ip': device} for device in devices]
+        waves = [devices[i:i + self._wave_size] for i in range(0, len(devices), self._wave_size)]
+        logger.bind(extra="rollout").info(f'rolling out to {len(devices)} device(s) in {len(waves)} wave(s)')
+
+        failed = False
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for number, wave in enumerate(waves):
+                if failed and self._stop_on_failure:
+                    for device in wave:
+                        result = self._new_result(device, number)
+                        result['status'] = 'skipped'
+                        yield result
+                    continue
+
+                start = time.perf_counter()
+                jobs = [(device, number, self._get_config(config, device), replace) for device in wave]
+                results = list(executor.map(self._prepare, jobs))
+                healthy = all(result['error'] is None for result in results)
+
+                if dry_run:
+                    list(executor.map(self._finish, [(result, 'abort', 'previewed') for result in results]))
+                elif healthy:
+                    list(executor.map(self._finish, [(result, 'commit', 'committed') for result in results]))
+                else:
+                    list(executor.map(self._finish, [(result, 'abort', 'aborted') for result in results]))
+
+                wave_failed = not dry_run and (not healthy or any(result['status'] == 'failed' for result in results))
+                failed = failed or wave_failed
+                logger.bind(extra="rollout").info(f'wave {number} done; healthy={healthy} ' \
+                    f'failed={wave_failed} elapsed={time.perf_counter() - start:.2f}s')
+                for result in results:
+                    result['timings']['total'] = sum(result['timings'].values())
+                    yield result
+
+    def preview(self, devices:list, config:str|dict, replace:bool=False) -> list:
+        """return diffs of all devices; nothing is committed (see run)"""
+        return list(self.run(devices, config, replace=replace, dry_run=True))
+
+    # -----===== internals =====-----
+
+    def _new_result(self, device:dict, wave:int) -> dict:
+        return {'device': device['ip'],
+                'wave': wave,
+                'status': None,
+                'diff': None,
+                'error': None,
+                'timings': {}}
+
+    def _get_config(self, config:str|dict, device:dict) -> str | None:
+        """return config of device"""
+        return config.get(device['ip']) if isinstance(config, dict) else config
+
+    def _timed(self, result:dict, name:str, func, *args, **kwargs):
+        """call func and save elapsed time in result"""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            result['timings'][name] = time.perf_counter() - start
+
+    def _prepare(self, job:tuple) -> dict:
+        """open connection, load config and get diff of device"""
+        device, wave, config, replace = job
+        result = self._new_result(device, wave)
+        if config is None:
+            result['status'] = 'failed'
+            result['error'] = 'no config'
+            return result
+
+        conn = self._driver.Devicemanagement(ip=device['ip'],
+                                             username=self._username,
+                                             password=self._password,
+                                             platform=device.get('platform', 'ios'),
+                                             manufacturer=device.get('manufacturer', 'cisco'),
+                                             **self._device_args)
+        try:
+            if not self._timed(result, 'open', conn.open):
+                result['status'] = 'failed'
+                result['error'] = 'could not connect to device'
+                return result
+            result['connection'] = conn
+
+            self._timed(result, 'load', self._load_config, conn, config, replace)
+            result['diff'] = self._timed(result, 'diff', self._diff_config, conn)
+            if self._health_check and not self._health_check(device, result['diff']):
+                result['error'] = 'health check failed'
+        except Exception as exc:
+            result['status'] = 'failed'
+            result['error'] = str(exc)
+        return result
+
+    def _finish(self, job:tuple) -> dict:
+        """commit or abort config and close connection"""
+        result, action, status = job
+        conn = result.pop('connection', None)
+        if conn is None:
+            return result
+        try:
+            if action == 'commit' and result['diff']:
+                self._timed(result, 'commit', self._commit_config, conn)
+                result['status'] = status
+            else:
+                self._timed(result, 'abort', self._abort_config, conn)
+                if result['status'] is None:
+                    result['status'] = 'unchanged' if action == 'commit' else status
+        except Exception as exc:
+            result['status'] = 'failed'
+            result['error'] = str(exc)
+        finally:
+            conn.close()
+        logger.bind(extra="rollout").debug(f'{result["device"]} {result["status"]}; error={result["error"]}')
+        return result
+
+    # the config methods of scrapli (scrapli_cfg) and napalm differ a little
+
+    def _load_config(self, conn, config:str, replace:bool) -> None:
+        if self._driver_name == 'scrapli':
+            conn.prepare()
+            self._check(conn.load_config(config=config, replace=replace), 'could not load config')
+        elif replace:
+            conn.load_config(config=config)
+        else:
+            conn.merge_config(config)
+
+    def _diff_config(self, conn) -> str:
+        diff = conn.diff_config()
+        self._check(diff, 'could not get diff')
+        # scrapli_cfg returns a response, napalm returns the diff
+        return getattr(diff, 'unified_diff', diff)
+
+    def _commit_config(self, conn) -> None:
+        self._check(conn.commit_config(), 'could not commit config')
+        if self._driver_name == 'scrapli':
+            conn.cleanup()
+
+    def _abort_config(self, conn) -> None:
+        conn.abort_config()
+        if self._driver_name == 'scrapli':
+            conn.cleanup()
+
+    def _check(self, response, message:str) -> None:
+        """raise exception if scrapli_cfg response failed"""
+        if getattr(response, 'failed', False):
+            raise RuntimeError(f'{message}; {getattr(response, "result", "")}')
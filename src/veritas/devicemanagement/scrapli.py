@@ -1,14 +1,12 @@
-import os
-import importlib
 import logging
 from loguru import logger
 from scrapli import Scrapli
 from scrapli_cfg import ScrapliCfg
-from ntc_templates.parse import parse_output
 
 # veritas
 from veritas.tools import tools
 from veritas.devicemanagement import abstract_devicemanagement
+from veritas.devicemanagement import textfsm_registry
 
 
 def get_loglevel(level):
@@ -28,7 +26,8 @@ def get_loglevel(level):
 
 class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
 
-    def __init__(self, ip, username, password, platform='ios', ssh_keyfile=None, port=22, manufacturer='cisco', scrapli_loglevel='none'):
+    def __init__(self, ip, username, password, platform='ios', ssh_keyfile=None, port=22, manufacturer='cisco', scrapli_loglevel='none',
+                 output_store=None, replay=False):
         self._connection = None
         self._ip_address = ip
         self._platform = platform
@@ -37,6 +36,11 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
         self._ssh_keyfile = ssh_keyfile
         self._port = port
         self._manufacturer = manufacturer
+        # record the raw outputs in the output store or replay the recorded outputs (no ssh)
+        self._output_store = output_store
+        self._replay = replay
+        if replay and output_store is None:
+            raise ValueError('replay needs an output store')
 
         if scrapli_loglevel.lower() != 'none':
             logging.getLogger('scrapli').setLevel(scrapli_loglevel)
@@ -47,6 +51,10 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
 
     def open(self):
 
+        if self._replay:
+            logger.debug(f'replaying outputs of {self._ip_address}')
+            return True
+
         # we have to map the driver to our srapli driver / platform
         #
         # napalm | scrapli
@@ -83,11 +91,20 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
             self._scrapli_cfg = ScrapliCfg(conn=self._connection)
         except Exception as exc:
             logger.error(f'could not connect to {self._ip_address} {exc}')
+            self._connection = None
             return False
 
         return True
 
+    def has_open_connection(self):
+        if self._connection or self._replay:
+            return True
+        else:
+            return False
+
     def close(self):
+        if self._replay:
+            return
         logger.debug("closing connection to device (%s)" % self._ip_address)
         try:
             self._connection.close()
@@ -104,11 +121,10 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
 
     def get_config(self, configtype='running-config'):
         logger.debug(f'send show {configtype} to {self._ip_address}')
-        if not self._connection:
+        if not self.has_open_connection():
                 if not self.open():
                     return None
-        response = self._connection.send_command(f'show {configtype}')
-        return response.result
+        return self._send_command(f'show {configtype}')
 
     def write_config(self):
         if not self._connection:
@@ -152,41 +168,60 @@ class Devicemanagement(abstract_devicemanagement.AbstractDeviceManagement):
         properties = tools.convert_arguments_to_properties(*unnamed, **named)
         commands = properties.get('commands')
         use_own_templates = properties.get('own_templates', False)
+        parse_pool = properties.get('parse_pool')
 
         # init return value
         result = {}
 
-        if use_own_templates:
-            package = f'{__name__.split(".")[0]}.devicemanagement.data.textfsm'
-            directory = str(importlib.resources.files(package)._paths[0])
-            logger.debug(f'looking for ntc_templates in {directory}')
-            os.environ["NTC_TEMPLATES_DIR"] = directory
-
-        if not self._connection:
+        if not self.has_open_connection():
             if not self.open():
                 return None
 
         platform = f'{self._manufacturer}_{self._platform}'
+        outputs = {}
 
         for cmd in commands:
 
             try:
                 logger.debug(f'sending {cmd}')
-                response = self._connection.send_command(cmd)
-                data = response.result
+                data = self._send_command(cmd)
+                if data is None:
+                    raise ValueError(f'no recorded output of {cmd}')
             except Exception as exc:
                 logger.error(f'could not send command  to device; got exception {exc}')
                 return None
 
+            if parse_pool:
+                # the outputs are parsed by the pool when all commands are sent
+                outputs[cmd] = data
+                continue
+
             try:
                 logger.debug(f'parsing output; platform={platform} command={cmd}')
-                result[cmd] = parse_output(platform=platform, command=cmd, data=data)
+                result[cmd] = textfsm_registry.parse(platform, cmd, data, own_templates=use_own_templates)
+            except Exception as exc:
+                logger.error(f'could not parse output {exc}')
+                return None
+
+        if parse_pool:
+            try:
+                logger.debug(f'parsing {len(outputs)} output(s) using parse pool; platform={platform}')
+                result = parse_pool.parse(platform, outputs, own_templates=use_own_templates)
             except Exception as exc:
                 logger.error(f'could not parse output {exc}')
                 return None
 
         return result
 
+    def _send_command(self, cmd):
+        """send command and return raw output; the output is recorded or replayed"""
+        if self._replay:
+            return self._output_store.get(self._ip_address, cmd)
+        output = self._connection.send_command(cmd).result
+        if self._output_store is not None:
+            self._output_store.put(self._ip_address, cmd, output)
+        return output
+
     def get_facts(self):
         """get show version and show hosts summary from device"""
 
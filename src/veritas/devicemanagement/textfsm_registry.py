@@ -0,0 +1,179 @@
+import os
+import io
+import importlib.resources
+import threading
+import textfsm
+import ntc_templates
+from textfsm import clitable, texttable
+from loguru import logger
+
+# process-wide registry of the TextFSM templates
+#
+# The index of the veritas templates (data/textfsm) and the index of the ntc templates are
+# read once. The template(s) of a (platform, command) are looked up once and the source
+# of each template is read once. A TextFSM object stores the state of the parser, so each
+# thread gets its own compiled TextFSM objects.
+#
+# Unlike ntc_templates.parse.parse_output the registry never sets NTC_TEMPLATES_DIR.
+
+_lock = threading.Lock()
+_directories = None
+_lookups = {}
+_sources = {}
+_local = threading.local()
+
+
+def get_directories() -> dict:
+    """return (cached) template directories
+
+    Returns
+    -------
+    directories : dict
+        'veritas' (the templates of veritas) and 'ntc' (the templates of ntc_templates)
+    """
+    global _directories
+    with _lock:
+        if _directories is None:
+            package = f'{__name__.split(".")[0]}.devicemanagement.data.textfsm'
+            _directories = {
+                'veritas': str(importlib.resources.files(package)._paths[0]),
+                'ntc': os.environ.get('NTC_TEMPLATES_DIR',
+                                      os.path.join(os.path.dirname(ntc_templates.__file__), 'templates'))
+            }
+        return _directories
+
+def get_templates(platform:str, command:str, own_templates:bool=False) -> tuple:
+    """return (cached) directory and templates of platform and command
+
+    If own_templates is True the templates of veritas are used first and the ntc
+    templates are used if veritas has no template of the command.
+
+    Parameters
+    ----------
+    platform : str
+        platform of the device eg. cisco_ios
+    command : str
+        the command eg. show version
+    own_templates : bool, optional
+        use the templates of veritas, by default False
+
+    Returns
+    -------
+    templates : tuple
+        (directory, list of template names) or (None, []) if no template was found
+    """
+    key = (platform, command, own_templates)
+    with _lock:
+        if key in _lookups:
+            return _lookups[key]
+
+    directories = get_directories()
+    names = ['veritas', 'ntc'] if own_templates else ['ntc']
+    templates = (None, [])
+    for name in names:
+        # the index is read and compiled once by clitable
+        index = clitable.CliTable('index', directories[name]).index
+        row = index.GetRowMatch({'Command': command, 'Platform': platform})
+        if row:
+            templates = (directories[name], index.index[row]['Template'].split(':'))
+            break
+    logger.bind(extra="textfsm").debug(f'templates of {platform} {command}: {templates[1]}')
+
+    with _lock:
+        _lookups[key] = templates
+    return templates
+
+def get_fsm(directory:str, template:str) -> textfsm.TextFSM:
+    """return compiled TextFSM object of template
+
+    The object is created once per thread and template and reset before it is returned.
+
+    Parameters
+    ----------
+    directory : str
+        the template directory
+    template : str
+        name of the template
+
+    Returns
+    -------
+    fsm : textfsm.TextFSM
+        the compiled template
+    """
+    if not hasattr(_local, 'fsms'):
+        _local.fsms = {}
+    filename = os.path.join(directory, template)
+    fsm = _local.fsms.get(filename)
+    if fsm is None:
+        fsm = textfsm.TextFSM(io.StringIO(_get_source(filename)))
+        _local.fsms[filename] = fsm
+    else:
+        fsm.Reset()
+    return fsm
+
+def parse(platform:str, command:str, data:str, own_templates:bool=False) -> list:
+    """parse output of command (same result as ntc_templates.parse.parse_output)
+
+    Parameters
+    ----------
+    platform : str
+        platform of the device eg. cisco_ios
+    command : str
+        the command eg. show version
+    data : str
+        the output of the command
+    own_templates : bool, optional
+        use the templates of veritas, by default False
+
+    Returns
+    -------
+    result : list
+        list of dicts; the keys are the (lower case) values of the template
+
+    Raises
+    ------
+    ValueError
+        if no template was found
+    """
+    directory, templates = get_templates(platform, command, own_templates)
+    if not templates:
+        raise ValueError(f'no template found; platform={platform} command={command}')
+
+    if len(templates) == 1:
+        fsm = get_fsm(directory, templates[0])
+        header = [value.lower() for value in fsm.header]
+        return [dict(zip(header, record)) for record in fsm.ParseText(data)]
+
+    # the tables of all templates are merged using the keys of the first template (like clitable)
+    table = None
+    for template in templates:
+        fsm = get_fsm(directory, template)
+        fsm_table = texttable.TextTable()
+        fsm_table.header = fsm.header
+        for record in fsm.ParseText(data):
+            fsm_table.Append(record)
+        if table is None:
+            table = fsm_table
+            keys = set(fsm.GetValuesByAttrib('Key'))
+        else:
+            table.extend(fsm_table, keys)
+    header = [value.lower() for value in table.header]
+    return [dict(zip(header, row)) for row in table]
+
+def clear() -> None:
+    """clear registry and the compiled templates of the current thread"""
+    global _directories
+    with _lock:
+        _directories = None
+        _lookups.clear()
+        _sources.clear()
+    _local.fsms = {}
+
+def _get_source(filename:str) -> str:
+    """return (cached) source of template"""
+    with _lock:
+        if filename not in _sources:
+            logger.bind(extra="textfsm").debug(f'reading template {filename}')
+            with open(filename) as f:
+                _sources[filename] = f.read()
+        return _sources[filename]
@@ -1,3 +1,9 @@
+import os
+import time
+import json
+import pickle
+import sqlite3
+import hashlib
 from loguru import logger
 from typing import Any, Dict, Type
 from nornir.core.inventory import (
@@ -68,7 +74,8 @@ def _get_inventory_element(
         type_: Type[HostOrGroup], 
         data: Dict[str, Any], 
         name: str, 
-        defaults: Defaults) -> HostOrGroup:
+        defaults: Defaults,
+        connection_options: Dict[str, ConnectionOptions] = None) -> HostOrGroup:
     """return either a Host or a Group object that contains the data
 
     Parameters
@@ -81,12 +88,16 @@ def _get_inventory_element(
         the name of the object
     defaults : Defaults
         the default values of the object
+    connection_options : Dict[str, ConnectionOptions], optional
+        (shared) connection options; by default the connection options of data are used
 
     Returns
     -------
     HostOrGroup
         Either a Host or a Group
     """        
+    if connection_options is None:
+        connection_options = _get_connection_options(data.get("connection_options", {}))
     return type_(
         name=name,
         hostname=data.get("hostname"),
@@ -97,10 +108,20 @@ def _get_inventory_element(
         data=data.get("data"),
         groups=data.get("groups"),
         defaults=defaults,
-        connection_options=_get_connection_options(data.get("connection_options", {})),
+        connection_options=connection_options,
     )
 
 
+def _without_credentials(data: Any) -> Any:
+    """return copy of (nested) data without passwords and connection options"""
+    if isinstance(data, dict):
+        return {k: _without_credentials(v) for k, v in data.items()
+                if k not in ['password', 'connection_options']}
+    if isinstance(data, list):
+        return [_without_credentials(v) for v in data]
+    return data
+
+
 class VeritasInventory:
     """VeritasInventory is a class to create a nornir inventory from a veritas SOT
 
@@ -128,6 +149,16 @@ class VeritasInventory:
         The default values
     groups : Dict[str, Any]
         The groups
+    page_size : int
+        number of devices read from the SOT at once
+    cache_file : str
+        name of the file the built inventory is cached in; by default no cache is used.
+        The credentials are not part of the cache.
+    cache_ttl : int
+        time to live of the cache in seconds
+    snapshot_file : str
+        name of the snapshot file (sqlite); the snapshot is used as long as nautobot
+        has not been changed since the snapshot was written
 
     Improtant Note:
 
@@ -159,6 +190,10 @@ class VeritasInventory:
             host_groups: list = [],
             defaults: Dict[str, Any] = {},
             groups: Dict[str, Any] = {},
+            page_size: int = 1000,
+            cache_file: str = None,
+            cache_ttl: int = 300,
+            snapshot_file: str = None,
             ) -> None:
         self.sot = sot
         self.where = where
@@ -171,6 +206,10 @@ class VeritasInventory:
         self.host_groups = host_groups
         self.defaults = defaults
         self.groups = groups
+        self.page_size = page_size
+        self.cache_file = cache_file
+        self.cache_ttl = cache_ttl
+        self.snapshot_file = snapshot_file
 
         #
         # group must be the following format:
@@ -180,13 +219,25 @@ class VeritasInventory:
     def load(self) -> Inventory:
         """load inventory
 
-        Execute a query to get all devices and data from the SOT and create a nornir inventory
+        Page through the devices of the SOT and build the hosts of the nornir inventory
+        while reading. All hosts share the same connection options and defaults.
+
+        If a cache file is configured and the cached inventory is not older than the
+        time to live, the hosts are built from the cache without querying the SOT. The
+        credentials are not cached; they are added when the hosts are built.
+
+        If a snapshot file is configured, the latest change of nautobot (nb.changes) is
+        compared with the watermark of the snapshot. The devices are read from the
+        snapshot if nothing was changed; otherwise the snapshot is written again.
 
         Returns
         -------
         Inventory
             The Inventoty object containing the hosts, the groups and the default values
         """
+        # the records contain all values of the hosts except the credentials
+        records = self._read_cache() if self.cache_file else None
+
         hosts = Hosts()
         groups = Groups()
 
@@ -196,9 +247,12 @@ class VeritasInventory:
         # if the user wants 'data' or groups we have to add those fields to our select list
         select = ['hostname', 'primary_ip4', 'platform'] + self.select
         logger.bind(extra="inventory").debug(f'select: {select}')
-        sot_devicelist = self.sot.select(select) \
-                                 .using('nb.devices') \
-                                 .where(self.where)
+
+        # a snapshot that is newer than the latest change replaces the query
+        devices = None
+        if self.snapshot_file and records is None:
+            watermark = self._get_watermark()
+            devices = self._read_snapshot(watermark)
 
         # get defaults
         if self.defaults:
@@ -206,58 +260,7 @@ class VeritasInventory:
         else:
             defaults = Defaults()
 
-        for device in sot_devicelist:
-            hostname = device.get('hostname')
-            if not device.get('primary_ip4'):
-                logger.error(f'host {hostname} has no primary IPv4 address... skipping')
-                continue
-            sot_ip4 = device.get('primary_ip4', {}).get('address')
-            primary_ip4 = sot_ip4.split('/')[0] if sot_ip4 is not None else hostname
-            host_or_ip = primary_ip4 if self.use_primary_ip else hostname
-            platform = device.get('platform',{}).get('name','ios') if device['platform'] else 'ios'
-            manufacturer = device.get('platform',{}).get('manufacturer',{}).get('name') \
-                if device['platform']['manufacturer'] else 'cisco'
-
-            # data is added to the host and can be used by the user
-            _data = {'platform': platform,
-                     'primary_ip': primary_ip4,
-                     'manufacturer': manufacturer}
-
-            for key in self.select:
-                if key.startswith('cf_'):
-                    ky = key.replace('cf_','')
-                    _data[ky] = device.get('custom_field_data',{}).get(ky)
-                else:
-                    _data[key] = device.get(key)
-            # add all keys to data
-            for key in self.data.keys():
-                _data[key] = self.data.get(key)
-
-            _host_groups = []
-            for key in self.host_groups:
-                if key.startswith('cf_'):
-                    ky = key.replace('cf_','')
-                    group = device.get('custom_field_data',{}).get(ky)
-                    _host_groups.append(group.replace(' ',''))
-                else:
-                    group = device.get(key)
-                    _host_groups.append(group.replace(' ',''))
-            logger.bind(extra="inventory").debug(f'host groups: {" ".join(_host_groups)}')
-
-            device_properties = {'host': hostname,
-                                 'hostname': host_or_ip,
-                                 'port': 22,
-                                 'username': self.username,
-                                 'password': self.password,
-                                 'platform': platform,
-                                 'data': _data,
-                                 'groups': _host_groups,
-                                 'connection_options': self.connection_options
-                                }
-            logger.bind(extra="inventory").debug(f'adding device {hostname} to inventory')
-            host = _get_inventory_element(Host, device_properties, hostname, defaults)
-            hosts[hostname] = host
-
+        # the groups are built first; so the hosts get their groups when they are built
         for name, group_data in self.groups.items():
             logger.bind(extra="inventory").debug(f'adding group: {name} {group_data}')
             groups[name] = _get_inventory_element(Group, group_data, name, defaults)
@@ -266,9 +269,228 @@ class VeritasInventory:
             logger.bind(extra="inventory").debug(f'preparing group: {group}')
             group.groups = ParentGroups([groups[g] for g in group.groups])
 
-        # set the groups for the hosts
-        for host in hosts.values():
-            host.groups = ParentGroups([groups[g] for g in host.groups])
-
+        # the connection options are the same for all hosts
+        connection_options = _get_connection_options(self.connection_options)
+
+        write_cache = False
+        if records is None:
+            if devices is None:
+                devices = self.sot.select(select) \
+                                  .using('nb.devices') \
+                                  .iter_where(self.where, page_size=self.page_size)
+                if self.snapshot_file and watermark is not None:
+                    devices = self._write_snapshot(devices, watermark)
+            records = (self._get_host_record(device) for device in devices)
+            write_cache = self.cache_file is not None
+            if write_cache:
+                records = list(records)
+
+        for record in records:
+            if record is not None:
+                hosts[record['host']] = self._get_host(record, defaults, groups, connection_options)
+
+        logger.bind(extra="inventory").debug(f'inventory contains {len(hosts)} hosts')
         logger.bind(extra="nornir").trace(f"inventory: {hosts}")
+        if write_cache:
+            self._write_cache(records)
         return Inventory(hosts=hosts, groups=groups, defaults=defaults)
+
+    def _get_host(self, record:dict, defaults:Defaults, groups:Groups,
+                  connection_options:Dict[str, ConnectionOptions]) -> Host:
+        """return host of record; the credentials are added to the host"""
+        device_properties = dict(record)
+        device_properties['username'] = self.username
+        device_properties['password'] = self.password
+        device_properties['groups'] = ParentGroups([groups[g] for g in record['groups']])
+        logger.bind(extra="inventory").debug(f'adding device {record["host"]} to inventory')
+        return _get_inventory_element(Host, device_properties, record['host'], defaults, connection_options)
+
+    def _get_host_record(self, device:dict) -> dict | None:
+        """return values of the host (without credentials) or None if device has no primary address"""
+        hostname = device.get('hostname')
+        if not device.get('primary_ip4'):
+            logger.error(f'host {hostname} has no primary IPv4 address... skipping')
+            return None
+        sot_ip4 = device.get('primary_ip4', {}).get('address')
+        primary_ip4 = sot_ip4.split('/')[0] if sot_ip4 is not None else hostname
+        host_or_ip = primary_ip4 if self.use_primary_ip else hostname
+        platform = device.get('platform',{}).get('name','ios') if device['platform'] else 'ios'
+        manufacturer = device.get('platform',{}).get('manufacturer',{}).get('name') \
+            if device['platform']['manufacturer'] else 'cisco'
+
+        # data is added to the host and can be used by the user
+        _data = {'platform': platform,
+                 'primary_ip': primary_ip4,
+                 'manufacturer': manufacturer}
+
+        for key in self.select:
+            if key.startswith('cf_'):
+                ky = key.replace('cf_','')
+                _data[ky] = device.get('custom_field_data',{}).get(ky)
+            else:
+                _data[key] = device.get(key)
+        # add all keys to data
+        _data.update(self.data)
+
+        _host_groups = []
+        for key in self.host_groups:
+            if key.startswith('cf_'):
+                ky = key.replace('cf_','')
+                group = device.get('custom_field_data',{}).get(ky)
+                _host_groups.append(group.replace(' ',''))
+            else:
+                group = device.get(key)
+                _host_groups.append(group.replace(' ',''))
+        logger.bind(extra="inventory").debug(f'host groups: {" ".join(_host_groups)}')
+
+        return {'host': hostname,
+                'hostname': host_or_ip,
+                'port': 22,
+                'platform': platform,
+                'data': _data,
+                'groups': _host_groups}
+
+    def _query_key(self) -> tuple:
+        """return key of the query; the snapshot is only used if the query, groups and defaults are the same"""
+        config = {'groups': _without_credentials(self.groups),
+                  'defaults': _without_credentials(self.defaults)}
+        digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+        return (self.sot.nautobot_url, str(self.where), tuple(self.select), tuple(self.host_groups),
+                self.use_primary_ip, digest)
+
+    def _cache_key(self) -> tuple:
+        """return key of the cached inventory
+
+        The cache is only used if the query, groups, defaults and data are the same. The
+        records do not contain credentials or connection options; they are added when the
+        hosts are built, so they are not part of the key either.
+        """
+        digest = hashlib.sha256(json.dumps(_without_credentials(self.data), sort_keys=True,
+                                           default=str).encode()).hexdigest()
+        return self._query_key() + (digest,)
+
+    def _read_cache(self) -> list | None:
+        """return cached records or None if there is no valid cache"""
+        try:
+            if time.time() - os.path.getmtime(self.cache_file) > self.cache_ttl:
+                logger.bind(extra="inventory").debug(f'cache {self.cache_file} expired')
+                return None
+            with open(self.cache_file, 'rb') as f:
+                key, records = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            logger.bind(extra="inventory").warning(f'could not read cache {self.cache_file}; got exception {exc}')
+            return None
+        if key != self._cache_key():
+            logger.bind(extra="inventory").debug('cached inventory was built using another query')
+            return None
+        logger.bind(extra="inventory").debug(f'using cached inventory {self.cache_file}')
+        return records
+
+    def _write_cache(self, records:list) -> None:
+        """write records (the hosts without credentials) to cache file
+
+        The file is readable by the owner only.
+        """
+        tmp_file = f'{self.cache_file}.tmp'
+        try:
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((self._cache_key(), records), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as exc:
+            logger.bind(extra="inventory").warning(f'could not write cache {self.cache_file}; got exception {exc}')
+
+    def _get_watermark(self) -> str | None:
+        """return time of the latest change of nautobot or None if unknown"""
+        try:
+            changes = self.sot.select('time') \
+                              .using('nb.changes') \
+                              .set(limit=1, cache=False) \
+                              .where('time__gt=1970-01-01T00:00:00Z')
+        except Exception as exc:
+            logger.bind(extra="inventory").warning(f'could not get latest change; got exception {exc}')
+            return None
+        if not changes:
+            return None
+        # the changes are ordered by time (latest first)
+        return changes[0].get('time')
+
+    def _read_snapshot(self, watermark:str) -> list | None:
+        """return devices of the snapshot or None if the snapshot is outdated"""
+        if watermark is None or not os.path.exists(self.snapshot_file):
+            return None
+        try:
+            with sqlite3.connect(self.snapshot_file) as connection:
+                meta = dict(connection.execute('SELECT key, value FROM meta').fetchall())
+                if meta.get('watermark') != watermark or meta.get('query') != json.dumps(self._query_key()):
+                    logger.bind(extra="inventory").debug(f'snapshot {self.snapshot_file} is outdated')
+                    return None
+                devices = [json.loads(row[0]) for row in connection.execute('SELECT device FROM hosts')]
+        except Exception as exc:
+            logger.bind(extra="inventory").warning(f'could not read snapshot {self.snapshot_file}; got exception {exc}')
+            return None
+        logger.bind(extra="inventory").debug(f'using snapshot {self.snapshot_file}; watermark={watermark}')
+        return devices
+
+    def _write_snapshot(self, devices, watermark:str):
+        """write devices to snapshot while they are read from the SOT
+
+        The snapshot is an optimization only; if it cannot be written a warning is logged
+        and the devices are passed on. The credentials are not part of the snapshot.
+        """
+        tmp_file = f'{self.snapshot_file}.tmp'
+        connection = None
+        try:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            connection = sqlite3.connect(tmp_file)
+            connection.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            connection.execute('CREATE TABLE hosts (name TEXT, device TEXT)')
+            connection.executemany('INSERT INTO meta (key, value) VALUES (?, ?)',
+                                   [('watermark', watermark),
+                                    ('query', json.dumps(self._query_key())),
+                                    ('groups', json.dumps(_without_credentials(self.groups))),
+                                    ('defaults', json.dumps(_without_credentials(self.defaults))),
+                                    ('created', str(time.time()))])
+        except Exception as exc:
+            logger.bind(extra="inventory").warning(f'could not write snapshot {self.snapshot_file}; got exception {exc}')
+            self._discard_snapshot(connection, tmp_file)
+            connection = None
+
+        try:
+            for device in devices:
+                if connection is not None:
+                    try:
+                        connection.execute('INSERT INTO hosts (name, device) VALUES (?, ?)',
+                                           (device.get('hostname'), json.dumps(device)))
+                    except Exception as exc:
+                        logger.bind(extra="inventory").warning(f'could not write snapshot {self.snapshot_file}; ' \
+                                                               f'got exception {exc}')
+                        self._discard_snapshot(connection, tmp_file)
+                        connection = None
+                yield device
+            if connection is not None:
+                try:
+                    connection.commit()
+                    connection.close()
+                    connection = None
+                    os.replace(tmp_file, self.snapshot_file)
+                    logger.bind(extra="inventory").debug(f'wrote snapshot {self.snapshot_file}; watermark={watermark}')
+                except Exception as exc:
+                    logger.bind(extra="inventory").warning(f'could not write snapshot {self.snapshot_file}; ' \
+                                                           f'got exception {exc}')
+        finally:
+            # the devices were not read completely or the snapshot could not be written
+            self._discard_snapshot(connection, tmp_file)
+
+    def _discard_snapshot(self, connection:sqlite3.Connection | None, tmp_file:str) -> None:
+        """close connection and remove the incomplete snapshot"""
+        try:
+            if connection is not None:
+                connection.close()
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        except Exception as exc:
+            logger.bind(extra="inventory").warning(f'could not remove {tmp_file}; got exception {exc}')
@@ -36,6 +36,9 @@ def to_sot(sot, conn, device_facts, device_defaults, onboarding_config):
 
             files.append(os.path.basename(filename))            
             values = conn.send_and_parse_command(commands=gconfig['cables'])
+            if not values:
+                logger.error("could not get cables of %s" % device_facts['fqdn'])
+                continue
 
             first_command = config['cables'][0]['command']['cmd']
             for value in values[first_command]:
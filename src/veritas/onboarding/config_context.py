@@ -3,7 +3,9 @@ import json
 import os
 import glob
 from loguru import logger
-from ttp import ttp
+
+# veritas
+from veritas.configparser import ttp_registry
 
 
 def to_sot(sot, args, device_fqdn, configparser, device_defaults, onboarding_config):
@@ -113,10 +115,8 @@ def parse_config(device_config, config):
         logger.error('no template found')
         return None
 
-    # create parser object and parse data using template:
-    parser = ttp(data=device_config, template=ttp_template)
-    parser.parse()
-    parsed_config = parser.result(format='raw')[0]
+    # parse data using the (compiled) template:
+    parsed_config = ttp_registry.parse(device_config, ttp_template, log_level='WARNING')
     if 'remove_empty' in config:
         return stripper(parsed_config[0])
     else:
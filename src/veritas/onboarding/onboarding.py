@@ -6,6 +6,11 @@ import csv
 import importlib
 import sys
 import pathlib
+import copy
+import queue
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from ipaddress import IPv4Network
 from loguru import logger
 from benedict import benedict
@@ -15,6 +20,7 @@ from deepmerge import always_merger
 import veritas.repo
 from veritas.onboarding import plugins
 from veritas.sot import sot
+from veritas.sot import onboarding as sot_onboarding
 from veritas.tools import tools
 from veritas.onboarding.tags import get_tag_properties as _get_tag_properties
 
@@ -30,6 +36,7 @@ class Onboarding():
         self._tcp_port = tcp_port
 
         self._all_defaults = None
+        self._prefix_defaults = None
         self._configparser = None
         self._device_config = None
         self._device_facts = None
@@ -255,15 +262,14 @@ class Onboarding():
         192.168.0.1 / 192.168.0.0/16 / 0.0.0.0/0
         0.0.0.0 should always exist and set the default values.
         """
-        prefix_path = tools.get_prefix_path(all_defaults, ip)
+        # the prefix index is built once and contains the merged values of each prefix
+        if self._prefix_defaults is None or self._prefix_defaults.source is not all_defaults:
+            self._prefix_defaults = tools.PrefixDefaults(all_defaults)
+        prefix_path, merged_defaults = self._prefix_defaults.lookup(ip)
         logger.debug(f'the prefix path is {prefix_path}')
-        defaults = benedict(keyattr_dynamic=True)
-        for prefix in prefix_path:
-            for key, value in all_defaults[prefix].items():
-                # logger.debug(f'key: {key} value: {value}')
-                defaults[key] = value
 
-        return defaults
+        # the merged values are shared and the defaults are modified later (deep merge)
+        return benedict(copy.deepcopy(merged_defaults), keyattr_dynamic=True)
 
     def get_device_defaults(self, host_or_ip, device_dict) -> dict:
         """get defaults from our onboarding config and the inventory
@@ -699,3 +705,198 @@ class Onboarding():
 
         return False
 
+
+    def pipeline(self, inventory, fetch_workers=20, parse_workers=4, write_workers=4,
+                 import_config=False, add_prefix=False, host_key='host'):
+        """onboard all devices of an inventory using a pipeline
+
+        The onboarding of each device consists of three stages. Each stage has its own 
+        (bounded) pool of workers, so the stages of different devices run concurrently.
+
+            - fetch: skip devices that are already in the sot; get the defaults and the
+              config and facts of the device
+            - parse: parse the config and compute the device, interface and vlan properties
+            - write: add the device including interfaces and vlans to the sot
+
+        Parameters
+        ----------
+        inventory : list | str
+            list of devices (see read_inventory) or the filename of the inventory
+        fetch_workers : int, optional
+            number of workers of the fetch stage, by default 20
+        parse_workers : int, optional
+            number of workers of the parse stage, by default 4
+        write_workers : int, optional
+            number of workers of the write stage, by default 4
+        import_config : bool, optional
+            read config and facts from disk instead of the device, by default False
+        add_prefix : bool, optional
+            add prefix of the primary address to the sot, by default False
+        host_key : str, optional
+            name of the inventory column containing the host or ip, by default 'host'
+
+        Yields
+        ------
+        result : dict
+            the result of a device as soon as it has finished 
+            (host, success, stage, device, error, duration).
+            If the caller stops iterating, the devices that are not yet
+            fetched, parsed or written are skipped.
+
+        Examples
+        --------
+        >>> onboarding = Onboarding(sot=sot, onboarding_config=config, profile=profile)
+        >>> for result in onboarding.pipeline('inventory.yaml', fetch_workers=50):
+        ...     print(result['host'], result['success'])
+        """
+        if isinstance(inventory, str):
+            inventory = self.read_inventory(inventory)
+        if not self._all_defaults:
+            self._all_defaults = self.get_default_values_from_repo()
+        # build the prefix index once; all workers share it
+        if self._prefix_defaults is None or self._prefix_defaults.source is not self._all_defaults:
+            self._prefix_defaults = tools.PrefixDefaults(self._all_defaults)
+
+        results = queue.Queue()
+        # each job that was submitted puts exactly one result
+        futures = []
+        stopped = threading.Event()
+        logger.info(f'onboarding {len(inventory)} devices; fetch_workers={fetch_workers} ' \
+                    f'parse_workers={parse_workers} write_workers={write_workers}')
+
+        # the pools are shut down in the order of the stages (fetch first);
+        # so a job can always be handed off to the next stage
+        with ThreadPoolExecutor(max_workers=write_workers) as write_pool, \
+             ThreadPoolExecutor(max_workers=parse_workers) as parse_pool, \
+             ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+
+            def submit(pool, stage, job):
+                futures.append(pool.submit(run_stage, *stage, job))
+
+            def run_stage(stage, func, next_pool, next_stage, job):
+                handed_off = False
+                try:
+                    if stopped.is_set():
+                        job['error'] = 'pipeline was stopped'
+                    else:
+                        func(job)
+                    if not job.get('error') and next_pool is not None:
+                        submit(next_pool, next_stage, job)
+                        handed_off = True
+                except Exception as exc:
+                    logger.bind(extra=job['host']).error(f'{stage} failed; got exception {exc}')
+                    job['error'] = str(exc)
+                finally:
+                    if not handed_off:
+                        results.put(self._pipeline_result(job, stage))
+
+            write_stage = ('write', self._pipeline_write, None, None)
+            parse_stage = ('parse', self._pipeline_parse, write_pool, write_stage)
+            fetch_stage = ('fetch', self._pipeline_fetch, parse_pool, parse_stage)
+
+            try:
+                submitted = 0
+                for device_dict in inventory:
+                    job = {'host': device_dict.get(host_key),
+                           'inventory': dict(device_dict),
+                           'import_config': import_config,
+                           'add_prefix': add_prefix,
+                           'start': time.monotonic()}
+                    submit(fetch_pool, fetch_stage, job)
+                    submitted += 1
+
+                received = 0
+                while received < submitted:
+                    try:
+                        result = results.get(timeout=1)
+                    except queue.Empty:
+                        # a job is handed off before its future is done; so no result
+                        # can arrive if all futures are done and the queue is empty
+                        if all(future.done() for future in futures) and results.empty():
+                            logger.error(f'got no result of {submitted - received} device(s)')
+                            return
+                        continue
+                    received += 1
+                    yield result
+            finally:
+                # the caller stopped iterating (or an error occured); skip the remaining jobs
+                stopped.set()
+
+    def _pipeline_worker(self):
+        """return a copy of the onboarding object without any device specific data"""
+        worker = copy.copy(self)
+        worker._configparser = None
+        worker._device_config = None
+        worker._device_facts = None
+        worker._device_defaults = None
+        worker._device_properties = None
+        return worker
+
+    def _pipeline_fetch(self, job):
+        """fetch stage: get defaults, config and facts of the device"""
+        host = job['host']
+        worker = self._pipeline_worker()
+        job['worker'] = worker
+        job['device_ip'] = worker.get_ip_from_host(host)
+        if job['device_ip'] is None:
+            job['error'] = f'could not resolve {host}'
+            return
+        # do not connect to devices that are already in the sot
+        if worker.device_in_sot(job['device_ip'], host):
+            job['error'] = f'device {host} is already in sot'
+            return
+        job['defaults'] = worker.get_device_defaults(job['device_ip'], job['inventory'])
+        device_config, device_facts = worker.get_device_config_and_facts(
+            job['device_ip'], 
+            job['defaults'], 
+            import_config=job['import_config'],
+            import_filename=host)
+        if device_config is None:
+            job['error'] = 'got no config and facts'
+            return
+        job['config'] = device_config
+        job['facts'] = device_facts
+
+    def _pipeline_parse(self, job):
+        """parse stage: parse config and compute all properties"""
+        worker = job['worker']
+        worker.parse_config(job['config'], job['facts'], job['defaults'])
+        device_properties = worker.get_device_properties()
+        if not device_properties:
+            job['error'] = 'got no device properties'
+            return
+        primary_address = worker.get_primary_address() or job['device_ip']
+        job['device_properties'] = device_properties
+        job['primary_interface'] = worker.get_primary_interface(primary_address, device_properties)
+        if not job['primary_interface']:
+            job['error'] = 'no primary interface'
+            return
+        job['interfaces'] = worker.get_interface_properties()
+        job['vlans'] = worker.get_vlan_properties(device_properties)
+
+    def _pipeline_write(self, job):
+        """write stage: add device, interfaces and vlans to the sot"""
+        worker = job['worker']
+        hostname = job['device_properties'].get('name')
+        # the fetch stage has checked the host of the inventory; the name may differ
+        if hostname != job['host'] and worker.device_in_sot(job['device_ip'], hostname):
+            job['error'] = f'device {hostname} is already in sot'
+            return
+        # the onboarding object of the sot is not thread safe; use a new one
+        job['device'] = sot_onboarding.Onboarding(self._sot) \
+                            .interfaces(job['interfaces']) \
+                            .vlans(job['vlans']) \
+                            .primary_interface(job['primary_interface'].get('name', '')) \
+                            .add_prefix(job['add_prefix']) \
+                            .add_device(job['device_properties'])
+        if not job['device']:
+            job['error'] = f'could not add device {hostname} to sot'
+
+    def _pipeline_result(self, job, stage):
+        """return result of a device"""
+        return {'host': job['host'],
+                'success': job.get('error') is None,
+                'stage': stage,
+                'device': job.get('device'),
+                'error': job.get('error'),
+                'duration': time.monotonic() - job['start']}
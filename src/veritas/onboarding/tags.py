@@ -125,7 +125,8 @@ def parse_device_properties(device_fqdn, device_facts, host_or_ip, config):
     return response
 
 def parse_config(device_config, device_fqdn, config):
-    response = []
+    # compile all rules first and check all of them using one pass over the config
+    rules = []
     for tags in config.get('tags',[]):
         pattern = tags.get('pattern', None)
         contains = tags.get('contains', None)
@@ -133,32 +134,36 @@ def parse_config(device_config, device_fqdn, config):
         name_of_tag = tags.get('name')
         if pattern:
             logger.debug(f'name: {name_of_tag} scope: {scope_of_tag} pattern: {pattern}')
-            compiled = re.compile(pattern)
+            rules.append((re.compile(pattern), None, name_of_tag, scope_of_tag))
         elif contains:
             logger.debug(f'name: {name_of_tag} scope: {scope_of_tag} string: {contains}')
-        interface = None
-        for line in device_config:
-            # check if we have an interface that is needed with scope dcim.interface
-            if line.lower().startswith('interface '):
-                interface = line[10:]
-            if pattern:
-                match = compiled.match(line)
-                if match:
-                    logger.debug(f'pattern found on interface {interface}')
-                    if scope_of_tag == "dcim.interface" and interface is not None:
-                       response.append({'name': name_of_tag,
-                                        'interface': interface,
-                                        'scope': scope_of_tag})
-                    elif scope_of_tag == "dcim.device":
-                        response.append({'name': name_of_tag,
-                                     'scope': scope_of_tag})
-            elif contains and contains in line:
+            rules.append((None, contains, name_of_tag, scope_of_tag))
+
+    # the response keeps the order of the rules
+    found = [[] for _ in rules]
+    interface = None
+    for line in device_config:
+        # check if we have an interface that is needed with scope dcim.interface
+        if line.lower().startswith('interface '):
+            interface = line[10:]
+        for i, (compiled, contains, name_of_tag, scope_of_tag) in enumerate(rules):
+            if compiled:
+                if not compiled.match(line):
+                    continue
+                logger.debug(f'pattern found on interface {interface}')
+            elif contains in line:
                 logger.debug(f'string found on interface {interface}')
-                if scope_of_tag == "dcim.interface" and interface is not None:
-                    response.append({'name': name_of_tag,
-                                     'interface': interface,
-                                     'scope': scope_of_tag})
-                elif scope_of_tag == "dcim.device":
-                    response.append({'name': name_of_tag,
-                                     'scope': scope_of_tag})
+            else:
+                continue
+            if scope_of_tag == "dcim.interface" and interface is not None:
+                found[i].append({'name': name_of_tag,
+                                 'interface': interface,
+                                 'scope': scope_of_tag})
+            elif scope_of_tag == "dcim.device":
+                found[i].append({'name': name_of_tag,
+                                 'scope': scope_of_tag})
+
+    response = []
+    for tags in found:
+        response += tags
     return response
@@ -0,0 +1,300 @@
+import asyncio
+from anytree import PostOrderIter
+from loguru import logger
+
+# the async client is optional
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# veritas
+from veritas.tools import tools
+from veritas.sot import queries
+from veritas.sot import selection
+from veritas.sot import transport
+
+
+class AsyncSot(object):
+    """asyncio facade of the sot
+
+    All requests share one async HTTP client with connection pooling and keep-alive. This
+    makes it possible to run hundreds of requests concurrently from one event loop. The
+    number of concurrent requests is limited by max_connections.
+
+    The queries are built exactly like the queries of the (sync) getter and selection. The
+    custom field types needed to build a query are read from the (sync) metadata registry.
+    The registry may send (blocking) requests to nautobot; so the queries are built in a
+    worker thread and the event loop is never blocked.
+
+    Parameters
+    ----------
+    sot : Sot
+        the sot object
+    max_connections : int, optional
+        maximum number of connections (and concurrent requests), by default 100
+    max_keepalive_connections : int, optional
+        maximum number of idle connections kept alive, by default 20
+    keepalive_expiry : float, optional
+        time in seconds an idle connection is kept alive, by default 30
+    timeout : float, optional
+        timeout of a request in seconds, by default 30
+
+    Examples
+    --------
+    >>> async with sot.aio() as aio:
+    ...     devices = await asyncio.gather(*[aio.device(name) for name in names])
+    """
+
+    # REST endpoints of nautobot
+    endpoints = {'devices': 'dcim/devices',
+                 'interfaces': 'dcim/interfaces',
+                 'locations': 'dcim/locations',
+                 'platforms': 'dcim/platforms',
+                 'device_types': 'dcim/device-types',
+                 'ip_addresses': 'ipam/ip-addresses',
+                 'ip_address_to_interface': 'ipam/ip-address-to-interface',
+                 'prefixes': 'ipam/prefixes',
+                 'vlans': 'ipam/vlans',
+                 'tags': 'extras/tags'}
+
+    def __init__(self, sot, max_connections:int=100, max_keepalive_connections:int=20,
+                 keepalive_expiry:float=30, timeout:float=30):
+        if httpx is None:
+            raise ImportError('the async sot needs httpx; please install veritas[aio]')
+        self._sot = sot
+        self._max_connections = max_connections
+        self._limits = httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_keepalive_connections,
+                                    keepalive_expiry=keepalive_expiry)
+        self._timeout = timeout
+        self._client = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self) -> None:
+        """close client and all connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+    # -----===== user commands =====-----
+
+    async def request(self, method:str, url:str, **kwargs) -> dict | list:
+        """send request to nautobot and return json
+
+        Parameters
+        ----------
+        method : str
+            GET, POST, PATCH, ...
+        url : str
+            url relative to the api eg. dcim/devices/
+        **kwargs
+            parameter passed to httpx (eg. params or json)
+
+        Returns
+        -------
+        response : dict | list
+            the json of the response
+
+        Raises
+        ------
+        httpx.HTTPStatusError
+            if nautobot returns an error
+        """
+        client = self._get_client()
+        async with self._semaphore:
+            response = await client.request(method, url, **kwargs)
+        logger.bind(extra="aio").trace(f'{method} {url} status={response.status_code}')
+        if transport.is_write_request(method, url):
+            self._sot.invalidate_cache()
+        response.raise_for_status()
+        return response.json()
+
+    async def graphql(self, query:str, variables:dict=None) -> dict:
+        """run graphql query and return json"""
+        return await self.request('POST', 'graphql/', json={'query': query, 'variables': variables or {}})
+
+    async def query(self, select:list, using:str, where:dict, mode:str='sql', transform:list=[],
+                    limit:int=0, offset:int=0) -> dict:
+        """query nautobot (async version of Getter.query)
+
+        Parameters
+        ----------
+        select : list
+            the list of all values to get from nautobot
+        using : str
+            the name of the "table" to use
+        where : dict
+            the where clause
+        mode : str, optional
+            only sql is supported, by default 'sql'
+        transform : list, optional
+            list of transformations, by default []
+        limit : int, optional
+            the number of items to get
+        offset : int, optional
+            the offset, by default 0
+
+        Returns
+        -------
+        dict
+            the result of the query
+        """
+        if mode != 'sql':
+            raise ValueError('the async sot supports sql mode only')
+        # building the query may load the metadata (blocking)
+        query, variables = await asyncio.to_thread(queries._prepare_sql_query, self._sot.get, list(select),
+                                                   using, dict(where), transform, limit, offset)
+        response = None
+        with logger.catch():
+            response = await self.graphql(query, variables)
+        return queries._get_sql_data(response, using, select, transform)
+
+    async def where(self, select:list|str, using:str, *unnamed, transform:list=[], **named) -> dict:
+        """query nautobot (async version of Selection.where)
+
+        Logical expressions are supported; the leafs of the expression are queried concurrently.
+
+        Parameters
+        ----------
+        select : list | str
+            the values to select
+        using : str
+            the name of the "table" to use
+        *unnamed
+            unnamed parameter that are used as 'where' clause
+        transform : list, optional
+            list of transformations, by default []
+        **named
+            named parameter that are used as 'where' clause
+
+        Returns
+        -------
+        result : dict
+            the result of the query
+
+        Examples
+        --------
+        >>> devices = await aio.where('id, name', 'nb.devices', 'location=site_1 or location=site_2')
+        """
+        sel = selection.Selection(self._sot, select).using(using)
+        sel._transform = transform
+        expression = tools.convert_arguments_to_properties(*unnamed, **named)
+
+        res = sel._parse_logical_expression(expression)
+        if res is None:
+            return await self.query(sel._select, using, sel._simple_where(using, expression),
+                                    transform=transform)
+
+        sel._node_id = 0
+        logical_tree = sel._build_logical_tree(res)
+        # condensing the tree loads the custom field types (blocking)
+        await asyncio.to_thread(sel._condense_tree, logical_tree)
+        select = list(sel._select)
+        if 'id' not in select:
+            select.append('id')
+        leafs = [node for node in PostOrderIter(logical_tree) if node.is_leaf]
+        responses = await asyncio.gather(*[self.query(select, using, sel._leaf_where(node), transform=transform)
+                                           for node in leafs])
+        for node, response in zip(leafs, responses):
+            node.response = response
+        sel._merge_logical_tree(logical_tree)
+        return logical_tree.root.response
+
+    async def get(self, endpoint:str, **filter) -> list:
+        """return all objects of an endpoint that match the filter
+
+        Parameters
+        ----------
+        endpoint : str
+            name of the endpoint (eg. devices) or url relative to the api (eg. dcim/devices)
+        **filter
+            filter passed to nautobot (eg. name='lab.local')
+
+        Returns
+        -------
+        objects : list
+            list of objects (dict)
+        """
+        url = f'{self.endpoints.get(endpoint, endpoint).strip("/")}/'
+        params = dict(filter)
+        response = []
+        while url:
+            data = await self.request('GET', url, params=params)
+            response += data.get('results', [])
+            # the next url contains all parameter
+            url = data.get('next')
+            params = None
+        return response
+
+    async def device(self, name:str) -> dict | None:
+        """return device or None if not found"""
+        devices = await self.get('devices', name=name)
+        return devices[0] if devices else None
+
+    async def devices(self, **filter) -> list:
+        """return devices that match the filter"""
+        return await self.get('devices', **filter)
+
+    async def interface(self, device:str, name:str) -> dict | None:
+        """return interface of device or None if not found"""
+        interfaces = await self.get('interfaces', device=device, name=name)
+        return interfaces[0] if interfaces else None
+
+    async def interfaces(self, device:str, **filter) -> list:
+        """return interfaces of device that match the filter"""
+        return await self.get('interfaces', device=device, **filter)
+
+    async def bulk_create(self, endpoint:str, rows:list, chunk_size:int=500) -> list:
+        """create many objects using bulk requests
+
+        The chunks are sent concurrently.
+
+        Parameters
+        ----------
+        endpoint : str
+            name of the endpoint (eg. devices) or url relative to the api (eg. dcim/devices)
+        rows : list
+            list of objects (dict) to create
+        chunk_size : int, optional
+            number of objects per request, by default 500
+
+        Returns
+        -------
+        created : list
+            list of created objects
+        """
+        url = f'{self.endpoints.get(endpoint, endpoint).strip("/")}/'
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        logger.bind(extra="aio").debug(f'creating {len(rows)} objects on {url} using {len(chunks)} request(s)')
+        responses = await asyncio.gather(*[self.request('POST', url, json=chunk) for chunk in chunks])
+        created = []
+        for response in responses:
+            created += response if isinstance(response, list) else [response]
+        return created
+
+    # -----===== internals =====-----
+
+    def _get_client(self):
+        """return (shared) async client"""
+        if self._client is None:
+            api_version = self._sot.sot_config.get('api_version', '2.0')
+            headers = {'Authorization': f'Token {self._sot.nautobot_token}',
+                       'Accept': f'application/json; version={api_version}'}
+            base_url = f'{self._sot.nautobot_url.rstrip("/")}/api/'
+            logger.bind(extra="aio").debug(f'creating async client; url={base_url} ' \
+                f'max_connections={self._max_connections}')
+            self._client = httpx.AsyncClient(base_url=base_url,
+                                             headers=headers,
+                                             verify=self._sot.ssl_verify,
+                                             limits=self._limits,
+                                             timeout=self._timeout)
+            self._semaphore = asyncio.Semaphore(self._max_connections)
+        return self._client
@@ -0,0 +1,136 @@
+import copy
+import json
+import time
+import threading
+from collections import OrderedDict
+from loguru import logger
+
+
+class QueryCache(object):
+    """TTL/LRU cache of query results
+
+    The cache is used by the selection to return the result of identical queries without
+    asking nautobot again. Each schema (nb.devices, nb.ipaddresses ...) has its own time to live.
+    If the cache is full the least recently used entry is removed.
+
+    A result is copied when it is added to the cache and each time it is returned, so
+    the callers may modify their results.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        maximum number of cached results, by default 256
+    ttl : int, optional
+        default time to live in seconds, by default 60
+    schema_ttl : dict, optional
+        time to live per schema; a ttl of 0 disables caching of this schema
+
+    Examples
+    --------
+    >>> cache = QueryCache(maxsize=128, ttl=300, schema_ttl={'nb.changes': 0})
+    >>> cache.put(key, 'nb.devices', result)
+    >>> cache.get(key)
+    """
+
+    # object changes are used to detect changes; never cache them
+    default_schema_ttl = {'nb.changes': 0}
+
+    def __init__(self, maxsize:int=256, ttl:int=60, schema_ttl:dict=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._schema_ttl = dict(self.default_schema_ttl)
+        if schema_ttl:
+            self._schema_ttl.update(schema_ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, maxsize:int=None, ttl:int=None, schema_ttl:dict=None) -> None:
+        """configure cache
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            maximum number of cached results
+        ttl : int, optional
+            default time to live in seconds
+        schema_ttl : dict, optional
+            time to live per schema eg. {'nb.devices': 300}
+        """
+        with self._lock:
+            if maxsize is not None:
+                self._maxsize = maxsize
+            if ttl is not None:
+                self._ttl = ttl
+            if schema_ttl:
+                self._schema_ttl.update(schema_ttl)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def ttl(self, using:str) -> int:
+        """return time to live of schema"""
+        return self._schema_ttl.get(using, self._ttl)
+
+    def get(self, key:tuple):
+        """return (a copy of the) cached result or None if the key is unknown or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, result = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        logger.bind(extra="cache").debug(f'cache hit; hits={self.hits} misses={self.misses}')
+        return copy.deepcopy(result)
+
+    def put(self, key:tuple, using:str, result) -> None:
+        """add (a copy of the) result to cache"""
+        ttl = self.ttl(using)
+        if ttl <= 0 or self._maxsize <= 0:
+            return
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url:str=None, using:str=None) -> None:
+        """remove cached results
+
+        Parameters
+        ----------
+        url : str, optional
+            only remove results of this nautobot, by default all
+        using : str, optional
+            only remove results of this schema, by default all
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if (url is None or key[0] == url) and (using is None or key[1] == using):
+                    del self._entries[key]
+        logger.bind(extra="cache").debug(f'cache invalidated; url={url} using={using}')
+
+    def clear(self) -> None:
+        """remove all cached results"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(url:str, using:str, *args) -> tuple:
+        """return (hashable) key of a query
+
+        The first two elements are the nautobot url and the schema. All other
+        arguments are normalized to a string.
+        """
+        normalized = json.dumps(args, sort_keys=True, default=str)
+        return (url, using, normalized)
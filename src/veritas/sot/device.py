@@ -3,6 +3,36 @@ from loguru import logger
 # veritas
 from veritas.tools import tools
 
+
+def resolve_tags(sot, names:list) -> list:
+    """resolve names of tags using the metadata registry
+
+    Parameters
+    ----------
+    sot : Sot
+        Sot object
+    names : list
+        list of tag names
+
+    Returns
+    -------
+    tags : list
+        list of known tags ({'id': id, 'name': name})
+    """
+    known_tags = sot.metadata.tags()
+    if any(name not in known_tags for name in names):
+        # the tag may have been added after the registry was loaded
+        sot.metadata.refresh('tags')
+        known_tags = sot.metadata.tags()
+
+    tags = []
+    for name in names:
+        if name in known_tags:
+            tags.append(known_tags[name])
+        else:
+            logger.error(f'unknown tag {name}')
+    return tags
+
 class Device:
     """Device class to interact with nautobot to update devices and interfaces
 
@@ -51,6 +81,8 @@ class Device:
         if device:
             update = device.update(properties)
             logger.debug(f'update device result={update}')
+            if update:
+                self._sot.invalidate_cache()
             return update
         else:
             logger.error(f'device {self._device} not found')
@@ -109,7 +141,8 @@ class Device:
         new_tags : list
             list of tags to add
         set_tag : bool, optional
-            if true, tags are set otherewise tags are added, by default False
+            if true, tags are set otherewise tags are added, by default False.
+            This applies to interfaces too; before, the tags of an interface were always added.
 
         Returns
         -------
@@ -117,15 +150,14 @@ class Device:
             true if successful, false otherwise
         """        
         if self._interface:
-            return self.add_interface_tags(new_tags, set_tag=False)
-
-        final_list = []
+            return self.add_interface_tags(new_tags, set_tag=set_tag)
 
+        new_tags = list(new_tags)
         if not set_tag:
             # if the device already exists there may also be tags
             device = self._nautobot.dcim.devices.get(name=self._device)
             if device is None:
-                logger.error(f'unknown device {self._device_name}')
+                logger.error(f'unknown device {self._device}')
                 return False
 
             for tag in device.tags:
@@ -136,12 +168,7 @@ class Device:
             logger.debug(f'updating tags to {new_tags}')
 
         # check if new tag is known; add id to final list
-        for new_tag in new_tags:
-            tag = self._nautobot.extras.tags.get(name=new_tag)
-            if tag is None:
-                logger.error(f'unknown tag {new_tag}')
-            else:
-                final_list.append(tag.id)
+        final_list = [tag['id'] for tag in resolve_tags(self._sot, new_tags)]
 
         if len(final_list) > 0:
             properties = {'tags': final_list}
@@ -200,8 +227,6 @@ class Device:
         bool
             true if successful, false otherwise
         """        
-        final_list = []
-
         interface = self._nautobot.dcim.interfaces.get(
                     device=[self._device],
                     name=self._interface)
@@ -210,6 +235,7 @@ class Device:
             logger.error(f'unknown interface {self._interface} on {self._device}')
             return False
 
+        new_tags = list(new_tags)
         if not set_tag:
             for tag in interface.tags:
                 if tag.name not in new_tags:
@@ -218,13 +244,8 @@ class Device:
             logger.debug(f'current tags: {interface.tags}')
             logger.debug(f'updating tags to {new_tags}')
 
-        # check if new tag is known; add id to final list
-        for new_tag in new_tags:
-            tag = self._nautobot.extras.tags.get(name=new_tag)
-            if tag is None:
-                logger.error(f'unknown tag {new_tag}')
-            else:
-                final_list.append(tag.name)
+        # check if new tag is known; add name to final list
+        final_list = [tag['name'] for tag in resolve_tags(self._sot, new_tags)]
 
         if len(final_list) > 0:
             properties = {'tags': final_list}
@@ -293,7 +314,7 @@ class Device:
 
         device = self._nautobot.dcim.devices.get(name=self._device)
         if device is None:
-            logger.error(f'unknown device {self._device_name}')
+            logger.error(f'unknown device {self._device}')
             return False
     
         return device.update(properties)
@@ -323,3 +344,168 @@ class Device:
         except Exception as exc:
             logger.error(f'could not update interface; got exception {exc}')
             return False
+
+class Devices:
+    """Devices class to set, add or delete tags of multiple devices or interfaces at once
+
+    The devices (or interfaces) are read using a few filter queries and updated 
+    using bulk PATCH requests.
+
+    Parameters
+    ----------
+    sot : Sot
+        Sot object
+    devices : list
+        list of device names
+    chunk_size : int, optional
+        number of objects per bulk request, by default 500
+
+    Examples
+    --------
+    >>> sot.devices(['lab-01.local', 'lab-02.local']).add_tags(['ospf', 'bgp'])
+    >>> sot.devices(['lab-01.local', 'lab-02.local']).interface('Loopback0').delete_tags(['mgmt'])
+    """
+
+    # number of names per filter query; the names are part of the URL
+    filter_size = 100
+
+    def __init__(self, sot, devices:list, chunk_size:int=500):
+        self._sot = sot
+        self._devices = list(devices)
+        self._interface = None
+        self._chunk_size = chunk_size
+
+        # open connection to nautobot
+        self._nautobot = self._sot.open_nautobot()
+
+    def interface(self, interface_name:str) -> "Devices":
+        """set or delete tags of the interface of all devices instead of the devices
+
+        Parameters
+        ----------
+        interface_name : str
+            name of the interface
+
+        Returns
+        -------
+        Devices
+            the Devices object
+        """
+        self._interface = interface_name
+        return self
+
+    def set_tags(self, new_tags:list) -> bool:
+        """set tags of all devices or interfaces
+
+        Parameters
+        ----------
+        new_tags : list
+            list of tags to set
+
+        Returns
+        -------
+        bool
+            true if successful, false otherwise
+        """
+        return self.add_tags(new_tags, set_tag=True)
+
+    def add_tags(self, new_tags:list, set_tag:bool=False) -> bool:
+        """add tags to all devices or interfaces
+
+        Parameters
+        ----------
+        new_tags : list
+            list of tags to add
+        set_tag : bool, optional
+            if true, tags are set otherewise tags are added, by default False
+
+        Returns
+        -------
+        bool
+            true if successful, false otherwise (eg. if a device or interface was not found)
+        """
+        tag_ids = [tag['id'] for tag in resolve_tags(self._sot, new_tags)]
+        if len(tag_ids) == 0:
+            logger.error('no known tag to add')
+            return False
+
+        updates = []
+        entities, found_all = self._get_entities()
+        for entity in entities:
+            tags = list(tag_ids)
+            if not set_tag:
+                tags += [tag.id for tag in entity.tags if tag.id not in tag_ids]
+            updates.append({'id': entity.id, 'tags': tags})
+        return self._bulk_update(updates) and found_all
+
+    def delete_tags(self, tags_to_delete:list) -> bool:
+        """delete tags from all devices or interfaces
+
+        Parameters
+        ----------
+        tags_to_delete : list
+            list of tags to delete
+
+        Returns
+        -------
+        bool
+            true if successful, false otherwise (eg. if a device or interface was not found)
+        """
+        updates = []
+        entities, found_all = self._get_entities()
+        for entity in entities:
+            tags = [tag.id for tag in entity.tags if tag.name not in tags_to_delete]
+            if len(tags) < len(entity.tags):
+                updates.append({'id': entity.id, 'tags': tags})
+        return self._bulk_update(updates) and found_all
+
+    # -----===== internals =====-----
+
+    def _endpoint(self):
+        """return the endpoint to use"""
+        if self._interface:
+            return self._nautobot.dcim.interfaces
+        return self._nautobot.dcim.devices
+
+    def _get_entities(self) -> tuple:
+        """get all devices or interfaces using as few filter queries as possible
+
+        Returns
+        -------
+        tuple
+            list of entities and true if an entity of each device was found
+        """
+        entities = []
+        for i in range(0, len(self._devices), self.filter_size):
+            names = self._devices[i:i + self.filter_size]
+            if self._interface:
+                entities += self._nautobot.dcim.interfaces.filter(device=names, name=self._interface)
+            else:
+                entities += self._nautobot.dcim.devices.filter(name=names)
+        logger.debug(f'got {len(entities)} of {len(self._devices)} entities')
+
+        if self._interface:
+            found = {entity.device.name for entity in entities}
+        else:
+            found = {entity.name for entity in entities}
+        missing = [name for name in self._devices if name not in found]
+        if missing:
+            what = f'interface {self._interface} of device(s)' if self._interface else 'device(s)'
+            logger.error(f'{what} not found: {", ".join(missing)}')
+        return entities, len(missing) == 0
+
+    def _bulk_update(self, updates:list) -> bool:
+        """send bulk PATCH requests"""
+        success = True
+        endpoint = self._endpoint()
+        for i in range(0, len(updates), self._chunk_size):
+            chunk = updates[i:i + self._chunk_size]
+            logger.debug(f'updating {len(chunk)} entities')
+            try:
+                endpoint.update(chunk)
+            except Exception as exc:
+                logger.error(f'could not update entities; got exception {exc}')
+                success = False
+        if len(updates) > 0:
+            self._sot.invalidate_cache()
+        return success
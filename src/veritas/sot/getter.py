@@ -248,14 +248,11 @@ class Getter(object):
         custom_fields_type : dict | list
             list or dict of custom_fields_types
         """        
-        cf_types = self._nautobot.extras.custom_fields.all()
+        cf_types = self._sot.metadata.custom_fields()
         if get_list:
-            return [str(t.type) for t in cf_types ]
+            return [t['type'] for t in cf_types.values()]
         else:
-            response = {}
-            for t in cf_types:
-                response[t.display] = {'type': str(t.type)}
-            return response
+            return dict(cf_types)
 
     def all_device_types(self, get_list:bool=False) -> dict | list:
         """get a list or dict of all device types
@@ -270,14 +267,11 @@ class Getter(object):
         device_types : dict | list
             list or dict of device types
         """        
-        device_types = self._nautobot.dcim.device_types.all()
+        device_types = self._sot.metadata.device_types()
         if get_list:
-            return [t.model for t in device_types ]
+            return [t['model'] for t in device_types.values()]
         else:
-            response = {}
-            for t in device_types:
-                response[t.display] = {'model': t.model}
-            return response
+            return dict(device_types)
 
     def get_all_roles(self, get_list:bool=False) -> dict | list:
         """get all roles from nautobot
@@ -292,14 +286,11 @@ class Getter(object):
         roles : dict | list
             list or dict of roles
         """        
-        roles = self._nautobot.extras.roles.all()
+        roles = self._sot.metadata.roles()
         if get_list:
-            return [r.name for r in roles ]
+            return [r['name'] for r in roles.values()]
         else:
-            response = {}
-            for r in roles:
-                response[r.display] = {'name': r.name, 'content_types': r.content_types}
-            return response
+            return dict(roles)
 
     def all_platforms(self, get_list:bool=False) -> dict | list:
         """return all platforms from nautobot
@@ -314,14 +305,11 @@ class Getter(object):
         platforms : dict | list
             get list or dict of platforms
         """        
-        platforms = self._nautobot.dcim.platforms.all()
+        platforms = self._sot.metadata.platforms()
         if get_list:
-            return [p.name for p in platforms ]
+            return [p['name'] for p in platforms.values()]
         else:
-            response = {}
-            for p in platforms:
-                response[p.display] = {'name': p.name}
-            return response
+            return dict(platforms)
 
     def all_locations(self, location_type:str=None, get_list:bool=False) -> dict | list:
         """return all locations (by location_type) from nautobot
@@ -338,22 +326,15 @@ class Getter(object):
         locations : dict | list
             list or dict of locations
         """        
-        locations = self._nautobot.dcim.locations.all()
+        locations = self._sot.metadata.locations()
         if get_list:
-            return [loc.name for loc in locations if loc.location_type.name == location_type or not location_type]
+            return [name for name, loc in locations.items() 
+                    if loc['location_type'] == location_type or not location_type]
         else:
             response = {}
-            for loc in locations:
-                if loc.location_type.name == location_type or not location_type:
-                    row = {'name': loc.name, 
-                                        'location_type': loc.location_type.name,
-                                        'description': loc.description,
-                          }
-                    if loc and loc.parent and loc.parent.name:
-                        row.update({'parent': loc.parent.name})
-                    else:
-                        row.update({'parent': None})
-                    response[loc.name] = row
+            for name, loc in locations.items():
+                if loc['location_type'] == location_type or not location_type:
+                    response[name] = dict(loc)
             return response
 
     def query(
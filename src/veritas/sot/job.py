@@ -100,7 +100,9 @@ class Job(object):
         return self
 
     def init_nornir(self, data:dict=None, select:str=None, host_groups:list=[], groups:dict=None,
-                     defaults={}, connection_options:dict=None, num_workers:int=10) -> Nornir:
+                     defaults={}, connection_options:dict=None, num_workers:int=10,
+                     page_size:int=1000, cache_file:str=None, cache_ttl:int=300,
+                     snapshot_file:str=None) -> Nornir:
         """init nornir
 
         Parameters
@@ -119,6 +121,14 @@ class Job(object):
             dict of connection options, by default None
         num_workers : int, optional
             number of nornir workers, by default 10
+        page_size : int, optional
+            number of devices read from the SOT at once, by default 1000
+        cache_file : str, optional
+            file the inventory is cached in, by default None (no cache)
+        cache_ttl : int, optional
+            time to live of the cached inventory in seconds, by default 300
+        snapshot_file : str, optional
+            snapshot of the inventory that is used until nautobot is changed, by default None
         """
         _data = data if data else self._data
         _select = select if select else self._select
@@ -160,6 +170,10 @@ class Job(object):
                     'host_groups': _host_groups,
                     'defaults': _defaults,
                     'groups': _groups,
+                    'page_size': page_size,
+                    'cache_file': cache_file,
+                    'cache_ttl': cache_ttl,
+                    'snapshot_file': snapshot_file,
                 }
             },
             logging=self._logging
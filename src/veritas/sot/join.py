@@ -0,0 +1,143 @@
+import re
+from loguru import logger
+
+# these functions are used to join the results of two queries
+# they are used by the selection (join/on) and do not need the sot object
+
+JOIN_TYPES = ['inner', 'left', 'right', 'outer']
+
+# a key path looks like interfaces_as_tagged[0].device.id
+_keypath_regex = re.compile(r'([^.\[\]]+)|\[(\d+)\]')
+
+
+def compile_keypath(keypath:str) -> tuple:
+    """compile key path to a tuple of keys and indexes
+
+    Parameters
+    ----------
+    keypath : str
+        the key path eg. interfaces_as_tagged[0].device.id
+
+    Returns
+    -------
+    keys : tuple
+        tuple of keys (str) and list indexes (int)
+    """
+    keys = []
+    for key, index in _keypath_regex.findall(keypath):
+        keys.append(int(index) if index else key)
+    return tuple(keys)
+
+def get_value(data:dict, keys:tuple):
+    """return value of (compiled) key path or raise KeyError
+
+    Parameters
+    ----------
+    data : dict
+        the row
+    keys : tuple
+        the compiled key path
+
+    Returns
+    -------
+    value
+        the value the key path points to
+    """
+    value = data
+    try:
+        for key in keys:
+            value = value[key]
+    except (KeyError, IndexError, TypeError):
+        raise KeyError(keys)
+    return value
+
+def hash_join(left:list, right:list, left_on:str, right_on:str, right_identifier:str, how:str='inner'):
+    """join left and right table using a hash index
+
+    The index is built once on the join key of the right table. The rows of the left
+    table are then used to probe the index, so the joined rows are yielded in the order
+    of the left table. Rows that do not contain the join key can only appear in
+    outer joins.
+
+    Parameters
+    ----------
+    left : list
+        rows of the left table
+    right : list
+        rows of the right table
+    left_on : str
+        key path of the left join key eg. interfaces_as_tagged[0].device.id
+    right_on : str
+        key path of the right join key eg. id
+    right_identifier : str
+        name of the key the right row is added to the joined row
+    how : str, optional
+        inner, left, right or outer, by default 'inner'
+
+    Yields
+    ------
+    row : dict
+        the joined row; the values of the left row and the right row as right_identifier
+
+    Raises
+    ------
+    ValueError
+        if the join type is unknown
+
+    Notes
+    -----
+    The joined rows follow the order of the left table; a left row that matches several
+    right rows is joined with them in the order of the right table. The right rows
+    without a matching left row (right and outer join) are yielded last.
+    """
+    if how not in JOIN_TYPES:
+        raise ValueError(f'unknown join type {how}; use one of {JOIN_TYPES}')
+
+    left_keys = compile_keypath(left_on)
+    right_keys = compile_keypath(right_on)
+    emit_unmatched_left = how in ['left', 'outer']
+    emit_unmatched_right = how in ['right', 'outer']
+    logger.bind(extra="hash join").debug(f'building index on right table; ' \
+        f'left={len(left)} right={len(right)} how={how}')
+
+    index = {}
+    for position, row in enumerate(right):
+        try:
+            key = _hashable(get_value(row, right_keys))
+        except KeyError:
+            continue
+        index.setdefault(key, []).append(position)
+
+    matched = set()
+    for row in left:
+        try:
+            positions = index.get(_hashable(get_value(row, left_keys)), [])
+        except KeyError:
+            positions = []
+        if not positions:
+            if emit_unmatched_left:
+                yield _joined_row(row, None, right_identifier)
+            continue
+        for position in positions:
+            if emit_unmatched_right:
+                matched.add(position)
+            yield _joined_row(row, right[position], right_identifier)
+
+    if emit_unmatched_right:
+        for position, row in enumerate(right):
+            if position not in matched:
+                yield _joined_row(None, row, right_identifier)
+
+def _joined_row(left_row:dict, right_row:dict, right_identifier:str) -> dict:
+    """return new row containing the left values and the right row"""
+    row = dict(left_row) if left_row else {}
+    row[right_identifier] = right_row
+    return row
+
+def _hashable(value):
+    """return a hashable representation of value (lists and dicts are converted to tuples)"""
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple((k, _hashable(v)) for k, v in sorted(value.items()))
+    return value
@@ -0,0 +1,165 @@
+import json
+import time
+import threading
+from loguru import logger
+
+# veritas
+from veritas.sot import queries
+
+
+class Metadata(object):
+    """registry of (rarely modified) metadata of nautobot
+
+    The registry contains the custom fields, platforms, roles, device types, locations
+    and tags of nautobot. Each kind of data is loaded once when it is needed and
+    reloaded when the time to live has expired or refresh is called.
+
+    The registry can be saved to a snapshot file and loaded from it. If a snapshot is loaded
+    nautobot is not asked until refresh is called.
+
+    Parameters
+    ----------
+    sot : Sot
+        the sot object
+    ttl : int, optional
+        time to live in seconds, by default 300
+
+    Examples
+    --------
+    >>> cf_types = sot.metadata.custom_fields()
+    >>> sot.metadata.save('metadata.json')
+    >>> sot.metadata.load('metadata.json')
+    """
+
+    KINDS = ['custom_fields', 'platforms', 'roles', 'device_types', 'locations', 'tags']
+
+    def __init__(self, sot, ttl:int=300):
+        self._sot = sot
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._data = {}
+        self._loaded = {}
+        self._offline = False
+
+    # -----===== user commands =====-----
+
+    def custom_fields(self) -> dict:
+        """return custom fields (display: {'type': type})"""
+        return self._get('custom_fields')
+
+    def platforms(self) -> dict:
+        """return platforms (display: {'name': name})"""
+        return self._get('platforms')
+
+    def roles(self) -> dict:
+        """return roles (display: {'name': name, 'content_types': content_types})"""
+        return self._get('roles')
+
+    def device_types(self) -> dict:
+        """return device types (display: {'model': model})"""
+        return self._get('device_types')
+
+    def locations(self) -> dict:
+        """return locations (name: {'name', 'location_type', 'description', 'parent'})"""
+        return self._get('locations')
+
+    def tags(self) -> dict:
+        """return tags (name: {'id': id, 'name': name})"""
+        return self._get('tags')
+
+    def set_ttl(self, ttl:int) -> None:
+        """set time to live in seconds"""
+        self._ttl = ttl
+
+    def refresh(self, kind:str=None) -> None:
+        """reload metadata from nautobot
+
+        Parameters
+        ----------
+        kind : str, optional
+            reload this kind only (eg. custom_fields), by default all
+        """
+        kinds = [kind] if kind else self.KINDS
+        with self._lock:
+            self._offline = False
+            for k in kinds:
+                self._load(k)
+
+    def save(self, filename:str) -> None:
+        """save all metadata to snapshot file
+
+        Parameters
+        ----------
+        filename : str
+            name of the snapshot file
+        """
+        snapshot = {k: self._get(k) for k in self.KINDS}
+        logger.debug(f'writing metadata snapshot to {filename}')
+        with open(filename, 'w') as f:
+            json.dump(snapshot, f)
+
+    def load(self, filename:str) -> None:
+        """load metadata from snapshot file
+
+        Parameters
+        ----------
+        filename : str
+            name of the snapshot file
+        """
+        logger.debug(f'reading metadata snapshot from {filename}')
+        with open(filename) as f:
+            snapshot = json.load(f)
+        with self._lock:
+            self._offline = True
+            for kind in self.KINDS:
+                if kind in snapshot:
+                    self._data[kind] = snapshot[kind]
+                    self._loaded[kind] = time.monotonic()
+            queries.clear_compiled_queries()
+
+    # -----===== internals =====-----
+
+    def _get(self, kind:str) -> dict:
+        """return metadata; load it if unknown or expired"""
+        with self._lock:
+            loaded = self._loaded.get(kind)
+            expired = loaded is None or (not self._offline and time.monotonic() - loaded > self._ttl)
+            if expired:
+                self._load(kind)
+            return self._data[kind]
+
+    def _load(self, kind:str) -> None:
+        """load metadata from nautobot"""
+        logger.bind(extra="metadata").debug(f'loading {kind} from nautobot')
+        nautobot = self._sot.open_nautobot()
+        response = {}
+        if kind == 'custom_fields':
+            for t in nautobot.extras.custom_fields.all():
+                response[t.display] = {'type': str(t.type)}
+            # the compiled queries depend on the type of the custom fields
+            queries.clear_compiled_queries()
+        elif kind == 'platforms':
+            for p in nautobot.dcim.platforms.all():
+                response[p.display] = {'name': p.name}
+        elif kind == 'roles':
+            for r in nautobot.extras.roles.all():
+                response[r.display] = {'name': r.name, 'content_types': r.content_types}
+        elif kind == 'device_types':
+            for t in nautobot.dcim.device_types.all():
+                response[t.display] = {'model': t.model}
+        elif kind == 'locations':
+            for loc in nautobot.dcim.locations.all():
+                row = {'name': loc.name,
+                       'location_type': loc.location_type.name,
+                       'description': loc.description,
+                       'parent': None}
+                if loc.parent and loc.parent.name:
+                    row['parent'] = loc.parent.name
+                response[loc.name] = row
+        elif kind == 'tags':
+            for t in nautobot.extras.tags.all():
+                response[t.name] = {'id': t.id, 'name': t.name}
+        else:
+            raise KeyError(f'unknown metadata {kind}')
+        self._data[kind] = response
+        self._loaded[kind] = time.monotonic()
@@ -356,6 +356,9 @@ class Onboarding:
         interfaces = properties.get('interfaces', self._interfaces)
         self.add_interfaces(device=device, interfaces=interfaces)
 
+        # cached query results may no longer be valid
+        self._sot.invalidate_cache()
+
         return device
 
     def add_interfaces(self, device, interfaces:list) -> bool:
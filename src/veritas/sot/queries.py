@@ -8,6 +8,12 @@ from veritas.tools import tools
 # these method are used to execute queries against the SOT and are private
 # they are used by the public methods in the getter.py
 
+# schemas that support limit and offset
+PAGINATED_SCHEMAS = ['nb.devices', 'nb.ipaddresses', 'nb.vlans', 'nb.prefixes', 'nb.general', 'nb.changes', 'nb.vms']
+
+# compiled sql queries (see _compile_sql_query)
+_compiled_queries = {}
+
 def _execute_sql_query(
         getter_obj, 
         select:str, 
@@ -21,72 +27,40 @@ def _execute_sql_query(
     # we need the nautobot object to query the database
     nb = getter_obj._sot.open_nautobot()
 
-    subqueries = {'__interfaces_params__': [],
-                  '__interface_assignments_params__': [],
-                  '__primaryip4for_params__': [],
-                  '__devices_params__': [],
-                  '__prefixes_params__': [],
-                  '__changes_params__': [],
-                  '__ipaddresses_params__': [],
-                  '__vlans_params__': [],
-                  '__locations_params__': [],
-                  '__tags_params__': [],
-                  '__general_params__': [],
-                  '__vms_params__': []}
+    query, variables = _prepare_sql_query(getter_obj, select, using, where, transform, limit, offset)
 
-    # read query from config
-    query = getter_obj._sot.sot_config.get('queries',{}).get(using)
+    response = None
+    logger.debug(f'select={select} using={using} where={variables}')
+    with logger.catch():
+        response = nb.graphql.query(query=query, variables=variables).json
+    return _get_sql_data(response, using, select, transform)
 
+def _prepare_sql_query(
+        getter_obj, 
+        select:list, 
+        using:str, 
+        where:dict, 
+        transform: list=[],
+        limit:int = 0,
+        offset:int = 0) -> tuple[str, dict]:
+    """return query and query variables of sql like query
+
+    The sync (getter) and the async (aio) query use this function to build the query.
+    """
     if 'ipaddress_to_device' in transform and 'primary_ip4_for' not in select:
         logger.warning('transforming ipaddress_to_device needs primary_ip4_for')
         select.append('primary_ip4_for')
 
-    # get final variables for our main parameter
-    query_final_vars, cf_fields_types = _get_query_variables(getter_obj, where, "")
-    logger.bind(extra="query").debug(f'query_final_vars={query_final_vars}')
+    # the query only depends on the names of the where keys and whether limit and offset are used
+    query, query_final_vars, cf_fields_types = _compile_sql_query(getter_obj, using, where, limit > 0, offset > 0)
 
-    # loop through where statement and put values to subqueries and adjust custom field types
+    # adjust the type of custom fields
     for whr in where:
-        #
-        # we have some special cases
-        # some queries have the possibility of "sub" queries eg. when you want to poll
-        # devices within a specific prefix range that belong to a specific platform
-        # primary_ip4_for(__primaryip4for_params__) is used to query for the platform
-        #
-        # the syntax to use the subqueries is:
-        # devices = sot.select('id, hostname, primary_ip4_for') \
-        #              .using('nb.ipaddresses') \
-        #              .where('prefix="192.168.0.0/24" and pip4for_cf_net=name_of_net')
-        if whr.startswith('interfaces_'):
-            subqueries['__interfaces_params__'].append(f'{whr.replace("interfaces_","")}: ${whr}')
-        elif whr.startswith('pip4for_'):
-            subqueries['__primaryip4for_params__'].append(f'{whr.replace("pip4for_","")}: ${whr}')
-        elif whr.startswith('assignments_'):
-            subqueries['__interface_assignments_params__'].append(f'{whr.replace("assignments_","")}: ${whr}')
-        else:
-            # we use the 'using' string to identify the main query
-            # eg. using(nb.devices) will be used to query the devices __devices_params__
-            sq = f'__{using.replace("nb.","")}_params__'
-            subqueries[sq].append(f'{whr}: ${whr}')
-
-        # adjust the type of custom fields
         name = f'${whr}: String'
         if isinstance(where[whr], list) and name in query_final_vars:
             logger.debug(f'convert {whr} to String')
             where[whr] = where[whr][0]
 
-    if using in ['nb.devices', 'nb.ipaddresses', 'nb.vlans', 'nb.prefixes', 'nb.general', 'nb.changes', 'nb.vms']:
-        # some queries have a limit and offset parameter
-        # the limit and offset value is set in the 'where' dictionary
-        # we have to add limit and/or offset to the list of query variables
-        sq = f'__{using.replace("nb.","")}_params__'
-        if limit > 0:
-            subqueries[sq].append('limit: $limit')
-            query_final_vars.append('$limit: Int')
-        if offset > 0:
-            subqueries[sq].append('offset: $offset')
-            query_final_vars.append('$offset: Int')
-
     # convert string ["val1","val2",....,"valn"] to list
     for key,val in dict(where).items():
         logger.bind(extra="cnvt where").trace(f'key: {key} val: {val} type(val): {type(val)}')
@@ -103,16 +77,6 @@ def _execute_sql_query(
         elif isinstance(val, list):
             logger.warning('todo(???) .... cast list???')
 
-    # convert query_final_vars, which is a list, into a string
-    str_final_vars = ",".join(query_final_vars)
-    # now replace the placeholder with the query variables
-    query = query.replace('__query_vars__', str_final_vars)
-    # we have some subqueries, replace them                    
-    for q in subqueries:
-        query = query.replace(q, ",".join(subqueries[q]))
-    # cleanup
-    query = query.replace('{}','').replace('()','')
-
     # 'select' are values the user has SELECTed
     # we have to set the variables to True to get the value
     for v in select:
@@ -130,10 +94,7 @@ def _execute_sql_query(
 
     # debugging output
     logger.bind(extra="query").trace('--- query_vars ---')
-    logger.bind(extra="query").trace(str_final_vars)
-    for q in subqueries:
-        logger.bind(extra="query").trace(q)
-        logger.bind(extra="query").trace(subqueries[q])
+    logger.bind(extra="query").trace(query_final_vars)
     logger.bind(extra="query").trace('--- query ---')
     logger.bind(extra="query").trace(query)
     logger.bind(extra="query").trace('--- select ---')
@@ -141,17 +102,17 @@ def _execute_sql_query(
     logger.bind(extra="query").trace('--- where ---')
     logger.bind(extra="query").trace(where)
 
-    response = None
-    logger.debug(f'select={select} using={using} where={where}')
-    with logger.catch():
-        response = nb.graphql.query(query=query, variables=where).json
+    return query, where
+
+def _get_sql_data(response:dict, using:str, select:list, transform:list=[]) -> dict:
+    """return (transformed) data of the response of a sql like query"""
     if not response:
         logger.error('got no valid response')
         return {}
 
     if 'errors' in response:
         logger.error(f'got error: {response.get("errors")}')
-        response = {}
+        return {}
     elif 'nb.ipaddresses' in using:
         data = dict(response)['data']['ip_addresses']
     elif 'nb.vlan' in using:
@@ -171,6 +132,92 @@ def _execute_sql_query(
         return  transform_data(data, transform, select=select)
     return data
 
+def _compile_sql_query(getter_obj, using:str, where:dict, use_limit:bool, use_offset:bool) -> tuple[str, list, dict]:
+    """return (cached) query, query variables and custom field types
+
+    Building the query needs a lot of string operations and may ask nautobot for
+    the custom field types. The result only depends on the schema, the names of the 
+    where keys and whether limit and offset are used. So we build it once and cache it.
+    """
+    key = (getter_obj._sot.nautobot_url, using, frozenset(where), use_limit, use_offset)
+    compiled = _compiled_queries.get(key)
+    if compiled:
+        logger.bind(extra="query").trace(f'using compiled query; key={key}')
+        return compiled[0], list(compiled[1]), compiled[2]
+
+    subqueries = {'__interfaces_params__': [],
+                  '__interface_assignments_params__': [],
+                  '__primaryip4for_params__': [],
+                  '__devices_params__': [],
+                  '__prefixes_params__': [],
+                  '__changes_params__': [],
+                  '__ipaddresses_params__': [],
+                  '__vlans_params__': [],
+                  '__locations_params__': [],
+                  '__tags_params__': [],
+                  '__general_params__': [],
+                  '__vms_params__': []}
+
+    # read query from config
+    query = getter_obj._sot.sot_config.get('queries',{}).get(using)
+
+    # get final variables for our main parameter
+    query_final_vars, cf_fields_types = _get_query_variables(getter_obj, where, "")
+    logger.bind(extra="query").debug(f'query_final_vars={query_final_vars}')
+
+    # loop through where statement and put values to subqueries
+    for whr in where:
+        #
+        # we have some special cases
+        # some queries have the possibility of "sub" queries eg. when you want to poll
+        # devices within a specific prefix range that belong to a specific platform
+        # primary_ip4_for(__primaryip4for_params__) is used to query for the platform
+        #
+        # the syntax to use the subqueries is:
+        # devices = sot.select('id, hostname, primary_ip4_for') \
+        #              .using('nb.ipaddresses') \
+        #              .where('prefix="192.168.0.0/24" and pip4for_cf_net=name_of_net')
+        if whr.startswith('interfaces_'):
+            subqueries['__interfaces_params__'].append(f'{whr.replace("interfaces_","")}: ${whr}')
+        elif whr.startswith('pip4for_'):
+            subqueries['__primaryip4for_params__'].append(f'{whr.replace("pip4for_","")}: ${whr}')
+        elif whr.startswith('assignments_'):
+            subqueries['__interface_assignments_params__'].append(f'{whr.replace("assignments_","")}: ${whr}')
+        else:
+            # we use the 'using' string to identify the main query
+            # eg. using(nb.devices) will be used to query the devices __devices_params__
+            sq = f'__{using.replace("nb.","")}_params__'
+            subqueries[sq].append(f'{whr}: ${whr}')
+
+    if using in PAGINATED_SCHEMAS:
+        # some queries have a limit and offset parameter
+        # the limit and offset value is set in the 'where' dictionary
+        # we have to add limit and/or offset to the list of query variables
+        sq = f'__{using.replace("nb.","")}_params__'
+        if use_limit:
+            subqueries[sq].append('limit: $limit')
+            query_final_vars.append('$limit: Int')
+        if use_offset:
+            subqueries[sq].append('offset: $offset')
+            query_final_vars.append('$offset: Int')
+
+    # convert query_final_vars, which is a list, into a string
+    str_final_vars = ",".join(query_final_vars)
+    # now replace the placeholder with the query variables
+    query = query.replace('__query_vars__', str_final_vars)
+    # we have some subqueries, replace them                    
+    for q in subqueries:
+        query = query.replace(q, ",".join(subqueries[q]))
+    # cleanup
+    query = query.replace('{}','').replace('()','')
+
+    _compiled_queries[key] = (query, tuple(query_final_vars), cf_fields_types)
+    return query, query_final_vars, cf_fields_types
+
+def clear_compiled_queries() -> None:
+    """remove all compiled queries eg. after the custom fields were modified"""
+    _compiled_queries.clear()
+
 def _execute_gql_query(getter_obj, select:list, using:str, where: dict={}) -> dict:
     """execute GraphQL based queries"""
 
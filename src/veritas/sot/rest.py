@@ -42,15 +42,15 @@ class Rest(object):
         logger.debug(f'starting session for {self._username} on {self._api_url}')
         if self._session is None:
             if self._authentication == 'bearer' and self._username is not None and self._password is not None:
-                self._session = requests.Session()
+                self._session = self._sot.transport.session()
                 self._session.headers['Authorization'] = f"Bearer {self._username} {self._password}"
                 self._session.headers['Accept'] = 'application/json'
             elif self._authentication == 'basic' and self._username is not None and self._password is not None:
-                self._session = requests.Session()
+                self._session = self._sot.transport.session()
                 self._session.auth = (self._username, self._password)
                 logger.debug(f'session basic auth user: {self._username} pass: {self._password}')
             elif self._token is not None:
-                self._session = requests.Session()
+                self._session = self._sot.transport.session()
                 self._session.headers['Authorization'] = f"Token {self._token}"
                 self._session.headers['Accept'] = 'application/json'
         else:
@@ -1,13 +1,15 @@
 from loguru import logger
+from concurrent.futures import ThreadPoolExecutor
 from anytree import AnyNode, PostOrderIter, search
 from boolean_parser import parse as boolean_parser
 from boolean_parser.actions.boolean import BoolAnd, BoolOr
-from benedict import benedict
 
 # veritas
 from veritas.tools import tools
 from veritas.sot import sot
 from veritas.sot import queries
+from veritas.sot import join as joiner
+from veritas.sot import cache
 
 
 class Selection(object):
@@ -42,10 +44,12 @@ class Selection(object):
 
     """
 
-    # we cache the queries if we have logical expressions
-    # because we get a list of hostnames using the expression
-    # and then get return the cahced values
-    query_cache = {}
+    # results of queries are cached (see cache.QueryCache)
+    # the cache is shared by all selections; the key contains the url of nautobot
+    query_cache = cache.QueryCache()
+
+    # default number of concurrent queries when evaluating logical expressions
+    max_workers = 8
 
     def __init__(self, sot:sot, select:tuple[list|str]) -> None:
         self._sot = sot
@@ -59,6 +63,12 @@ class Selection(object):
         self._limit = 0
         self._offset = 0
 
+        # number of leafs of a logical expression that are queried concurrently
+        self._max_workers = self.max_workers
+
+        # use cached results of identical queries; the cache is used only if enabled by set(cache=True)
+        self._use_cache = False
+
         # everything we need to join two tables
         self._join = None
         self._on = None
@@ -66,6 +76,7 @@ class Selection(object):
         self._left_identifier = None
         self._right_table = None
         self._right_identifier = None
+        self._join_type = 'inner'
 
         # we have two modes sql and gql
         self._mode = "sql"
@@ -113,7 +124,7 @@ class Selection(object):
         Parameters
         ----------
         **kwargs
-            named parameter that are used to set values
+            named parameter that are used to set values (limit, offset, max_workers, cache)
 
         Returns
         -------
@@ -128,11 +139,15 @@ class Selection(object):
             self._limit = kwargs.get('limit')
         if 'offset' in kwargs:
             self._offset = kwargs.get('offset')
+        if 'max_workers' in kwargs:
+            self._max_workers = max(1, int(kwargs.get('max_workers')))
+        if 'cache' in kwargs:
+            self._use_cache = bool(kwargs.get('cache'))
 
-        logger.bind(extra="set").trace(f'limit: {self._limit} offset: {self._offset}')
+        logger.bind(extra="set").trace(f'limit: {self._limit} offset: {self._offset} max_workers: {self._max_workers}')
         return self
 
-    def join(self, schema:str) -> None:
+    def join(self, schema:str, how:str='inner') -> None:
         """join two schemas
 
         See the 'where' method for an example.
@@ -141,6 +156,8 @@ class Selection(object):
         ----------
         schema : str
             name of the two graphql schemas
+        how : str, optional
+            type of join (inner, left, right or outer), by default 'inner'
 
         Returns
         -------
@@ -160,6 +177,9 @@ class Selection(object):
         else:
             self._join = self._right_table = self._right_identifier = schema
 
+        if how not in joiner.JOIN_TYPES:
+            raise ValueError(f'unknown join type {how}; use one of {joiner.JOIN_TYPES}')
+        self._join_type = how
         return self
 
     def on(self, column:str) -> None:
@@ -261,6 +281,121 @@ class Selection(object):
         properties = tools.convert_arguments_to_properties(*unnamed, **named)
         logger.debug(f'query: values {self._select} using: {self._using} where {properties} mode: {self._mode}')
 
+        if not self._use_cache:
+            return self._where(properties)
+
+        # return cached result if the same query was executed before
+        cache_key = self._cache_key(properties)
+        response = self.query_cache.get(cache_key)
+        if response is not None:
+            logger.bind(extra="where").debug('returning cached result')
+            return response
+
+        response = self._where(properties)
+        # an empty dict is returned if the query failed
+        if response is not None and not (isinstance(response, dict) and len(response) == 0):
+            self.query_cache.put(cache_key, self._using, response)
+        return response
+
+    def iter_where(self, *unnamed, page_size:int=1000, prefetch:bool=False, **named):
+        """where as generator; the result is fetched page by page
+
+        Instead of getting the complete result using one single query, the data is 
+        fetched using limit and offset. Each row is yielded as soon as its page has arrived.
+
+        Parameters
+        ----------
+        *unnamed
+            unnamed parameter that are used as 'where' clause
+        page_size : int, optional
+            number of rows per page, by default 1000
+        prefetch : bool, optional
+            if true the next page is fetched in the background, by default False
+        **named
+            named parameter that are used as 'where' clause
+
+        Yields
+        ------
+        row : dict
+            a single row of the result
+
+        Raises
+        ------
+        ValueError
+            if the 'to_pandas' transformation is used
+
+        Notes
+        -----
+        Pagination is supported by simple expressions only. Logical expressions, joins and 
+        the GraphQL mode fall back to 'where' and yield the rows of the complete result.
+
+        Examples
+        --------
+        >>> for device in sot.select('id, hostname') \\
+        ...                  .using('nb.devices') \\
+        ...                  .iter_where('location=default-site', page_size=500):
+        ...     print(device)
+
+        """
+        if 'to_pandas' in self._transform:
+            raise ValueError('to_pandas cannot be used when iterating over the result')
+
+        properties = tools.convert_arguments_to_properties(*unnamed, **named)
+        if self._join or self._mode != 'sql' or \
+           self._using not in queries.PAGINATED_SCHEMAS or self._using == 'nb.general' or \
+           (isinstance(properties, str) and self._parse_logical_expression(properties) is not None):
+            logger.bind(extra="iter_where").debug('pagination not supported; using where')
+            yield from self.where(properties)
+            return
+
+        logger.bind(extra="iter_where").debug(f'paging through {self._using} page_size={page_size} prefetch={prefetch}')
+        offset = self._offset
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._get_page, properties, page_size, offset) if prefetch else None
+            while True:
+                page = future.result() if prefetch else self._get_page(properties, page_size, offset)
+                offset += page_size
+                # the last page is smaller than page_size
+                last_page = page is None or len(page) < page_size
+                if prefetch and not last_page:
+                    future = executor.submit(self._get_page, properties, page_size, offset)
+                if page:
+                    yield from page
+                if last_page:
+                    return
+
+    # private methods
+
+    def _get_page(self, properties:tuple[dict|str|list], limit:int, offset:int) -> list:
+        """return a single page of a simple query"""
+        # the query modifies the where clause; each page gets its own copy
+        expression = dict(properties) if isinstance(properties, dict) else properties
+        logger.bind(extra="iter_where").trace(f'getting page limit={limit} offset={offset}')
+        return self._simple_sql_query(select=list(self._select),
+                                      using=self._using,
+                                      expression=expression,
+                                      limit=limit,
+                                      offset=offset)
+
+    def _cache_key(self, properties:tuple[dict|str|list]) -> tuple:
+        """return key of query (select, using, where, limit, offset, mode ...)"""
+        where = properties.strip() if isinstance(properties, str) else properties
+        return self.query_cache.make_key(self._sot.nautobot_url,
+                                         self._using,
+                                         self._select,
+                                         where,
+                                         self._limit,
+                                         self._offset,
+                                         self._mode,
+                                         self._transform,
+                                         self._join,
+                                         self._right_identifier,
+                                         self._left_identifier,
+                                         self._on,
+                                         self._join_type)
+
+    def _where(self, properties:tuple[dict|str|list]) -> dict:
+        """execute query and return result"""
         # is it a join operation
         if self._join:
             """
@@ -342,8 +477,6 @@ class Selection(object):
             else:
                 return self._parse_gql_query(properties, self._select, self._using)
 
-    # private methods
-
     def _parse_gql_query(self, expression:str, select:list, using:str) -> dict:
         """parse GraphQL mode query
 
@@ -380,18 +513,9 @@ class Selection(object):
         logger.bind(extra="parse").debug(f'expression {expression}')
 
         # lets check if we have a logical operation
-        found_logical_expression = False
-        try:
-            if len(expression) > 0:
-                res = boolean_parser(expression)
-                res.logicop
-                # yes we have one ... parse it
-                logger.bind(extra="parse").debug(f'logical expression found {expression}')
-                found_logical_expression = True
-        except Exception:
-            logger.bind(extra="parse").debug(f'no logical operation found ... simple expression {expression}')
+        res = self._parse_logical_expression(expression)
 
-        if found_logical_expression:
+        if res is not None:
             # first we have to build a logical tree. This is a tree of the logical expression
             # Then we condense this tree and query it
             self._node_id = 0
@@ -410,11 +534,36 @@ class Selection(object):
         
         return response
 
-    def _simple_sql_query(self, select:list, using:str, expression: tuple[list|dict|str]) -> dict:
+    def _parse_logical_expression(self, expression:str):
+        """return parsed expression if expression is a logical expression otherwise None"""
+        try:
+            if len(expression) > 0:
+                res = boolean_parser(expression)
+                res.logicop
+                # yes we have one ... parse it
+                logger.bind(extra="parse").debug(f'logical expression found {expression}')
+                return res
+        except Exception:
+            logger.bind(extra="parse").debug(f'no logical operation found ... simple expression {expression}')
+        return None
+
+    def _simple_sql_query(self, select:list, using:str, expression: tuple[list|dict|str],
+                          limit:int=None, offset:int=None) -> dict:
         """return data of simple SQL queries
            This is a query that runs independently, so no additional data is required.
         """
+        where = self._simple_where(using, expression)
+        return self._sot.get.query(
+            select=select, 
+            using=using, 
+            where=where, 
+            mode='sql', 
+            transform=self._transform,
+            limit=self._limit if limit is None else limit,
+            offset=self._offset if offset is None else offset)
 
+    def _simple_where(self, using:str, expression: tuple[list|dict|str]) -> dict:
+        """return where clause (dict) of a simple expression"""
         if 'nb.ipaddresses' in using:
             default={'address': ''}
         elif 'nb.changes' in using:
@@ -448,14 +597,7 @@ class Selection(object):
             logger.bind(extra="simple_sql").trace('setting default value as expression')
             where = default
 
-        return self._sot.get.query(
-            select=select, 
-            using=using, 
-            where=where, 
-            mode='sql', 
-            transform=self._transform,
-            limit=self._limit,
-            offset=self._offset)
+        return where
 
     def _build_logical_tree(self, res: dict) -> AnyNode:
         """parse logical expression and build tree"""
@@ -518,11 +660,8 @@ class Selection(object):
             logger.bind(extra="condense").debug(f'condense run {run}')
 
     def _refresh_cf_types(self) -> None:
-        # refresh custom field types       
-        nb = self._sot.open_nautobot()
-        self._cf_types = {}
-        for t in nb.extras.custom_fields.all():
-            self._cf_types[t.display] = {'type': str(t.type)}
+        # get custom field types from the metadata registry
+        self._cf_types = self._sot.metadata.custom_fields()
 
     def _merge_equal_properties(self, root: AnyNode) -> bool:
         """merge query values
@@ -617,85 +756,101 @@ class Selection(object):
         """query each leaf and merge data (depending on or and and)"""
         if 'id' not in select:
             select += ['id']
+
+        # the leafs are independent of each other; query them concurrently
+        leafs = [node for node in PostOrderIter(logical_tree) if node.is_leaf]
+        max_workers = min(self._max_workers, len(leafs))
+        logger.bind(extra="query lt").debug(f'querying {len(leafs)} leafs using {max_workers} worker(s)')
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                responses = list(executor.map(lambda node: self._query_leaf(node, select, using), leafs))
+        else:
+            responses = [self._query_leaf(node, select, using) for node in leafs]
+        for node, response in zip(leafs, responses):
+            node.response = response
+        self._merge_logical_tree(logical_tree)
+
+    def _merge_logical_tree(self, logical_tree:AnyNode) -> None:
+        """merge the responses of the leafs (depending on or and and)"""
         # walk through tree; childrens first than the other nodes
         for node in PostOrderIter(logical_tree):
             logger.bind(extra="query lt").debug(f'id: {node.id} operator: {node.operator} leaf: {node.is_leaf}')
             if node.is_leaf:
-                logger.bind(extra="query lt").debug(f'node is leaf; type(node.values) = {type(node.values)}')
-                logger.bind(extra="query lt").trace(f'node.values={node.values}')
-                values = {}
-                for key,value in node.values.items():
-                    # executing SQL query needs a string and not a list as where clause
-                    # but boolean expressions returns a list
-                    logger.bind(extra="query lt").debug(f'key={key} value={value} type(value)={type(value)}')
-                    if isinstance(value, list) and len(value) == 1:
-                        values[key] = value[0]
-                    else:
-                        values[key] = value
-                node.response = self._sot.get.query(select=select,
-                                                    using=using,
-                                                    where=values,
-                                                    mode='sql',
-                                                    transform=self._transform)
-                logger.bind(extra="query lt").trace(f'node.response={node.response}')
+                continue
+            # have a look at the children and do the logical operation
+            lists = [c.response for c in node.children]
+            if node.operator == 'or':
+                logger.bind(extra="query lt").debug('node.operator is or')
+                node.response = self._get_items(lists)
+            elif node.operator == 'and':
+                logger.bind(extra="query lt").debug('node.operator is and')
+                node.response = self._get_items_with_equal_id(lists)
+
+    def _query_leaf(self, node:AnyNode, select:list, using:str) -> list:
+        """query the values of a single leaf"""
+        values = self._leaf_where(node)
+        # the query modifies select; each leaf gets its own copy
+        response = self._sot.get.query(select=list(select),
+                                       using=using,
+                                       where=values,
+                                       mode='sql',
+                                       transform=self._transform)
+        logger.bind(extra="query lt").trace(f'node.response={response}')
+        return response
+
+    def _leaf_where(self, node:AnyNode) -> dict:
+        """return where clause of a single leaf"""
+        logger.bind(extra="query lt").debug(f'node is leaf; type(node.values) = {type(node.values)}')
+        logger.bind(extra="query lt").trace(f'node.values={node.values}')
+        values = {}
+        for key,value in node.values.items():
+            # executing SQL query needs a string and not a list as where clause
+            # but boolean expressions returns a list
+            logger.bind(extra="query lt").debug(f'key={key} value={value} type(value)={type(value)}')
+            if isinstance(value, list) and len(value) == 1:
+                values[key] = value[0]
             else:
-                # have a look at the children and do the logical operation
-                if node.operator == 'or':
-                    logger.bind(extra="query lt").debug('node.operator is or')
-                    lists = []
-                    for c in node.children:
-                        lists.append(c.response)
-                    node.response = self._get_items(lists)
-                elif node.operator == 'and':
-                    logger.bind(extra="query lt").debug('node.operator is and')
-                    lists = []
-                    for c in node.children:
-                        lists.append(c.response)
-                    node.response = self._get_items_with_equal_id(lists)
+                values[key] = value
+        return values
 
     def _get_items_with_equal_id(self, all_items:list) -> list:
-        """returns a list of items with equal id"""
+        """returns a list of items whose id is part of all lists (logical and)"""
 
         # 1. case: we have only one sublist; return result
         if len(all_items) == 1:
             return all_items[0]
-        
-        result = []
-        logger.debug(f'merging {len(all_items)} lists to one')
+
+        logger.debug(f'intersecting {len(all_items)} lists')
         # 2. we have multiple lists
-        # get first list and check which item is in this list and all other lists
-        anchor = all_items[0]
-        # others is a list of lists
-        others = all_items[1:]
-        for ac in anchor:
-            id = ac.get('id', -1)
-            for o in others[0]:
-                if o.get('id') == id:
-                    result.append(o)
-        return result
-    
+        # build the set of ids that are part of all lists and keep the order of the first list
+        common_ids = set(item.get('id') for item in all_items[0])
+        for items in all_items[1:]:
+            common_ids.intersection_update(item.get('id') for item in items)
+            if not common_ids:
+                return []
+
+        result = {}
+        for item in all_items[0]:
+            id = item.get('id')
+            if id in common_ids and id not in result:
+                result[id] = item
+        return list(result.values())
+
     def _get_items(self, all_items:list) -> list:
-        """returns all values without duplicates"""
+        """returns all values without duplicates (logical or)"""
 
-         # 1. case: we have only one sublist; return result
+        # 1. case: we have only one sublist; return result
         if len(all_items) == 1:
             return all_items[0]
-        
-        result = all_items[0]
+
+        logger.debug(f'merging {len(all_items)} lists to one')
         # 2. we have multiple lists
-        # check if item is already in result and add it if not
-        others = all_items[1:]
-        for o in others:
-            for x in o:
-                id = x.get('id',-1)
-                # check if id is in result
-                if not any(d['id'] == id for d in result):
-                    logger.debug(f'add {id} to result')
-                    result.append(x)
-                else:
-                    logger.debug(f'{id} is duplicate')
-        
-        return result
+        # the first item with a given id wins; the order of the lists is kept
+        result = {}
+        for items in all_items:
+            for item in items:
+                result.setdefault(item.get('id', -1), item)
+        return list(result.values())
 
     def _join_results(self, left:dict, right:dict, join_on:str, left_select:str, right_select:str) -> list:
         """join left and right table"""
@@ -707,23 +862,9 @@ class Selection(object):
         logger.bind(extra="join result").debug(f'left_select: {left_select}')
         logger.bind(extra="join result").debug(f'right_select: {right_select}')
 
-        # print(json.dumps(left, indent=4))
-        # print()
-        # print(json.dumps(right, indent=4))
-        # print('-----')
-        result = []
-        for left_data in left:
-            l_values = benedict(left_data, keyattr_dynamic=True)
-            for right_data in right:
-                r_values = benedict(right_data, keyattr_dynamic=True)
-                try:
-                    left_value = l_values[left_id]
-                    right_value = r_values[right_id]
-                except KeyError:
-                    continue
-                if left_value == right_value:
-                    new_right = {self._right_identifier: r_values}
-                    l_values.update(new_right)
-                    result.append(dict(l_values))
-    
-        return result
+        # hash_join streams the joined rows; where returns (and may transform or cache) the complete result
+        return list(joiner.hash_join(left, right, 
+                                     left_on=left_id, 
+                                     right_on=right_id, 
+                                     right_identifier=self._right_identifier, 
+                                     how=self._join_type))
@@ -15,6 +15,9 @@ from veritas.sot import importer
 from veritas.sot import updater
 from veritas.sot import rest
 from veritas.sot import job
+from veritas.sot import metadata
+from veritas.sot import aio as async_sot
+from veritas.sot import transport
 
 
 class Sot:
@@ -31,6 +34,7 @@ class Sot:
         - importer
         - updater
         - job
+        - metadata
 
     Parameter
     ----------
@@ -42,6 +46,8 @@ class Sot:
         API Version of nautobot
     ssl_verify : bool 
         check TLS
+    transport_config : dict, optional
+        config of the HTTP transport (see transport.Transport.configure)
 
     Examples
     --------
@@ -53,7 +59,7 @@ class Sot:
     
     """
 
-    def __init__(self, url, token, ssl_verify=True, api_version='2.0', debug=False) -> None:
+    def __init__(self, url, token, ssl_verify=True, api_version='2.0', debug=False, transport_config=None) -> None:
         self._onboarding = None
         self._ipam = None
         self._getter = None
@@ -62,7 +68,12 @@ class Sot:
         self._nautobot = None
         self._updater = None
         self._job = None
+        self._metadata = None
         self._sot_config = {}
+        # the HTTP transport is shared by nautobot, rest and checkmk
+        self._transport = transport.Transport(**(transport_config or {}))
+        # cached query results are removed whenever data is modified in nautobot
+        self._transport.add_write_hook(self._on_write)
 
         if debug:
             logger.enable("veritas.sot")
@@ -128,6 +139,10 @@ class Sot:
             if self._job is None:
                 self._job = job.Job(self)
             return self._job
+        if item == "metadata":
+            if self._metadata is None:
+                self._metadata = metadata.Metadata(self)
+            return self._metadata
 
     @property
     def nautobot_token(self) -> str:
@@ -144,6 +159,11 @@ class Sot:
         """returns nautobot url"""
         return self._sot_config['nautobot_url']
 
+    @property
+    def transport(self) -> transport.Transport:
+        """returns HTTP transport"""
+        return self._transport
+
     @property
     def sot_config(self) -> dict:
         """returns sot config"""
@@ -172,6 +192,28 @@ class Sot:
         """
         return dvc.Device(self, device)
 
+    def devices(self, devices:list, chunk_size:int=500) -> dvc:
+        """initialize subpackage devices and returns it
+
+        Parameters
+        ----------
+        devices : list
+            list of device names
+        chunk_size : int, optional
+            number of devices per bulk request, by default 500
+
+        Returns
+        -------
+        devices
+            the corresponding devices
+
+        Examples
+        --------
+        sot.devices(['lab-01.local', 'lab-02.local']).add_tags(['ospf'])
+
+        """
+        return dvc.Devices(self, devices, chunk_size=chunk_size)
+
     def select(self, selected_values) -> selection:
         """returns initialized selection object to access nautobot
 
@@ -217,6 +259,26 @@ class Sot:
         """
         return rest.Rest(self, *unnamed, **named)
 
+    def aio(self, **named) -> async_sot:
+        """returns asyncio facade of the sot
+
+        Parameters
+        ----------
+        **named
+            named parameter that are passed to the async sot (eg. max_connections)
+
+        Returns
+        -------
+        AsyncSot
+            the async sot; use it as async context manager to close all connections
+
+        Examples
+        --------
+        >>> async with sot.aio(max_connections=200) as aio:
+        ...     device = await aio.device('lab.local')
+        """
+        return async_sot.AsyncSot(self, **named)
+
     def open_nautobot(self) -> api:
         """opens connection to nautobot
 
@@ -244,10 +306,51 @@ class Sot:
                                  token=self._sot_config['nautobot_token'], 
                                  api_version=api_version,
                                  verify=ssl_verify)
+            self._nautobot.http_session = self._transport.session(self._nautobot.http_session)
             self._nautobot.http_session.verify = ssl_verify
 
         return self._nautobot
 
+    def configure_transport(self, **config) -> None:
+        """configure HTTP transport
+
+        Parameters
+        ----------
+        **config
+            see transport.Transport.configure
+
+        Examples
+        --------
+        >>> sot.configure_transport(pool_maxsize=100, max_retries=5, timeout=60)
+        """
+        self._transport.configure(**config)
+        # update the session of nautobot if it was already opened
+        if self._nautobot is not None:
+            self._transport.session(self._nautobot.http_session)
+
+    def invalidate_cache(self, using:str=None) -> None:
+        """remove cached query results of this sot
+
+        This method is called after data was modified in nautobot. Each POST, PUT, PATCH
+        or DELETE request that is sent to nautobot using the transport (pynautobot or rest)
+        calls this method.
+
+        Parameters
+        ----------
+        using : str, optional
+            only remove results of this schema (eg. nb.devices), by default all
+
+        Examples
+        --------
+        >>> sot.invalidate_cache()
+        """
+        selection.Selection.query_cache.invalidate(url=self.nautobot_url, using=using)
+
+    def _on_write(self, response) -> None:
+        """write hook of the transport; invalidate cache if nautobot was modified"""
+        if self.nautobot_url and str(response.url).startswith(self.nautobot_url.rstrip('/')):
+            self.invalidate_cache()
+
     def enable_debug(self):
         """enabled logging of the veritas lib
 
@@ -0,0 +1,220 @@
+import time
+import threading
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from loguru import logger
+
+
+def is_write_request(method:str, url:str) -> bool:
+    """return True if the request may have modified data (GraphQL queries do not)"""
+    return method.upper() in ('POST', 'PUT', 'PATCH', 'DELETE') and \
+        not str(url).split('?')[0].rstrip('/').endswith('graphql')
+
+
+class TransportRetry(Retry):
+    """retry that retries POST requests on a separate list of status codes
+
+    A POST request (eg. a GraphQL query) is not idempotent. It is retried only if the
+    status code guarantees that the request was not processed (eg. 429 or 503).
+    """
+
+    def __init__(self, *args, post_status_forcelist:list=None, **kwargs):
+        self.post_status_forcelist = post_status_forcelist or []
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        kwargs.setdefault('post_status_forcelist', self.post_status_forcelist)
+        return super().new(**kwargs)
+
+    def is_retry(self, method:str, status_code:int, has_retry_after:bool=False) -> bool:
+        if method and method.upper() == 'POST' and status_code in self.post_status_forcelist:
+            return bool(self.total)
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that uses a default timeout if the request does not set one"""
+
+    def __init__(self, *args, timeout:float=None, **kwargs):
+        self._timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self._timeout
+        return super().send(request, **kwargs)
+
+
+class Transport(object):
+    """configurable HTTP transport shared by nautobot (pynautobot), rest and checkmk
+
+    The transport configures requests sessions: size of the connection pool (per host),
+    retries with backoff on 429/5xx, default timeout and gzip. The elapsed time of each
+    request is recorded per host. The write hooks are called after each request that
+    may have modified data (POST, PUT, PATCH or DELETE except GraphQL queries).
+
+    Parameters
+    ----------
+    **config
+        see configure
+
+    Examples
+    --------
+    >>> sot.transport.configure(pool_maxsize=100, max_retries=5, host_pool_maxsize={'nautobot.local': 200},
+    ...                         timeout=(5, 300))
+    >>> sot.transport.get_metrics()
+    """
+
+    default_config = {'pool_connections': 10,
+                      'pool_maxsize': 100,
+                      'pool_block': False,
+                      'host_pool_maxsize': {},
+                      'max_retries': 3,
+                      'backoff_factor': 0.5,
+                      'status_forcelist': [429, 500, 502, 503, 504],
+                      'retry_methods': ['HEAD', 'GET', 'PUT', 'DELETE', 'OPTIONS', 'TRACE'],
+                      'post_status_forcelist': [429, 503],
+                      'timeout': None,
+                      'gzip': True}
+
+    def __init__(self, **config):
+        self._config = dict(self.default_config)
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._write_hooks = []
+        self.configure(**config)
+
+    def configure(self, **config) -> None:
+        """configure transport
+
+        The configuration is used by all sessions created or updated afterwards.
+
+        Parameters
+        ----------
+        pool_connections : int, optional
+            number of hosts a session keeps a pool for, by default 10
+        pool_maxsize : int, optional
+            maximum number of connections per host, by default 100
+        pool_block : bool, optional
+            wait for a free connection if the pool is exhausted, by default False
+        host_pool_maxsize : dict, optional
+            maximum number of connections of a specific host eg. {'nautobot.local': 200}
+        max_retries : int, optional
+            number of retries, by default 3
+        backoff_factor : float, optional
+            backoff factor of the retries, by default 0.5
+        status_forcelist : list, optional
+            status codes to retry, by default [429, 500, 502, 503, 504]
+        retry_methods : list, optional
+            HTTP methods to retry, by default the idempotent methods
+        post_status_forcelist : list, optional
+            status codes to retry POST requests (eg. GraphQL queries); use only status codes
+            that guarantee the request was not processed, by default [429, 503]
+        timeout : float | tuple, optional
+            default timeout in seconds or (connect timeout, read timeout); by default no
+            timeout, so large (GraphQL) queries are not aborted
+        gzip : bool, optional
+            accept gzip encoded responses, by default True
+        """
+        for key, value in config.items():
+            if key not in self.default_config:
+                raise KeyError(f'unknown transport config {key}')
+            self._config[key] = value
+        logger.bind(extra="transport").debug(f'transport config {self._config}')
+
+    def session(self, session:requests.Session=None) -> requests.Session:
+        """return new session or configure existing session
+
+        Parameters
+        ----------
+        session : requests.Session, optional
+            the session to configure, by default a new session is created
+
+        Returns
+        -------
+        session : requests.Session
+            the configured session
+        """
+        if session is None:
+            session = requests.Session()
+        config = self._config
+
+        adapter = self._get_adapter(config['pool_maxsize'])
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        for host, maxsize in config['host_pool_maxsize'].items():
+            adapter = self._get_adapter(maxsize)
+            session.mount(f'https://{host}', adapter)
+            session.mount(f'http://{host}', adapter)
+
+        if config['gzip']:
+            session.headers['Accept-Encoding'] = 'gzip, deflate'
+        if self._record not in session.hooks['response']:
+            session.hooks['response'].append(self._record)
+        return session
+
+    def add_write_hook(self, hook) -> None:
+        """add hook that is called (with the response) after data may have been modified"""
+        if hook not in self._write_hooks:
+            self._write_hooks.append(hook)
+
+    def get_metrics(self) -> dict:
+        """return metrics per host
+
+        Returns
+        -------
+        metrics : dict
+            host: {'requests', 'errors', 'retries', 'total', 'max', 'average', 'last'}; times are in seconds
+            and last is the timestamp of the last request
+        """
+        with self._lock:
+            metrics = {}
+            for host, m in self._metrics.items():
+                metrics[host] = dict(m)
+                metrics[host]['average'] = m['total'] / m['requests'] if m['requests'] else 0
+            return metrics
+
+    def reset_metrics(self) -> None:
+        """reset metrics"""
+        with self._lock:
+            self._metrics = {}
+
+    # -----===== internals =====-----
+
+    def _get_adapter(self, maxsize:int) -> TimeoutHTTPAdapter:
+        """return adapter using the current config"""
+        config = self._config
+        retry = TransportRetry(total=config['max_retries'],
+                               backoff_factor=config['backoff_factor'],
+                               status_forcelist=config['status_forcelist'],
+                               allowed_methods=config['retry_methods'],
+                               post_status_forcelist=config['post_status_forcelist'],
+                               respect_retry_after_header=True,
+                               raise_on_status=False)
+        return TimeoutHTTPAdapter(pool_connections=config['pool_connections'],
+                                  pool_maxsize=maxsize,
+                                  pool_block=config['pool_block'],
+                                  max_retries=retry,
+                                  timeout=config['timeout'])
+
+    def _record(self, response, *args, **kwargs) -> None:
+        """response hook; record elapsed time of request"""
+        host = urlparse(response.url).netloc
+        elapsed = response.elapsed.total_seconds()
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        with self._lock:
+            m = self._metrics.setdefault(host, {'requests': 0, 'errors': 0, 'retries': 0, 
+                                                'total': 0.0, 'max': 0.0, 'last': 0.0})
+            m['requests'] += 1
+            if retries is not None:
+                m['retries'] += len(retries.history)
+            m['total'] += elapsed
+            m['max'] = max(m['max'], elapsed)
+            m['last'] = time.time()
+            if response.status_code >= 400:
+                m['errors'] += 1
+        if self._write_hooks and is_write_request(response.request.method, response.url):
+            for hook in self._write_hooks:
+                hook(response)
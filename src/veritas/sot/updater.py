@@ -18,6 +18,8 @@ class Updater(object):
                            'manufacturers': self._nautobot.dcim.manufacturers,
                            'platforms': self._nautobot.dcim.platforms,
                            'devices': self._nautobot.dcim.devices,
+                           'interfaces': self._nautobot.dcim.interfaces,
+                           'ip_addresses': self._nautobot.ipam.ip_addresses,
                            'device_roles': self._nautobot.dcim.device_roles,
                            'prefixes': self._nautobot.ipam.prefixes,
                            'location_types': self._nautobot.dcim.location_types,
@@ -64,6 +66,7 @@ class Updater(object):
             success = entity.update(values)
             if success:
                 logger.debug("entity updated in sot")
+                self._sot.invalidate_cache()
             else:
                 logger.debug("entity not updated in sot")
             return entity
@@ -73,6 +76,112 @@ class Updater(object):
 
         return entity
 
+    def bulk_update(self, endpoint:str, rows:list, key:str='name', chunk_size:int=500, 
+                    filter_size:int=100) -> dict:
+        """update many entities in sot using bulk requests
+
+        The ids of the entities are resolved using filter queries (filter_size keys per query).
+        The updates are sent as bulk PATCH requests (chunk_size rows per request). If a
+        bulk request fails, the rows of this chunk are updated one by one to find the failed rows.
+
+        Parameters
+        ----------
+        endpoint : str
+            name of the endpoint to use
+        rows : list
+            list of dicts; each dict contains the key and the values to update
+        key : str, optional
+            name of the field used to identify the entity, by default 'name'
+        chunk_size : int, optional
+            number of rows per bulk request, by default 500
+        filter_size : int, optional
+            number of keys per filter query, by default 100
+
+        Returns
+        -------
+        result : dict
+            True or False for each key
+
+        Raises
+        ------
+        ValueError
+            if a row has no key or a key is used by more than one row; nothing is updated
+
+        Examples
+        --------
+        >>> sot.updater.bulk_update('devices', 
+        ...                         [{'name': 'lab-01.local', 'serial': '1234'},
+        ...                          {'name': 'lab-02.local', 'serial': '5678'}])
+        {'lab-01.local': True, 'lab-02.local': True}
+        """
+        # each row must be identified by its own key
+        missing = [row for row in rows if key not in row]
+        if missing:
+            raise ValueError(f'{len(missing)} row(s) have no key {key}; first row: {missing[0]}')
+        counts = {}
+        for row in rows:
+            counts[row[key]] = counts.get(row[key], 0) + 1
+        duplicate_keys = [str(k) for k, count in counts.items() if count > 1]
+        if duplicate_keys:
+            raise ValueError(f'{key} is used by more than one row: {", ".join(duplicate_keys)}')
+
+        endpoint_func = self._endpoints.get(endpoint, None)
+        if endpoint_func is None:
+            logger.error(f'unknown endpoint {endpoint}')
+            return {row[key]: False for row in rows}
+
+        result = {}
+        values = {}
+        for row in rows:
+            result[row[key]] = False
+            values[row[key]] = {k: v for k, v in row.items() if k != key}
+
+        # resolve ids using as few filter queries as possible
+        ids = {}
+        duplicates = set()
+        keys = list(values)
+        for i in range(0, len(keys), filter_size):
+            try:
+                entities = endpoint_func.filter(**{key: keys[i:i + filter_size]})
+            except Exception as exc:
+                logger.error(f'could not get entities; got exception {exc}')
+                continue
+            for entity in entities:
+                entity_key = getattr(entity, key, None)
+                if entity_key in ids:
+                    duplicates.add(entity_key)
+                ids[entity_key] = entity.id
+
+        updates = []
+        for entity_key, data in values.items():
+            if entity_key in duplicates:
+                logger.error(f'{key}={entity_key} is not unique; entity not updated')
+            elif entity_key not in ids:
+                logger.debug(f'entity {key}={entity_key} not found in sot')
+            else:
+                updates.append((entity_key, dict(data, id=ids[entity_key])))
+        logger.debug(f'updating {len(updates)} of {len(rows)} entities using bulk requests')
+
+        for i in range(0, len(updates), chunk_size):
+            chunk = updates[i:i + chunk_size]
+            try:
+                endpoint_func.update([data for _, data in chunk])
+                for entity_key, _ in chunk:
+                    result[entity_key] = True
+            except Exception as exc:
+                logger.error(f'bulk update failed; got exception {exc}; updating rows one by one')
+                for entity_key, data in chunk:
+                    try:
+                        data = dict(data)
+                        endpoint_func.update(id=data.pop('id'), data=data)
+                        result[entity_key] = True
+                    except Exception as exc:
+                        logger.error(f'entity {key}={entity_key} not updated in sot; got exception {exc}')
+
+        if any(result.values()):
+            self._sot.invalidate_cache()
+        return result
+
     def update_by_id(self, *unnamed, **named):
         properties = tools.convert_arguments_to_properties(*unnamed, **named)
         id = properties.get('id')
@@ -6,6 +6,8 @@ import hashlib
 import smtplib
 import datetime
 import re
+import ipaddress
+import functools
 from loguru import logger
 from openpyxl import load_workbook
 
@@ -353,6 +355,76 @@ def get_prefix_path(prefixe:list, ip:str) -> list:
         parent = pyt.parent(parent)
     return prefix_path[::-1]
 
+class PrefixDefaults(object):
+    """index of prefix based default values
+
+    The index is built once. Each prefix holds the default values merged with the
+    values of all its parents (the values of the more specific prefix win). A lookup
+    returns the pre-merged values of the longest matching prefix. IPv4 and IPv6
+    prefixes are supported.
+
+    Parameters
+    ----------
+    defaults : dict
+        the default values of all prefixes (prefix: values)
+
+    Examples
+    --------
+    >>> index = PrefixDefaults({'0.0.0.0/0': {'location': 'default'},
+    ...                         '192.168.0.0/16': {'role': 'network'}})
+    >>> index.get('192.168.0.1')
+    {'location': 'default', 'role': 'network'}
+    """
+    def __init__(self, defaults:dict):
+        self.source = defaults
+        self._trees = {4: pytricia.PyTricia(32), 6: pytricia.PyTricia(128)}
+
+        # insert short prefixes first; the parent of a prefix is then already merged
+        networks = []
+        for prefix in defaults:
+            try:
+                networks.append((ipaddress.ip_network(prefix, strict=False), prefix))
+            except ValueError:
+                logger.error(f'invalid prefix {prefix} in default values')
+        networks.sort(key=lambda n: (n[0].version, n[0].prefixlen))
+
+        for network, prefix in networks:
+            tree = self._trees[network.version]
+            parent_path, parent_values = tree.get(str(network), ([], {}))
+            values = dict(parent_values)
+            values.update(defaults[prefix] or {})
+            tree.insert(str(network), (parent_path + [prefix], values))
+        logger.debug(f'built prefix index of {len(networks)} prefixes')
+
+    def lookup(self, ip:str) -> tuple[list, dict]:
+        """return prefix path and merged default values of ip
+
+        The returned values are shared by all lookups and must not be modified.
+
+        Parameters
+        ----------
+        ip : str
+            the IP address
+
+        Returns
+        -------
+        prefix_path, defaults : tuple
+            list of prefixes that include the IP address and the merged default values
+        """
+        tree = self._trees[6] if ':' in ip else self._trees[4]
+        try:
+            response = tree.get(ip)
+        except Exception:
+            response = None
+        if response is None:
+            logger.info('prefix not found; using 0.0.0.0/0')
+            response = self._trees[4].get('0.0.0.0/0', ([], {}))
+        return response
+
+    def get(self, ip:str) -> dict:
+        """return merged default values of ip (see lookup)"""
+        return self.lookup(ip)[1]
+
 def calculate_md5(row:list):
     """calculate MD5 value of all columns in a row
 
@@ -523,72 +595,134 @@ def find_in_line(self, key:str, lookup:str, value:str, line:str) -> bool:
     -------
     bool
         true if found, false otherwise
+
+    See Also
+    --------
+    get_line_matcher : get a compiled matcher to match many lines
     """
+    return get_line_matcher(key, lookup, value).match(line)
+
+class LineMatcher(object):
+    """compiled matcher of a single lookup (see find_in_line)
 
-    # logger.debug(f'key: {key} lookup: {lookup} value: {value} line: {line}')
-    if key == 'match':
+    The regular expression is compiled and the value is converted to lower case once. 
+    The matcher can then be used for any number of lines.
+
+    Parameters
+    ----------
+    key : str
+        what to do (currently only match is supported)
+    lookup : str
+        the lookup type (ie, ic, c, n, ...)
+    value : str
+        the value to look for
+
+    Examples
+    --------
+    >>> matcher = LineMatcher('match', 'ic', 'ip address')
+    >>> matcher.match(' IP Address 192.168.0.1 255.255.255.0')
+    True
+    """
+
+    # lookups that need the line in lower case
+    case_insensitive = ['ie', 'ic', 'isw', 'iew', 'nic', 'nisw', 'niew', 'nie']
+
+    def __init__(self, key:str, lookup:str, value:str):
+        self.key = key
+        self.lookup = lookup
+        self.value = value
+        self.ignore_case = lookup in self.case_insensitive
+        self._func = self._compile(key, lookup, value)
+
+    def match(self, line:str, lower_line:str=None) -> bool:
+        """return true if line matches
+
+        Parameters
+        ----------
+        line : str
+            the line to search in
+        lower_line : str, optional
+            the line in lower case if already known
+
+        Returns
+        -------
+        bool
+            true if found, false otherwise
+        """
+        if self.ignore_case:
+            return self._func(lower_line if lower_line is not None else line.lower())
+        return self._func(line)
+
+    def _compile(self, key:str, lookup:str, value:str):
+        """return function that checks a single line"""
+        if key != 'match':
+            return lambda line: False
+
+        lower = value.lower()
         if lookup == "ie":
             # case-insensitive exact match
-            if line.lower() == value.lower():
-                return True
+            return lambda line: line == lower
         elif lookup == "ic":
             # case-insensitive contains
-            if value.lower() in line.lower():
-                return True
+            return lambda line: lower in line
         elif lookup == "c":
-        # case-sensitive contains
-            if value in line:
-                return True
+            # case-sensitive contains
+            return lambda line: value in line
         elif lookup == "isw":
             # case-insensitive starts-with
-            if line.lower().startswith(value.lower()):
-                return True
+            return lambda line: line.startswith(lower)
         elif lookup == "iew":
             # case-insensitive ends-with
-            if line.lower().endswith(value.lower()):
-                return True
+            return lambda line: line.endswith(lower)
         elif lookup == "re":
             # case-sensitive regular expression match
-            # compile regular expression
             pattern = re.compile(value)
-            if pattern.search(line):
-                return True
+            return lambda line: pattern.search(line) is not None
         elif lookup == "nic":
             # negated case-insensitive contains
-            if value.lower() not in line.lower():
-                return True
+            return lambda line: lower not in line
         elif lookup == "nisw":
             # negated case-insensitive starts-with
-            if not line.lower().startswith(value.lower()):
-                return True
+            return lambda line: not line.startswith(lower)
         elif lookup == "niew":
             # negated case-insensitive ends-with
-            if not line.lower().endswith(value.lower()):
-                return True
+            return lambda line: not line.endswith(lower)
         elif lookup == "nie":
             # negated case-insensitive exact match
-            if line.lower() != value.lower():
-                return True
+            return lambda line: line != lower
         elif lookup == "nre":
             # negated case-sensitive regular expression match
-            # compile regular expression
             pattern = re.compile(value)
-            if not pattern.search(line):
-                return True
-        elif lookup == "ire":    
+            return lambda line: pattern.search(line) is None
+        elif lookup == "ire":
             # case-insensitive regular expression match
-            # compile regular expression
             pattern = re.compile(value, re.IGNORECASE)
-            if pattern.search(line):
-                return True
+            return lambda line: pattern.search(line) is not None
         elif lookup == "nire":
             # negated case-insensitive regular expression match
-            # compile regular expression
             pattern = re.compile(value, re.IGNORECASE)
-            if not pattern.search(line):
-                return True
+            return lambda line: pattern.search(line) is None
         else:
-            if line == value:
-                return True
+            return lambda line: line == value
+
+@functools.lru_cache(maxsize=1024)
+def get_line_matcher(key:str, lookup:str, value:str) -> LineMatcher:
+    """return (cached) compiled matcher
+
+    The matchers are shared by all devices, so each rule is compiled only once.
 
-    return False
+    Parameters
+    ----------
+    key : str
+        what to do (currently only match is supported)
+    lookup : str
+        the lookup type (ie, ic, c, n, ...)
+    value : str
+        the value to look for
+
+    Returns
+    -------
+    matcher : LineMatcher
+        the compiled matcher
+    """
+    return LineMatcher(key, lookup, value)
@@ -0,0 +1,46 @@
+"""benchmark of the hash join used by sot.select(...).join(...).on(...)
+
+The fixtures look like the results of nb.devices and nb.ipaddresses queries.
+
+    python tests/benchmarks/bench_join.py
+"""
+import time
+from loguru import logger
+
+# veritas
+from veritas.sot import join as joiner
+
+SIZES = [1000, 10000, 100000]
+
+
+def devices_fixture(size:int) -> list:
+    """return rows like sot.select('id, name, platform').using('nb.devices')"""
+    return [{'id': f'device-{i}', 
+             'name': f'lab-{i}.local',
+             'platform': {'name': 'ios'}} for i in range(size)]
+
+def ipaddresses_fixture(size:int, devices:int) -> list:
+    """return rows like sot.select('id, address, interfaces').using('nb.ipaddresses')"""
+    return [{'id': f'ip-{i}', 
+             'address': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}/32',
+             'interfaces': [{'name': 'Loopback0', 
+                             'device': {'id': f'device-{i % devices}'}}]} for i in range(size)]
+
+def main():
+    logger.disable("veritas.sot")
+    for size in SIZES:
+        devices = devices_fixture(size)
+        addresses = ipaddresses_fixture(size, size)
+        for how in joiner.JOIN_TYPES:
+            start = time.perf_counter()
+            rows = sum(1 for _ in joiner.hash_join(addresses, devices,
+                                                   left_on='interfaces[0].device.id',
+                                                   right_on='id',
+                                                   right_identifier='devices',
+                                                   how=how))
+            duration = time.perf_counter() - start
+            print(f'{size:>7} rows {how:>5} join: {rows:>7} joined rows in {duration:.3f}s')
+
+
+if __name__ == "__main__":
+    main()
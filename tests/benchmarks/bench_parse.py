@@ -0,0 +1,61 @@
+"""benchmark of the textfsm parsing using recorded outputs
+
+The outputs are read from an output store (see veritas.devicemanagement.output_store)
+so no device is contacted. The outputs are parsed in the current process and using
+the parse pool.
+
+    python tests/benchmarks/bench_parse.py outputs.db --platform cisco_ios
+"""
+import time
+import argparse
+from loguru import logger
+
+# veritas
+from veritas.devicemanagement import textfsm_registry
+from veritas.devicemanagement import output_store
+from veritas.devicemanagement import parse_pool
+
+
+def outputs_fixture(store:output_store.OutputStore, platform:str) -> dict:
+    """return latest outputs of all devices like parse_pool.parse_devices expects"""
+    outputs = {}
+    for device in store.devices():
+        commands = {command for command, timestamp in store.commands(device)}
+        outputs[device] = {'platform': platform,
+                           'outputs': {command: store.get(device, command) for command in commands}}
+    return outputs
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename', type=str, help='the output store')
+    parser.add_argument('--platform', type=str, default='cisco_ios')
+    parser.add_argument('--own-templates', action='store_true')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    logger.disable("veritas.devicemanagement")
+    outputs = outputs_fixture(output_store.OutputStore(args.filename), args.platform)
+    total = sum(len(values['outputs']) for values in outputs.values())
+    print(f'{len(outputs)} devices {total} outputs')
+
+    start = time.perf_counter()
+    errors = 0
+    for device, values in outputs.items():
+        for command, data in values['outputs'].items():
+            try:
+                textfsm_registry.parse(args.platform, command, data, own_templates=args.own_templates)
+            except Exception:
+                errors += 1
+    duration = time.perf_counter() - start
+    print(f'   inline: {total:>7} outputs in {duration:.3f}s ({errors} errors)')
+
+    with parse_pool.ParsePool(max_workers=args.workers) as pool:
+        start = time.perf_counter()
+        errors = sum(1 for result in pool.parse_devices(outputs, own_templates=args.own_templates)
+                     if result['error'])
+        duration = time.perf_counter() - start
+    print(f'     pool: {total:>7} outputs in {duration:.3f}s ({errors} devices with errors)')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""benchmark of building sql queries with and without the compiled query cache
+
+nautobot is replaced by a fake api that returns an empty result. So the benchmark
+measures the time veritas needs to build the query.
+
+    python tests/benchmarks/bench_queries.py
+"""
+import time
+import yaml
+from importlib import resources
+from loguru import logger
+
+# veritas
+from veritas.sot import queries
+
+ROUNDS = 2000
+
+
+class FakeResponse:
+    json = {'data': {'devices': [], 'ip_addresses': []}}
+
+class FakeGraphql:
+    def query(self, query, variables):
+        return FakeResponse()
+
+class FakeNautobot:
+    graphql = FakeGraphql()
+
+class FakeSot:
+    nautobot_url = 'http://127.0.0.1:8080'
+
+    def __init__(self):
+        with resources.open_text('veritas.sot.data.sot', 'config.yaml') as f:
+            self.sot_config = yaml.safe_load(f.read())
+
+    def open_nautobot(self):
+        return FakeNautobot()
+
+class FakeGetter:
+    def __init__(self):
+        self._sot = FakeSot()
+
+    def all_custom_fields_type(self):
+        return {'net': {'type': 'Text'}, 'select': {'type': 'Selection'}}
+
+def run(getter, compiled:bool) -> float:
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        if not compiled:
+            queries.clear_compiled_queries()
+        queries._execute_sql_query(getter,
+                                   select=['id', 'name', 'primary_ip4', 'platform'],
+                                   using='nb.devices',
+                                   where={'name': f'lab-{i}.local', 'cf_net': 'testnet'},
+                                   limit=100,
+                                   offset=i)
+    return ROUNDS / (time.perf_counter() - start)
+
+def main():
+    logger.disable("veritas.sot")
+    getter = FakeGetter()
+    print(f'without compiled query cache: {run(getter, compiled=False):>10.0f} queries/s')
+    print(f'with compiled query cache:    {run(getter, compiled=True):>10.0f} queries/s')
+
+
+if __name__ == "__main__":
+    main()
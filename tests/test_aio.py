@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from veritas.sot import aio
+from veritas.sot import queries
+
+
+class FakeSot:
+    nautobot_url = 'http://nautobot.local'
+    nautobot_token = 'token'
+    ssl_verify = False
+    sot_config = {}
+    get = None
+
+    def __init__(self):
+        self.invalidated = 0
+
+    def invalidate_cache(self):
+        self.invalidated += 1
+
+
+def async_sot(sot, handler):
+    """return async sot whose requests are answered by handler"""
+    async_sot = aio.AsyncSot(sot)
+    async_sot._client = httpx.AsyncClient(base_url='http://nautobot.local/api/',
+                                          transport=httpx.MockTransport(handler))
+    async_sot._semaphore = asyncio.Semaphore(10)
+    return async_sot
+
+
+def test_query_is_prepared_outside_the_event_loop(monkeypatch):
+    threads = []
+    def prepare(getter, select, using, where, transform, limit, offset):
+        # the metadata registry sends blocking requests
+        threads.append(threading.current_thread())
+        return 'query', {}
+    monkeypatch.setattr(queries, '_prepare_sql_query', prepare)
+    monkeypatch.setattr(queries, '_get_sql_data', lambda response, using, select, transform: response['data'])
+
+    def handler(request):
+        return httpx.Response(200, json={'data': [{'name': 'lab.local'}]})
+
+    async def main():
+        async with async_sot(FakeSot(), handler) as sot:
+            return await sot.query(['name'], 'nb.devices', {'name': 'lab.local'})
+
+    assert asyncio.run(main()) == [{'name': 'lab.local'}]
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_write_requests_invalidate_the_cache():
+    def handler(request):
+        return httpx.Response(200, json={'results': [], 'next': None})
+
+    sot = FakeSot()
+    async def main():
+        async with async_sot(sot, handler) as aio_sot:
+            await aio_sot.get('devices', name='lab.local')
+            await aio_sot.graphql('query {}')
+            assert sot.invalidated == 0
+            await aio_sot.request('PATCH', 'dcim/devices/', json=[])
+
+    asyncio.run(main())
+    assert sot.invalidated == 1
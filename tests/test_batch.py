@@ -0,0 +1,32 @@
+import json
+from veritas.configparser import batch
+
+
+CONFIG = """hostname {hostname}
+!
+interface Loopback0
+ ip address 192.168.0.1 255.255.255.255
+!
+"""
+
+
+def test_parse_directory(tmp_path):
+    for hostname in ['lab-1', 'lab-2']:
+        (tmp_path / f'{hostname}.conf').write_text(CONFIG.format(hostname=hostname))
+    (tmp_path / 'lab-1.facts').write_text(json.dumps({'vendor': 'cisco'}))
+    # a directory cannot be read; the error is reported and the other configs are parsed
+    (tmp_path / 'lab-3.conf').mkdir()
+
+    results = list(batch.parse_directory(str(tmp_path), max_workers=2, chunksize=1, with_facts=True))
+    assert [r['hostname'] for r in results] == ['lab-1', 'lab-2', 'lab-3']
+    assert all(r['platform'] == 'ios' for r in results)
+    assert results[0]['facts'] == {'vendor': 'cisco'}
+    assert results[1]['facts'] is None
+    assert results[1]['error'] is None
+    assert results[1]['config']['global']['fqdn']['hostname'] == 'lab-2'
+    assert results[2]['error'] and results[2]['config'] is None
+
+    written = batch.write_results(results, str(tmp_path / 'results.jsonl'))
+    lines = (tmp_path / 'results.jsonl').read_text().splitlines()
+    assert written == len(lines) == 3
+    assert json.loads(lines[0]) == results[0]
@@ -0,0 +1,56 @@
+from veritas.sot import cache
+from veritas.sot import selection
+
+
+class FakeSot:
+    nautobot_url = 'http://nautobot.local'
+
+
+def test_mutating_a_hit_does_not_change_the_cache():
+    query_cache = cache.QueryCache()
+    key = query_cache.make_key('http://nautobot.local', 'nb.devices', 'name=lab.local')
+    query_cache.put(key, 'nb.devices', [{'name': 'lab.local'}])
+
+    result = query_cache.get(key)
+    result[0]['name'] = 'MUTATED'
+    result.append({'name': 'added'})
+    assert query_cache.get(key) == [{'name': 'lab.local'}]
+    assert query_cache.hits == 2
+
+
+def test_expired_and_uncached_schemas():
+    query_cache = cache.QueryCache(ttl=0, schema_ttl={'nb.devices': 60})
+    devices = query_cache.make_key('http://nautobot.local', 'nb.devices')
+    changes = query_cache.make_key('http://nautobot.local', 'nb.changes')
+    query_cache.put(devices, 'nb.devices', [1])
+    query_cache.put(changes, 'nb.changes', [2])
+    assert query_cache.get(devices) == [1]
+    assert query_cache.get(changes) is None
+    query_cache.invalidate(url='http://nautobot.local', using='nb.devices')
+    assert query_cache.get(devices) is None
+
+
+def where_counter(select):
+    """return selection whose queries are counted instead of sent to nautobot"""
+    calls = []
+    def _where(properties):
+        calls.append(properties)
+        return [{'hostname': 'lab.local'}]
+    select._where = _where
+    return select, calls
+
+
+def test_cache_is_opt_in():
+    selection.Selection.query_cache.clear()
+    select, calls = where_counter(selection.Selection(FakeSot(), 'hostname').using('nb.devices'))
+    select.where('name=lab.local')
+    select.where('name=lab.local')
+    assert len(calls) == 2
+
+    select, calls = where_counter(selection.Selection(FakeSot(), 'hostname').using('nb.devices').set(cache=True))
+    first = select.where('name=lab.local')
+    first[0]['hostname'] = 'MUTATED'
+    first.append({'hostname': 'added'})
+    assert select.where('name=lab.local') == [{'hostname': 'lab.local'}]
+    assert len(calls) == 1
+    selection.Selection.query_cache.clear()
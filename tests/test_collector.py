@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from veritas.devicemanagement import collector
+
+
+class FakeDevice:
+    """device that is down or broken (the command fails) depending on its ip"""
+    devices = []
+
+    def __init__(self, ip, **named):
+        self.ip = ip
+        self.opened = 0
+        self.is_open = False
+        FakeDevice.devices.append(self)
+
+    def has_open_connection(self):
+        return self.is_open
+
+    def open(self):
+        self.opened += 1
+        self.is_open = self.ip != 'down'
+        return self.is_open
+
+    def close(self):
+        self.is_open = False
+
+    def send_and_parse_command(self, commands, own_templates, parse_pool):
+        if self.ip == 'broken':
+            raise ValueError('connection lost')
+        return {command: f'{command} of {self.ip}' for command in commands}
+
+
+def test_collect():
+    FakeDevice.devices = []
+    with collector.Collector('admin', 'secret', max_workers=2) as c:
+        c._driver = SimpleNamespace(Devicemanagement=FakeDevice)
+        results = {r['device']: r for r in c.collect(['lab-1', 'down', 'broken', {'ip': 'lab-2'}], ['show clock'])}
+        assert results['lab-1']['result'] == {'show clock': 'show clock of lab-1'}
+        assert results['lab-2']['error'] is None
+        assert results['down']['error'] == 'could not connect to device'
+        assert results['broken']['error'] == 'connection lost'
+
+        # the connections of the failed devices were closed; the others are reused
+        assert sorted(c._connections) == ['lab-1', 'lab-2']
+        assert c.send('lab-1', ['show version'])['result'] == {'show version': 'show version of lab-1'}
+        assert len(FakeDevice.devices) == 4
+        assert all(device.opened == 1 for device in FakeDevice.devices)
+        assert not any(device.is_open for device in FakeDevice.devices if device.ip in ['down', 'broken'])
+    assert not any(device.is_open for device in FakeDevice.devices)
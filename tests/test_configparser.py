@@ -0,0 +1,80 @@
+from veritas.configparser import cisco_configparser
+
+# the lookups used by the reference implementation
+LOOKUPS = {'ic': lambda value, line: value.lower() in line.lower(),
+           'c': lambda value, line: value in line,
+           'isw': lambda value, line: line.lower().startswith(value.lower())}
+
+# NX-OS repeats the interface stanza (eg. the description is configured separately)
+CONFIG = """hostname lab.local
+!
+interface GigabitEthernet0/1
+ switchport mode access
+!
+interface GigabitEthernet0/2
+ no shutdown
+!
+ip domain-name local
+!
+interface GigabitEthernet0/2
+ description uplink
+ ip address 10.0.0.1 255.255.255.0
+!
+interface Loopback0
+ ip address 192.168.0.1 255.255.255.255
+!
+line vty 0 4
+"""
+
+
+def reference_interfaces_section(config:str) -> list:
+    """the interface section computed line by line like the original configparser"""
+    response = []
+    found = False
+    for line in config.splitlines():
+        if line.lower().startswith('interface '):
+            found = True
+            response.append(line)
+            continue
+        if found and line.startswith(' '):
+            response.append(line)
+        else:
+            found = False
+    return response
+
+def reference_find_in_interfaces(config:str, key:str, value:str) -> list:
+    """the interfaces that match computed line by line like the original configparser"""
+    lookup = key.split('__')[1]
+    matched_on = []
+    interface = None
+    for line in reference_interfaces_section(config):
+        if line.lower().startswith('interface '):
+            interface = line[10:]
+        if LOOKUPS[lookup](value, line):
+            matched_on.append(interface)
+    return matched_on
+
+def test_repeated_interface_stanzas():
+    parser = cisco_configparser.Configparser(config=CONFIG, platform='ios')
+    assert parser.get_section('interfaces') == reference_interfaces_section(CONFIG)
+    for key, value in [('match__ic', 'description'),
+                       ('match__ic', 'ip address'),
+                       ('match__c', 'no shutdown'),
+                       ('match__isw', 'interface')]:
+        expected = reference_find_in_interfaces(CONFIG, key, value)
+        assert parser.find_in_interfaces({key: value}) == expected
+        assert parser.find_all_in_interfaces([{key: value}]) == [expected]
+    assert parser.find_in_interfaces({'match__ic': 'description'}) == ['GigabitEthernet0/2']
+    assert parser.get_interface_config('GigabitEthernet0/2') == [
+        'interface GigabitEthernet0/2', ' no shutdown',
+        'interface GigabitEthernet0/2', ' description uplink', ' ip address 10.0.0.1 255.255.255.0']
+
+def test_find_all_in_one_pass():
+    parser = cisco_configparser.Configparser(config=CONFIG, platform='ios')
+    rules = [{'match__isw': 'ip domain'},
+             {'match__isw': 'switchport', 'ignore_leading_spaces': True},
+             {'match__isw': 'switchport'},
+             {'match__ire': r'ip address 10\.'}]
+    # like the original parser the global config contains all lines except the interface lines
+    assert parser.find_all_in_global(rules) == [True, True, False, True]
+    assert parser.find_all_in_interfaces(rules) == [[], ['GigabitEthernet0/1'], [], ['GigabitEthernet0/2']]
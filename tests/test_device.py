@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+from veritas.sot import device as dvc
+
+TAGS = {'ospf': {'id': 't1', 'name': 'ospf'},
+        'bgp': {'id': 't2', 'name': 'bgp'},
+        'mgmt': {'id': 't3', 'name': 'mgmt'}}
+
+
+def tag(name):
+    return SimpleNamespace(id=TAGS[name]['id'], name=name)
+
+
+class FakeInterface(SimpleNamespace):
+    def update(self, properties):
+        self.updated = properties
+        return True
+
+
+class FakeEndpoint:
+    """endpoint of pynautobot that records filter and (bulk) update requests"""
+    def __init__(self, items):
+        self.items = items
+        self.filters = []
+        self.updates = []
+
+    def get(self, **filter):
+        for item in self.items:
+            if item.name == filter.get('name') and item.device.name in filter.get('device'):
+                return item
+        return None
+
+    def filter(self, **filter):
+        self.filters.append(filter)
+        if 'device' in filter:
+            return [item for item in self.items
+                    if item.device.name in filter['device'] and item.name == filter['name']]
+        return [item for item in self.items if item.name in filter['name']]
+
+    def update(self, chunk):
+        self.updates.append(chunk)
+        return chunk
+
+
+class FakeSot:
+    def __init__(self, devices=(), interfaces=()):
+        self.nautobot = SimpleNamespace(dcim=SimpleNamespace(devices=FakeEndpoint(list(devices)),
+                                                             interfaces=FakeEndpoint(list(interfaces))))
+        self.metadata = SimpleNamespace(tags=lambda: TAGS, refresh=lambda kind=None: None)
+        self.invalidated = 0
+
+    def open_nautobot(self):
+        return self.nautobot
+
+    def invalidate_cache(self):
+        self.invalidated += 1
+
+
+def test_set_interface_tags():
+    interface = FakeInterface(name='Loopback0', device=SimpleNamespace(name='lab.local'), tags=[tag('mgmt')])
+    sot = FakeSot(interfaces=[interface])
+    dvc.Device(sot, 'lab.local').interface('Loopback0').add_tags(['ospf'])
+    assert interface.updated == {'tags': ['ospf', 'mgmt']}
+    # set_tag replaces the tags of the interface
+    dvc.Device(sot, 'lab.local').interface('Loopback0').add_tags(['ospf'], set_tag=True)
+    assert interface.updated == {'tags': ['ospf']}
+
+
+def test_bulk_add_tags_in_batches(monkeypatch):
+    monkeypatch.setattr(dvc.Devices, 'filter_size', 2)
+    devices = [SimpleNamespace(id=f'd{i}', name=f'lab-{i}.local', tags=[tag('mgmt')]) for i in range(5)]
+    sot = FakeSot(devices=devices)
+    endpoint = sot.nautobot.dcim.devices
+
+    assert dvc.Devices(sot, [device.name for device in devices], chunk_size=3).add_tags(['ospf'])
+    assert [len(filter['name']) for filter in endpoint.filters] == [2, 2, 1]
+    assert [len(chunk) for chunk in endpoint.updates] == [3, 2]
+    assert endpoint.updates[0][0] == {'id': 'd0', 'tags': ['t1', 't3']}
+    assert sot.invalidated == 1
+
+
+def test_bulk_tags_of_unknown_devices():
+    devices = [SimpleNamespace(id='d1', name='lab-1.local', tags=[tag('ospf'), tag('mgmt')])]
+    sot = FakeSot(devices=devices)
+    endpoint = sot.nautobot.dcim.devices
+
+    # the found devices are updated but the result is false
+    assert not dvc.Devices(sot, ['lab-1.local', 'unknown.local']).delete_tags(['ospf'])
+    assert endpoint.updates == [[{'id': 'd1', 'tags': ['t3']}]]
+
+
+def test_bulk_interface_tags():
+    interfaces = [FakeInterface(id=f'i{i}', name='Loopback0', device=SimpleNamespace(name=f'lab-{i}.local'),
+                                tags=[]) for i in range(2)]
+    sot = FakeSot(interfaces=interfaces)
+    endpoint = sot.nautobot.dcim.interfaces
+
+    assert dvc.Devices(sot, ['lab-0.local', 'lab-1.local']).interface('Loopback0').set_tags(['bgp'])
+    assert endpoint.filters == [{'device': ['lab-0.local', 'lab-1.local'], 'name': 'Loopback0'}]
+    assert endpoint.updates == [[{'id': 'i0', 'tags': ['t2']}, {'id': 'i1', 'tags': ['t2']}]]
+    assert not dvc.Devices(sot, ['lab-0.local', 'lab-2.local']).interface('Loopback0').set_tags(['bgp'])
@@ -0,0 +1,113 @@
+from veritas.inventory import veritasinventory
+
+
+class FakeSelection:
+    def __init__(self, sot):
+        self._sot = sot
+
+    def using(self, schema):
+        return self
+
+    def set(self, **kwargs):
+        return self
+
+    def where(self, *unnamed, **named):
+        # the latest change of nautobot (nb.changes)
+        return [{'time': self._sot.watermark}]
+
+    def iter_where(self, where, page_size):
+        self._sot.queries += 1
+        for i in range(3):
+            yield {'hostname': f'lab-{i}.local',
+                   'primary_ip4': {'address': f'10.0.0.{i}/32'},
+                   'platform': {'name': 'ios', 'manufacturer': {'name': 'cisco'}},
+                   'location': 'site 1'}
+
+
+class FakeSot:
+    nautobot_url = 'http://nautobot.local'
+
+    def __init__(self):
+        self.queries = 0
+        self.watermark = '2026-01-01T00:00:00Z'
+
+    def select(self, *unnamed):
+        return FakeSelection(self)
+
+
+def inventory(sot, **named):
+    args = {'sot': sot,
+            'where': 'name=lab',
+            'username': 'admin',
+            'password': 'secret',
+            'host_groups': ['location'],
+            'groups': {'site1': {'data': {'site': 'one'}}}}
+    args.update(named)
+    return veritasinventory.VeritasInventory(**args).load()
+
+
+def test_cache_contains_no_credentials(tmp_path):
+    cache_file = str(tmp_path / 'inventory.cache')
+    sot = FakeSot()
+    hosts = inventory(sot, cache_file=cache_file).hosts
+    assert sorted(hosts) == ['lab-0.local', 'lab-1.local', 'lab-2.local']
+    assert b'secret' not in open(cache_file, 'rb').read()
+
+    # the cache is used after the password was changed; the hosts get the new password
+    hosts = inventory(sot, cache_file=cache_file, password='rotated').hosts
+    assert sot.queries == 1
+    assert hosts['lab-1.local'].password == 'rotated'
+    assert hosts['lab-1.local'].hostname == '10.0.0.1'
+    assert hosts['lab-1.local']['site'] == 'one'
+
+
+def test_cache_is_not_used_if_data_changed(tmp_path):
+    cache_file = str(tmp_path / 'inventory.cache')
+    sot = FakeSot()
+    inventory(sot, cache_file=cache_file)
+    hosts = inventory(sot, cache_file=cache_file, data={'env': 'lab'}).hosts
+    assert sot.queries == 2
+    assert hosts['lab-0.local'].data['env'] == 'lab'
+
+
+def test_snapshot(tmp_path):
+    snapshot_file = str(tmp_path / 'inventory.db')
+    sot = FakeSot()
+    groups = {'site1': {'data': {'site': 'one'}, 'password': 'group secret'}}
+    inventory(sot, snapshot_file=snapshot_file, groups=groups)
+    assert b'secret' not in open(snapshot_file, 'rb').read()
+
+    # nautobot was not changed; the snapshot is used
+    hosts = inventory(sot, snapshot_file=snapshot_file, groups=groups).hosts
+    assert sot.queries == 1
+    assert sorted(hosts) == ['lab-0.local', 'lab-1.local', 'lab-2.local']
+    assert hosts['lab-2.local'].hostname == '10.0.0.2'
+
+    # the credentials are not part of the snapshot
+    inventory(sot, snapshot_file=snapshot_file)
+    assert sot.queries == 1
+
+    # the snapshot is written again if nautobot or the groups were changed
+    sot.watermark = '2026-01-02T00:00:00Z'
+    inventory(sot, snapshot_file=snapshot_file, groups=groups)
+    inventory(sot, snapshot_file=snapshot_file, groups={'site1': {'data': {'site': 'uno'}}})
+    assert sot.queries == 3
+    inventory(sot, snapshot_file=snapshot_file, groups={'site1': {'data': {'site': 'uno'}}})
+    assert sot.queries == 3
+
+
+def test_snapshot_cannot_be_written(tmp_path):
+    snapshot_file = str(tmp_path / 'missing' / 'inventory.db')
+    hosts = inventory(FakeSot(), snapshot_file=snapshot_file).hosts
+    assert len(hosts) == 3
+
+
+def test_incomplete_snapshot_is_discarded(tmp_path):
+    snapshot_file = str(tmp_path / 'inventory.db')
+    sot = FakeSot()
+    inv = veritasinventory.VeritasInventory(sot=sot, where='name=lab', snapshot_file=snapshot_file)
+    devices = inv._write_snapshot(FakeSelection(sot).iter_where('name=lab', page_size=10), sot.watermark)
+    assert next(devices)['hostname'] == 'lab-0.local'
+    devices.close()
+    assert list(tmp_path.iterdir()) == []
+    assert inv._read_snapshot(sot.watermark) is None
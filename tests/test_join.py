@@ -0,0 +1,59 @@
+import pytest
+from veritas.sot import join as joiner
+
+DEVICES = [{'id': 'd1', 'name': 'lab-1.local'},
+           {'id': 'd2', 'name': 'lab-2.local'},
+           {'id': 'd3', 'name': 'lab-3.local'}]
+
+ADDRESSES = [{'address': '10.0.0.1/32', 'interfaces': [{'device': {'id': 'd2'}}]},
+             {'address': '10.0.0.2/32', 'interfaces': [{'device': {'id': 'd1'}}]},
+             {'address': '10.0.0.3/32', 'interfaces': [{'device': {'id': 'd9'}}]},
+             {'address': '10.0.0.4/32', 'interfaces': []}]
+
+
+def join(left, right, how):
+    return list(joiner.hash_join(left, right, left_on='interfaces[0].device.id', right_on='id',
+                                 right_identifier='devices', how=how))
+
+def summary(rows):
+    """return (address, device name) of the joined rows"""
+    return [(row.get('address'), row['devices']['name'] if row['devices'] else None) for row in rows]
+
+
+def test_inner_join_keeps_left_order():
+    assert summary(join(ADDRESSES, DEVICES, 'inner')) == [('10.0.0.1/32', 'lab-2.local'),
+                                                          ('10.0.0.2/32', 'lab-1.local')]
+    # the order does not depend on the size of the tables
+    assert summary(join(ADDRESSES[:2], DEVICES, 'inner')) == [('10.0.0.1/32', 'lab-2.local'),
+                                                              ('10.0.0.2/32', 'lab-1.local')]
+
+def test_left_join_contains_rows_without_key():
+    assert summary(join(ADDRESSES, DEVICES, 'left')) == [('10.0.0.1/32', 'lab-2.local'),
+                                                         ('10.0.0.2/32', 'lab-1.local'),
+                                                         ('10.0.0.3/32', None),
+                                                         ('10.0.0.4/32', None)]
+
+def test_right_join():
+    assert summary(join(ADDRESSES, DEVICES, 'right')) == [('10.0.0.1/32', 'lab-2.local'),
+                                                          ('10.0.0.2/32', 'lab-1.local'),
+                                                          (None, 'lab-3.local')]
+
+def test_outer_join():
+    assert summary(join(ADDRESSES, DEVICES, 'outer')) == [('10.0.0.1/32', 'lab-2.local'),
+                                                          ('10.0.0.2/32', 'lab-1.local'),
+                                                          ('10.0.0.3/32', None),
+                                                          ('10.0.0.4/32', None),
+                                                          (None, 'lab-3.local')]
+
+def test_duplicate_keys():
+    devices = DEVICES + [{'id': 'd1', 'name': 'lab-1b.local'}]
+    addresses = ADDRESSES[:2] + [{'address': '10.0.0.5/32', 'interfaces': [{'device': {'id': 'd1'}}]}]
+    assert summary(join(addresses, devices, 'inner')) == [('10.0.0.1/32', 'lab-2.local'),
+                                                          ('10.0.0.2/32', 'lab-1.local'),
+                                                          ('10.0.0.2/32', 'lab-1b.local'),
+                                                          ('10.0.0.5/32', 'lab-1.local'),
+                                                          ('10.0.0.5/32', 'lab-1b.local')]
+
+def test_unknown_join_type():
+    with pytest.raises(ValueError):
+        join(ADDRESSES, DEVICES, 'cross')
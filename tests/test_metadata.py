@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from veritas.sot import metadata
+
+
+class FakeEndpoint:
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = 0
+
+    def all(self):
+        self.requests += 1
+        return self.rows
+
+
+class FakeSot:
+    def __init__(self):
+        self.custom_fields = FakeEndpoint([SimpleNamespace(display='net', type='Text')])
+        self.tags = FakeEndpoint([SimpleNamespace(id=1, name='ospf')])
+        self.nautobot = SimpleNamespace(extras=SimpleNamespace(custom_fields=self.custom_fields,
+                                                               tags=self.tags,
+                                                               roles=FakeEndpoint([])),
+                                        dcim=SimpleNamespace(platforms=FakeEndpoint([]),
+                                                             device_types=FakeEndpoint([]),
+                                                             locations=FakeEndpoint([])))
+
+    def open_nautobot(self):
+        return self.nautobot
+
+
+def test_metadata_is_loaded_once():
+    sot = FakeSot()
+    registry = metadata.Metadata(sot)
+    assert registry.custom_fields() == {'net': {'type': 'Text'}}
+    assert registry.custom_fields() == {'net': {'type': 'Text'}}
+    assert sot.custom_fields.requests == 1
+    # each kind is loaded when it is needed
+    assert sot.tags.requests == 0
+    assert registry.tags() == {'ospf': {'id': 1, 'name': 'ospf'}}
+
+    registry.refresh('custom_fields')
+    assert sot.custom_fields.requests == 2
+    assert sot.tags.requests == 1
+
+    # expired metadata is reloaded
+    registry.set_ttl(-1)
+    registry.tags()
+    assert sot.tags.requests == 2
+
+
+def test_snapshot(tmp_path):
+    filename = str(tmp_path / 'metadata.json')
+    metadata.Metadata(FakeSot()).save(filename)
+
+    # nautobot is not asked until refresh is called even if the metadata has expired
+    sot = FakeSot()
+    registry = metadata.Metadata(sot, ttl=-1)
+    registry.load(filename)
+    assert registry.tags() == {'ospf': {'id': 1, 'name': 'ospf'}}
+    assert sot.tags.requests == 0
+    registry.refresh('tags')
+    assert sot.tags.requests == 1
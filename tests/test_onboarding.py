@@ -0,0 +1,79 @@
+from veritas.onboarding import onboarding
+from veritas.sot import onboarding as sot_onboarding
+
+
+class FakeSotOnboarding:
+    """fluent sot onboarding that adds the device without nautobot"""
+    def __init__(self, sot):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *unnamed, **named: self
+
+    def add_device(self, properties):
+        return properties['name']
+
+
+class PipelineOnboarding(onboarding.Onboarding):
+    """onboarding without devices; lab-1 is already in the sot and lab-2 has no primary interface"""
+    def __init__(self):
+        super().__init__(sot=None, onboarding_config={}, profile=None)
+        self._all_defaults = {'0.0.0.0/0': {}}
+        self._prefix_defaults = type('PrefixDefaults', (), {'source': self._all_defaults})()
+        self.fetched = []
+
+    def get_ip_from_host(self, host):
+        return host
+
+    def device_in_sot(self, ip, hostname):
+        return hostname == 'lab-1'
+
+    def get_device_defaults(self, ip, inventory):
+        return {}
+
+    def get_device_config_and_facts(self, ip, defaults, import_config=False, import_filename=None):
+        self.fetched.append(ip)
+        return f'hostname {ip}', {}
+
+    def parse_config(self, config, facts, defaults):
+        self._device_config = config
+
+    def get_device_properties(self):
+        return {'name': self._device_config.split()[1]}
+
+    def get_primary_address(self):
+        return None
+
+    def get_primary_interface(self, primary_address, device_properties=None):
+        return None if device_properties['name'] == 'lab-2' else {'name': 'Loopback0'}
+
+    def get_interface_properties(self):
+        return []
+
+    def get_vlan_properties(self, device_properties):
+        return []
+
+
+def test_pipeline(monkeypatch):
+    monkeypatch.setattr(sot_onboarding, 'Onboarding', FakeSotOnboarding)
+    pipeline = PipelineOnboarding()
+    inventory = [{'host': f'lab-{i}'} for i in range(4)]
+    results = {result['host']: result for result in pipeline.pipeline(inventory, fetch_workers=2)}
+
+    assert len(results) == 4
+    # devices that are already in the sot are not fetched
+    assert sorted(pipeline.fetched) == ['lab-0', 'lab-2', 'lab-3']
+    assert results['lab-1']['stage'] == 'fetch'
+    assert results['lab-1']['error'] == 'device lab-1 is already in sot'
+    assert results['lab-2']['stage'] == 'parse'
+    assert results['lab-2']['error'] == 'no primary interface'
+    assert results['lab-3']['success'] and results['lab-3']['device'] == 'lab-3'
+
+
+def test_pipeline_stopped_early(monkeypatch):
+    monkeypatch.setattr(sot_onboarding, 'Onboarding', FakeSotOnboarding)
+    inventory = [{'host': f'lab-{i}'} for i in range(10, 30)]
+    results = PipelineOnboarding().pipeline(inventory, fetch_workers=1, parse_workers=1, write_workers=1)
+    first = next(results)
+    results.close()
+    assert first['host'].startswith('lab-')
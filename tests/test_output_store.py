@@ -0,0 +1,33 @@
+import pytest
+from veritas.devicemanagement import output_store
+
+
+def test_latest_output_at_timestamp(tmp_path):
+    store = output_store.OutputStore(str(tmp_path / 'outputs.db'))
+    store.put('192.168.0.1', 'show version', 'version 1', timestamp=100)
+    store.put('192.168.0.1', 'show version', 'version 2', timestamp=200)
+    store.put('192.168.0.2', 'show clock', 'clock', timestamp=150)
+
+    assert store.get('192.168.0.1', 'show version') == 'version 2'
+    assert store.get('192.168.0.1', 'show clock') is None
+    assert store.devices() == ['192.168.0.1', '192.168.0.2']
+    assert len(store) == 3
+
+    replay = output_store.OutputStore(str(tmp_path / 'outputs.db'), timestamp=150)
+    assert replay.get('192.168.0.1', 'show version') == 'version 1'
+
+    store.clear(before=150)
+    assert store.commands('192.168.0.1') == [('show version', 200)]
+
+
+def test_napalm_replay(tmp_path):
+    napalm = pytest.importorskip('veritas.devicemanagement.napalm')
+    store = output_store.OutputStore(str(tmp_path / 'outputs.db'))
+    store.put('192.168.0.1', 'show version', 'Cisco IOS Software')
+
+    device = napalm.Devicemanagement(ip='192.168.0.1', output_store=store, replay=True)
+    assert device.open()
+    assert device._cli(['show version']) == {'show version': 'Cisco IOS Software'}
+    # show hosts summary was not recorded; the command fails and there are no facts
+    assert device.send_and_parse_command(commands=['show version', 'show hosts summary']) is None
+    assert device.get_facts() is None
@@ -0,0 +1,41 @@
+import pickle
+from veritas.configparser import parse_cache
+from veritas.configparser import cisco_configparser
+
+
+CONFIG = """hostname lab-1
+!
+interface Loopback0
+ ip address 192.168.0.1 255.255.255.255
+!
+"""
+
+
+def test_cache_entries(tmp_path):
+    cache = parse_cache.ParseCache(str(tmp_path / 'parsed.db'))
+    key = cache.make_key(CONFIG, 'template')
+    assert key != cache.make_key(CONFIG, 'modified template')
+    assert cache.get(key) is None
+    cache.put(key, {'parsed_config': [{'global': {}}], 'naming': None})
+    assert cache.get(key) == {'parsed_config': [{'global': {}}], 'naming': None}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # the cache can be sent to other processes
+    copy = pickle.loads(pickle.dumps(cache))
+    assert len(copy) == 1
+
+    expired = parse_cache.ParseCache(str(tmp_path / 'parsed.db'), max_age=-1)
+    assert expired.get(key) is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_configparser_uses_cache(tmp_path, monkeypatch):
+    cache = parse_cache.ParseCache(str(tmp_path / 'parsed.db'))
+    monkeypatch.setattr(cisco_configparser.Configparser, 'parse_cache', cache)
+    parsed = cisco_configparser.Configparser(config=CONFIG, platform='ios')
+    assert (cache.hits, cache.misses, len(cache)) == (0, 1, 1)
+    cached = cisco_configparser.Configparser(config=CONFIG, platform='ios')
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cached.get_fqdn() == parsed.get_fqdn() == 'lab-1'
+    assert cached.get_interface('Loopback0') == parsed.get_interface('Loopback0')
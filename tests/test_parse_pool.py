@@ -0,0 +1,21 @@
+from veritas.devicemanagement import parse_pool
+from veritas.devicemanagement import textfsm_registry
+
+SHOW_CLOCK = '*10:15:30.123 UTC Mon Oct 18 2026\n'
+
+
+def test_parse_in_processes():
+    expected = textfsm_registry.parse('cisco_ios', 'show clock', SHOW_CLOCK)
+    outputs = {'lab-1': {'platform': 'cisco_ios', 'outputs': {'show clock': SHOW_CLOCK}},
+               'lab-2': {'platform': 'cisco_ios', 'outputs': {'show clock': SHOW_CLOCK,
+                                                              'show unknown command': ''}},
+               'lab-3': {'platform': 'cisco_ios', 'outputs': {}}}
+    with parse_pool.ParsePool(max_workers=2) as pool:
+        assert pool.parse('cisco_ios', {'show clock': SHOW_CLOCK}) == {'show clock': expected}
+        results = {result['device']: result for result in pool.parse_devices(outputs)}
+    assert pool._executor is None
+    assert results['lab-1'] == {'device': 'lab-1', 'result': {'show clock': expected}, 'error': None}
+    # the results of a device are dropped if one of its outputs could not be parsed
+    assert results['lab-2']['result'] is None
+    assert results['lab-2']['error'].startswith('could not parse show unknown command')
+    assert results['lab-3'] == {'device': 'lab-3', 'result': {}, 'error': None}
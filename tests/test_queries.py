@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+from veritas.sot import queries
+
+
+QUERY = 'query devices(__query_vars__) { devices(__devices_params__) { id name @include(if: $get_name) } }'
+
+
+class FakeGetter:
+    """getter that counts the requests of the custom field types"""
+    def __init__(self):
+        self.cf_requests = 0
+        self._sot = SimpleNamespace(nautobot_url='http://nautobot.local',
+                                    sot_config={'queries': {'nb.devices': QUERY}})
+
+    def all_custom_fields_type(self):
+        self.cf_requests += 1
+        return {'net': {'type': 'Text'}}
+
+
+def test_query_is_compiled_once():
+    queries.clear_compiled_queries()
+    getter = FakeGetter()
+    query, variables = queries._prepare_sql_query(getter, ['name'], 'nb.devices', {'cf_net': 'lab', 'name': 'lab-1'})
+    assert 'devices(cf_net: $cf_net,name: $name)' in query
+    assert variables == {'cf_net': 'lab', 'name': 'lab-1', 'get_name': True}
+
+    # the same where keys with other values use the compiled query
+    where = {'name': 'lab-2', 'cf_net': 'site'}
+    assert queries._prepare_sql_query(getter, ['name'], 'nb.devices', where)[0] == query
+    assert getter.cf_requests == 1
+
+    # limit and offset change the query
+    query, variables = queries._prepare_sql_query(getter, ['name'], 'nb.devices', {'name': 'lab'}, limit=10)
+    assert 'devices(name: $name,limit: $limit)' in query
+    assert variables['limit'] == 10
+
+    queries.clear_compiled_queries()
+    queries._prepare_sql_query(getter, ['name'], 'nb.devices', {'cf_net': 'lab'})
+    assert getter.cf_requests == 2
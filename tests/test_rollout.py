@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+from veritas.devicemanagement import rollout
+
+
+class FakeDevice:
+    """scrapli like device that records the config actions"""
+    devices = {}
+
+    def __init__(self, ip, **named):
+        self.ip = ip
+        self.actions = []
+        FakeDevice.devices.setdefault(ip, []).append(self)
+
+    def open(self):
+        return self.ip != 'down'
+
+    def close(self):
+        self.actions.append('close')
+
+    def prepare(self):
+        pass
+
+    def cleanup(self):
+        pass
+
+    def load_config(self, config, replace):
+        self.actions.append('load')
+        return SimpleNamespace(failed=False)
+
+    def diff_config(self):
+        return SimpleNamespace(failed=False, unified_diff=f'+{self.ip}')
+
+    def commit_config(self):
+        self.actions.append('commit')
+        return SimpleNamespace(failed=False)
+
+    def abort_config(self):
+        self.actions.append('abort')
+
+
+def run(devices, **named):
+    FakeDevice.devices = {}
+    engine = rollout.Rollout('admin', 'secret', wave_size=2, max_workers=2,
+                             health_check=lambda device, diff: device['ip'] != 'unhealthy', **named)
+    engine._driver = SimpleNamespace(Devicemanagement=FakeDevice)
+    return {result['device']: result for result in engine.run(devices, 'ntp server 10.0.0.1')}
+
+
+def test_failed_wave_is_aborted():
+    results = run(['lab-1', 'lab-2', 'lab-3', 'unhealthy', 'lab-5'])
+    assert [results[d]['status'] for d in ['lab-1', 'lab-2']] == ['committed', 'committed']
+    assert results['lab-1']['diff'] == '+lab-1'
+    assert FakeDevice.devices['lab-1'][0].actions == ['load', 'commit', 'close']
+
+    # the config of all devices of the failed wave is discarded
+    assert results['lab-3']['status'] == 'aborted'
+    assert results['unhealthy']['status'] == 'aborted'
+    assert results['unhealthy']['error'] == 'health check failed'
+    assert FakeDevice.devices['lab-3'][0].actions == ['load', 'abort', 'close']
+
+    # the following waves are skipped
+    assert results['lab-5']['status'] == 'skipped'
+    assert 'lab-5' not in FakeDevice.devices
+    assert results['lab-5']['wave'] == 2
+
+
+def test_following_waves_are_not_skipped():
+    results = run(['down', 'lab-2', 'lab-3'], stop_on_failure=False)
+    assert results['down']['status'] == 'failed'
+    assert results['down']['error'] == 'could not connect to device'
+    assert results['lab-2']['status'] == 'aborted'
+    assert results['lab-3']['status'] == 'committed'
+
+
+def test_dry_run():
+    FakeDevice.devices = {}
+    engine = rollout.Rollout('admin', 'secret', wave_size=2)
+    engine._driver = SimpleNamespace(Devicemanagement=FakeDevice)
+    results = engine.preview(['lab-1', 'lab-2', 'lab-3'], {'lab-1': 'ntp server 10.0.0.1'})
+    assert [r['status'] for r in results] == ['previewed', 'failed', 'failed']
+    assert results[1]['error'] == 'no config'
+    assert FakeDevice.devices['lab-1'][0].actions == ['load', 'abort', 'close']
@@ -0,0 +1,110 @@
+import threading
+from veritas.sot import selection
+
+
+class FakeSot:
+    nautobot_url = 'http://nautobot.local'
+
+
+def rows(*ids):
+    return [{'id': id, 'name': f'lab-{id}.local'} for id in ids]
+
+
+def test_and_intersects_all_lists():
+    select = selection.Selection(FakeSot(), 'name')
+    assert select._get_items_with_equal_id([rows(3, 1, 2, 1), rows(1, 2, 4), rows(2, 1, 5)]) == rows(1, 2)
+    assert select._get_items_with_equal_id([rows(1, 2), rows(3), rows(1, 2)]) == []
+    assert select._get_items_with_equal_id([rows(1, 2)]) == rows(1, 2)
+
+
+def test_or_merges_all_lists_without_duplicates():
+    select = selection.Selection(FakeSot(), 'name')
+    assert select._get_items([rows(3, 1), rows(1, 2), rows(4, 3)]) == rows(3, 1, 2, 4)
+    assert select._get_items([rows(), rows(1)]) == rows(1)
+
+
+DEVICES = [{'id': 1, 'name': 'lab-1.local', 'location': 'site-1', 'platform': 'nxos'},
+           {'id': 2, 'name': 'lab-2.local', 'location': 'site-1', 'platform': 'ios'},
+           {'id': 3, 'name': 'lab-3.local', 'location': 'site-2', 'platform': 'ios'}]
+
+
+class FakeGetter:
+    """getter that answers the leaf queries of a logical expression"""
+    def __init__(self, concurrent_leafs):
+        self.queries = []
+        self.threads = set()
+        # the leafs wait for each other; this works only if they run concurrently
+        self.barrier = threading.Barrier(concurrent_leafs, timeout=5)
+
+    def query(self, select, using, where, mode, transform):
+        self.queries.append(where)
+        self.threads.add(threading.current_thread().name)
+        self.barrier.wait()
+        return [{'id': d['id'], 'name': d['name']} for d in DEVICES
+                if all(d[key] == value for key, value in where.items())]
+
+
+class LogicalSot(FakeSot):
+    def __init__(self, concurrent_leafs):
+        self.get = FakeGetter(concurrent_leafs)
+        self.metadata = type('Metadata', (), {'custom_fields': lambda self: {}})()
+
+
+def ids(result):
+    return sorted(row['id'] for row in result)
+
+
+def test_leafs_are_queried_concurrently():
+    sot = LogicalSot(concurrent_leafs=2)
+    result = selection.Selection(sot, 'name') \
+                      .using('nb.devices') \
+                      .set(max_workers=2) \
+                      .where('location=site-2 or platform=nxos')
+    assert ids(result) == [1, 3]
+    assert len(sot.get.queries) == 2
+    assert len(sot.get.threads) == 2
+
+
+def test_leafs_are_queried_sequentially():
+    sot = LogicalSot(concurrent_leafs=1)
+    result = selection.Selection(sot, 'name') \
+                      .using('nb.devices') \
+                      .set(max_workers=1) \
+                      .where('(location=site-1 or platform=ios) and (location=site-2 or platform=nxos)')
+    assert ids(result) == [1, 3]
+    assert len(sot.get.queries) == 4
+    assert sot.get.threads == {threading.current_thread().name}
+
+
+class FakePager:
+    """getter that returns the pages of 10 devices"""
+    def __init__(self):
+        self.pages = []
+
+    def query(self, select, using, where, mode, transform, limit=0, offset=0):
+        self.pages.append((limit, offset))
+        return rows(*range(10))[offset:offset + limit]
+
+
+class PagingSot(FakeSot):
+    def __init__(self):
+        self.get = FakePager()
+
+
+def test_iter_where_fetches_pages():
+    for prefetch in (False, True):
+        sot = PagingSot()
+        result = selection.Selection(sot, 'name') \
+                          .using('nb.devices') \
+                          .iter_where('name=lab', page_size=4, prefetch=prefetch)
+        assert next(result) == rows(0)[0]
+        assert list(result) == rows(*range(1, 10))
+        # the last page is smaller than page_size
+        assert sot.get.pages == [(4, 0), (4, 4), (4, 8)]
+
+
+def test_iter_where_fetches_another_page_if_last_page_is_full():
+    sot = PagingSot()
+    result = selection.Selection(sot, 'name').using('nb.devices').iter_where(page_size=5)
+    assert ids(result) == list(range(10))
+    assert sot.get.pages == [(5, 0), (5, 5), (5, 10)]
@@ -0,0 +1,30 @@
+import os
+import pytest
+from ntc_templates.parse import parse_output
+from veritas.devicemanagement import textfsm_registry
+
+SHOW_CLOCK = '*10:15:30.123 UTC Mon Oct 18 2026\n'
+SHOW_IP_INT_BRIEF = """Interface              IP-Address      OK? Method Status                Protocol
+GigabitEthernet0/0     10.0.0.1        YES NVRAM  up                    up
+Loopback0              192.168.0.1     YES NVRAM  up                    up
+"""
+
+
+def test_same_result_as_ntc_templates(monkeypatch):
+    monkeypatch.delenv('NTC_TEMPLATES_DIR', raising=False)
+    textfsm_registry.clear()
+    for command, data in [('show clock', SHOW_CLOCK), ('show ip interface brief', SHOW_IP_INT_BRIEF)]:
+        expected = parse_output(platform='cisco_ios', command=command, data=data)
+        assert textfsm_registry.parse('cisco_ios', command, data) == expected
+        # the compiled template is reset and reused
+        directory, templates = textfsm_registry.get_templates('cisco_ios', command)
+        fsm = textfsm_registry.get_fsm(directory, templates[0])
+        assert textfsm_registry.parse('cisco_ios', command, data) == expected
+        assert textfsm_registry.get_fsm(directory, templates[0]) is fsm
+    assert 'NTC_TEMPLATES_DIR' not in os.environ
+
+
+def test_unknown_command():
+    with pytest.raises(ValueError):
+        textfsm_registry.parse('cisco_ios', 'show unknown command', '')
+    assert textfsm_registry.get_templates('cisco_ios', 'show unknown command') == (None, [])
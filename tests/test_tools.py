@@ -0,0 +1,32 @@
+from veritas.tools import tools
+
+
+DEFAULTS = {'0.0.0.0/0': {'location': 'default', 'role': 'default'},
+            '192.168.0.0/16': {'role': 'network'},
+            '192.168.1.0/24': {'location': 'site-1', 'status': 'active'},
+            '2001:db8::/32': {'location': 'site-6'},
+            'invalid': {'location': 'invalid'}}
+
+
+def test_prefix_defaults_are_merged_with_their_parents():
+    index = tools.PrefixDefaults(DEFAULTS)
+    assert index.lookup('192.168.1.10') == (['0.0.0.0/0', '192.168.0.0/16', '192.168.1.0/24'],
+                                            {'location': 'site-1', 'role': 'network', 'status': 'active'})
+    assert index.get('192.168.2.1') == {'location': 'default', 'role': 'network'}
+    assert index.get('10.0.0.1') == {'location': 'default', 'role': 'default'}
+    assert index.get('2001:db8::1') == {'location': 'site-6'}
+    # unknown prefixes and invalid addresses use 0.0.0.0/0
+    assert index.get('2001:db9::1') == {'location': 'default', 'role': 'default'}
+    assert index.get('no ip') == {'location': 'default', 'role': 'default'}
+
+
+def test_line_matcher():
+    matcher = tools.get_line_matcher('match', 'ic', 'IP Address')
+    assert matcher is tools.get_line_matcher('match', 'ic', 'IP Address')
+    assert matcher.match(' ip address 10.0.0.1 255.255.255.0')
+    assert matcher.match(' IP ADDRESS 10.0.0.1 255.255.255.0', ' ip address 10.0.0.1 255.255.255.0')
+    assert not tools.get_line_matcher('match', 'c', 'IP Address').match(' ip address 10.0.0.1')
+    assert tools.get_line_matcher('match', 'isw', 'Interface').match('interface Loopback0')
+    assert tools.get_line_matcher('match', 'nire', r'^ vlan \d+').match('vlan 100')
+    assert tools.get_line_matcher('match', 're', r'^ vlan \d+').match(' vlan 100')
+    assert not tools.get_line_matcher('nomatch', 'ic', 'vlan').match('vlan 100')
@@ -0,0 +1,72 @@
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from veritas.sot import transport
+
+
+class Handler(BaseHTTPRequestHandler):
+    """answers each path with the next status code of the server"""
+    def _answer(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests.append((self.command, self.path))
+        codes = self.server.codes.get(self.path, [])
+        self.send_response(codes.pop(0) if codes else 200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.codes = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_and_metrics(server):
+    url = f'http://127.0.0.1:{server.server_port}'
+    host = f'127.0.0.1:{server.server_port}'
+    t = transport.Transport(backoff_factor=0)
+    session = t.session()
+    server.codes = {'/api/dcim/devices/': [503, 500], '/api/graphql/': [500, 503]}
+
+    assert session.get(f'{url}/api/dcim/devices/').status_code == 200
+    # a POST request is retried only if it was not processed (503)
+    assert session.post(f'{url}/api/graphql/', json={}).status_code == 500
+    assert session.post(f'{url}/api/graphql/', json={}).status_code == 200
+    assert len(server.requests) == 6
+
+    metrics = t.get_metrics()[host]
+    assert metrics['requests'] == 3
+    assert metrics['retries'] == 3
+    assert metrics['errors'] == 1
+    t.reset_metrics()
+    assert t.get_metrics() == {}
+
+
+def test_write_hooks(server):
+    url = f'http://127.0.0.1:{server.server_port}'
+    written = []
+    t = transport.Transport()
+    t.add_write_hook(written.append)
+    session = t.session()
+    session.get(f'{url}/api/dcim/devices/')
+    session.post(f'{url}/api/graphql/', json={})
+    session.post(f'{url}/api/dcim/devices/', json={})
+    assert [response.request.method for response in written] == ['POST']
+    assert transport.is_write_request('POST', 'graphql/?format=json') is False
+    assert transport.is_write_request('PATCH', '/api/dcim/devices/')
+
+
+def test_unknown_config():
+    with pytest.raises(KeyError):
+        transport.Transport(max_retry=1)
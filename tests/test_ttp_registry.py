@@ -0,0 +1,35 @@
+import threading
+from veritas.configparser import ttp_registry
+
+TEMPLATE = """
+<group name="interfaces">
+interface {{ interface }}
+ description {{ description | ORPHRASE }}
+</group>
+"""
+
+
+def test_template_is_read_once():
+    ttp_registry.clear()
+    template = ttp_registry.get_template('ios')
+    assert template
+    assert ttp_registry.get_template('ios') is template
+    assert ttp_registry.get_template('unknown platform') is None
+    assert ttp_registry.get_template(filename='unknown.ttp') is None
+
+
+def test_parser_is_reused():
+    ttp_registry.clear()
+    first = ttp_registry.parse('interface Gi0/1\n description uplink\n', TEMPLATE)
+    parser = ttp_registry.get_parser(TEMPLATE)
+    second = ttp_registry.parse('interface Gi0/2\n description server\n', TEMPLATE)
+    assert ttp_registry.get_parser(TEMPLATE) is parser
+    assert first == [{'interfaces': {'interface': 'Gi0/1', 'description': 'uplink'}}]
+    assert second == [{'interfaces': {'interface': 'Gi0/2', 'description': 'server'}}]
+
+    # each thread gets its own parser
+    parsers = []
+    thread = threading.Thread(target=lambda: parsers.append(ttp_registry.get_parser(TEMPLATE)))
+    thread.start()
+    thread.join()
+    assert parsers[0] is not parser
@@ -0,0 +1,80 @@
+import pytest
+from types import SimpleNamespace
+from veritas.sot import updater
+
+
+class FakeEndpoint:
+    """endpoint of pynautobot; bulk requests containing a failing id raise an exception"""
+    def __init__(self, names, failing=()):
+        self.items = [SimpleNamespace(id=f'id-{name}', name=name) for name in names]
+        self.failing = set(failing)
+        self.bulk_requests = []
+        self.single_requests = []
+
+    def filter(self, name):
+        return [item for item in self.items if item.name in name]
+
+    def update(self, objects=None, id=None, data=None):
+        if objects is not None:
+            self.bulk_requests.append(objects)
+            if any(obj['id'] in self.failing for obj in objects):
+                raise Exception('bulk request failed')
+            return objects
+        self.single_requests.append(id)
+        if id in self.failing:
+            raise Exception('request failed')
+        return True
+
+
+class FakeApp:
+    """app of pynautobot (dcim, ipam ...); only the devices endpoint is used"""
+    def __init__(self, devices):
+        self.devices = devices
+
+    def __getattr__(self, name):
+        return FakeEndpoint([])
+
+
+class FakeSot:
+    def __init__(self, endpoint):
+        self.invalidated = 0
+        self._app = FakeApp(endpoint)
+
+    def open_nautobot(self):
+        return SimpleNamespace(dcim=self._app, ipam=self._app, extras=self._app)
+
+    def invalidate_cache(self):
+        self.invalidated += 1
+
+
+def fake_updater(names, failing=()):
+    endpoint = FakeEndpoint(names, failing)
+    return updater.Updater(FakeSot(endpoint)), endpoint
+
+
+def test_bulk_update():
+    names = [f'lab-{i}.local' for i in range(5)]
+    upd, endpoint = fake_updater(names)
+    rows = [{'name': name, 'serial': str(i)} for i, name in enumerate(names)] + [{'name': 'unknown.local'}]
+    result = upd.bulk_update('devices', rows, chunk_size=2, filter_size=3)
+    assert result == dict({name: True for name in names}, **{'unknown.local': False})
+    assert [len(request) for request in endpoint.bulk_requests] == [2, 2, 1]
+    assert endpoint.bulk_requests[0][0] == {'serial': '0', 'id': 'id-lab-0.local'}
+
+
+def test_failed_chunk_is_updated_row_by_row():
+    names = [f'lab-{i}.local' for i in range(4)]
+    upd, endpoint = fake_updater(names, failing=['id-lab-1.local'])
+    result = upd.bulk_update('devices', [{'name': name, 'serial': 'x'} for name in names], chunk_size=2)
+    assert result == {'lab-0.local': True, 'lab-1.local': False, 'lab-2.local': True, 'lab-3.local': True}
+    assert endpoint.single_requests == ['id-lab-0.local', 'id-lab-1.local']
+    assert upd._sot.invalidated == 1
+
+
+def test_invalid_rows():
+    upd, endpoint = fake_updater(['lab.local'])
+    with pytest.raises(ValueError):
+        upd.bulk_update('devices', [{'name': 'lab.local', 'serial': '1'}, {'serial': '2'}])
+    with pytest.raises(ValueError):
+        upd.bulk_update('devices', [{'name': 'lab.local', 'serial': '1'}, {'name': 'lab.local', 'serial': '2'}])
+    assert endpoint.bulk_requests == []